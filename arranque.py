@@ -0,0 +1,53 @@
+import time
+
+INICIO = time.perf_counter()  # Antes de importar pygame, para contar también su importación
+
+import json  # noqa: E402
+import sys  # noqa: E402
+
+import pygame  # noqa: E402
+
+import fuentes  # noqa: E402
+
+# Arranque perezoso de los quioscos.
+# Importar un front ya no abre la ventana ni carga fuentes: el vídeo se
+# inicia al crear el juego y cada fuente la primera vez que se dibuja con
+# ella (su archivo sale de la caché en disco de fuentes.py). Solo se inician
+# los subsistemas que se usan; pygame.init() abría también el audio y los
+# mandos. Cada paso anota los ms transcurridos desde que se importó este
+# módulo, y con --arranque el front imprime el informe en JSON tras
+# presentar el primer cuadro y termina.
+
+marcas = {}  # paso -> ms desde INICIO, en el orden en que ocurrieron
+
+
+def marcar(paso):
+    if paso not in marcas:
+        marcas[paso] = round(1000 * (time.perf_counter() - INICIO), 2)
+
+
+def abrir_ventana(tamano, titulo):
+    ventana = pygame.display.get_surface()
+    if ventana is not None and ventana.get_size() == tuple(tamano):
+        return ventana
+    pygame.display.init()
+    pygame.time.Clock().tick()  # Arranca el temporizador de SDL; sin él get_ticks() devuelve 0
+    ventana = pygame.display.set_mode(tamano)
+    pygame.display.set_caption(titulo)
+    marcar("ventana")
+    return ventana
+
+
+def informe():
+    return {"marcas_ms": dict(marcas), "fuentes": fuentes.rutas_fuentes.estadisticas()}
+
+
+# Llamar tras presentar cada cuadro; el primero cierra el informe
+def cuadro_presentado():
+    if "primer_cuadro" in marcas:
+        return False
+    marcar("primer_cuadro")
+    if "--arranque" in sys.argv:
+        print(json.dumps(informe()))
+        return True  # El front termina: solo se pedía medir el arranque
+    return False
@@ -0,0 +1,247 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+# Banco de pruebas de dibujo sin ventana (SDL_VIDEODRIVER=dummy).
+# Cada front se ejecuta en su propio proceso porque crea la ventana al
+# importarse. Un guion de clics pasa por manejar_eventos / procesar_evento
+# para llegar a cada pantalla y en cada una se miden los cuadros por
+# segundo, el tiempo de CPU, los bytes de Python reservados por cuadro
+# (tracemalloc) y las Surface creadas por cuadro. El reloj es virtual
+# (1/60 s por cuadro), así que dos ejecuciones juegan lo mismo. También se
+# mide el arranque de cada front hasta su primer cuadro (--arranque). La
+# salida es JSON; con --comparar ANTERIOR.json se marcan las regresiones.
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame  # noqa: E402
+
+CUADROS = 300
+CUADROS_MEMORIA = 60
+CALENTAMIENTO = 10
+TOLERANCIA = 0.2  # Regresión: más de un 20% peor que la ejecución anterior
+MS_CUADRO = 1000 / 60
+ARRANQUES = 5  # Se informa la mediana: el primer arranque paga la caché de disco
+
+
+# Clics y reloj del guion
+class Guion:
+    def __init__(self):
+        self.posicion = (0, 0)
+        self.ms = 0.0
+        self.superficies = 0
+        self.bytes_superficies = 0
+        pygame.mouse.get_pos = lambda: self.posicion
+        pygame.time.get_ticks = lambda: int(self.ms)
+
+    def clic(self, manejar, x, y):
+        self.posicion = (x, y)
+        manejar(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=(x, y), button=1))
+
+    def avanzar(self):
+        self.ms += MS_CUADRO
+
+    # Cuenta las Surface que se crean con el constructor mientras dura el bloque
+    def contar_superficies(self):
+        guion = self
+        original = pygame.Surface
+
+        class SuperficieContada(original):
+            def __init__(self, tamano, *args, **kwargs):
+                super().__init__(tamano, *args, **kwargs)
+                guion.superficies += 1
+                guion.bytes_superficies += self.get_width() * self.get_height() * self.get_bytesize()
+
+        pygame.Surface = SuperficieContada
+        return original
+
+
+def medir_pantalla(guion, cuadro, cuadros=CUADROS, cuadros_memoria=CUADROS_MEMORIA):
+    for _ in range(CALENTAMIENTO):
+        cuadro()
+
+    inicio, cpu = time.perf_counter(), time.process_time()
+    for _ in range(cuadros):
+        cuadro()
+    segundos, cpu = time.perf_counter() - inicio, time.process_time() - cpu
+
+    # Reservas por cuadro en una pasada aparte: tracemalloc frena mucho
+    guion.superficies = guion.bytes_superficies = 0
+    original = guion.contar_superficies()
+    tracemalloc.start()
+    reservas = []
+    for _ in range(cuadros_memoria):
+        antes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        cuadro()
+        reservas.append(tracemalloc.get_traced_memory()[1] - antes)
+    tracemalloc.stop()
+    pygame.Surface = original
+
+    reservas.sort()
+    return {
+        "fps": round(cuadros / segundos, 1),
+        "ms_por_cuadro": round(1000 * segundos / cuadros, 4),
+        "cpu_ms_por_cuadro": round(1000 * cpu / cuadros, 4),
+        "bytes_python_por_cuadro": reservas[len(reservas) // 2],
+        "superficies_por_cuadro": round(guion.superficies / cuadros_memoria, 2),
+        "bytes_superficies_por_cuadro": guion.bytes_superficies // cuadros_memoria,
+    }
+
+
+def pantallas_code0(guion):
+    import code0
+    from code0 import ANCHO, EstadoJuego
+
+    juego = code0.Juego(semilla=1)
+    clic = lambda x, y: guion.clic(juego.manejar_eventos, x, y)
+
+    def cuadro(guion_cuadro=None):
+        if guion_cuadro:
+            guion_cuadro()
+        if juego.estado == EstadoJuego.JUEGO:
+            juego.actualizar_lanzamiento()
+        juego.dibujar()
+        code0.regiones.presentar()
+        guion.avanzar()
+
+    def jugar():
+        # Tirar en cuanto se pueda; al terminar, "Jugar de nuevo"
+        if juego.estado == EstadoJuego.FINAL:
+            clic(ANCHO // 2, 395)
+        elif not juego.lanzando_dado:
+            clic(ANCHO - 150, 245)
+
+    resultados = {"menu": medir_pantalla(guion, cuadro)}
+    clic(ANCHO // 2, 325)
+    resultados["seleccion"] = medir_pantalla(guion, cuadro)
+    clic(ANCHO // 2, 295)  # 2 Jugadores
+    resultados["juego"] = medir_pantalla(guion, lambda: cuadro(jugar))
+    # La pantalla final se fuerza: llegar jugando lleva cientos de tiradas
+    juego.ganador = juego.jugadores[0]
+    juego.estado = EstadoJuego.FINAL
+    resultados["final"] = medir_pantalla(guion, cuadro)
+    return resultados
+
+
+def pantallas_code1(guion):
+    import code1
+
+    juego = code1.Juego(semilla=1)
+    clic = lambda x, y: guion.clic(juego.procesar_evento, x, y)
+
+    def cuadro(guion_cuadro=None):
+        if guion_cuadro:
+            guion_cuadro()
+        juego.actualizar(code1.MS_POR_CUADRO)
+        juego.dibujar()
+        code1.regiones.presentar()
+        guion.avanzar()
+
+    def jugar():
+        if juego.estado == "fin_partida":
+            clic(400, 475)  # Jugar de nuevo
+        elif not juego.esta_animando():
+            clic(500, 500)
+
+    resultados = {"menu": medir_pantalla(guion, cuadro)}
+    clic(500, 305)  # 2 Jugadores
+    resultados["juego"] = medir_pantalla(guion, lambda: cuadro(jugar))
+    # Hasta el final de la partida sin dibujar
+    for _ in range(200000):
+        if juego.estado == "fin_partida":
+            break
+        if not juego.esta_animando():
+            clic(500, 500)
+        juego.actualizar(code1.MS_POR_CUADRO * 10)
+    resultados["fin_partida"] = medir_pantalla(guion, cuadro)
+    return resultados
+
+
+FRONTS = {"code0": pantallas_code0, "code1": pantallas_code1}
+
+
+# Mediana de los tiempos de arranque de varias ejecuciones del front
+def medir_arranque(nombre, repeticiones=ARRANQUES):
+    ruta = os.path.join(os.path.dirname(os.path.abspath(__file__)), nombre + ".py")
+    informes = []
+    for _ in range(repeticiones):
+        salida = subprocess.run([sys.executable, ruta, "--arranque"],
+                                capture_output=True, text=True, check=True).stdout
+        informes.append(json.loads(salida.strip().splitlines()[-1]))
+    informes.sort(key=lambda informe: informe["marcas_ms"]["primer_cuadro"])
+    mediana = informes[len(informes) // 2]
+    return {"ms_primer_cuadro": mediana["marcas_ms"]["primer_cuadro"],
+            "ms_modulos": mediana["marcas_ms"]["modulos"], "fuentes": mediana["fuentes"]}
+
+
+def ejecutar_front(nombre):
+    guion = Guion()
+    return FRONTS[nombre](guion)
+
+
+# Métricas que empeoran al subir y si una ejecución es peor que la anterior
+def comparar(anterior, actual, tolerancia=TOLERANCIA):
+    regresiones = []
+    for front, pantallas in actual["fronts"].items():
+        for pantalla, metricas in pantallas.items():
+            base = anterior["fronts"].get(front, {}).get(pantalla)
+            if base is None:
+                continue
+            for metrica in ("ms_por_cuadro", "cpu_ms_por_cuadro", "bytes_python_por_cuadro",
+                            "superficies_por_cuadro", "bytes_superficies_por_cuadro"):
+                antes, ahora = base[metrica], metricas[metrica]
+                if ahora > antes * (1 + tolerancia) and ahora - antes > 1e-3:
+                    regresiones.append(f"{front}/{pantalla} {metrica}: {antes} -> {ahora}")
+    for front, metricas in actual.get("arranque", {}).items():
+        base = anterior.get("arranque", {}).get(front)
+        if base is not None and metricas["ms_primer_cuadro"] > base["ms_primer_cuadro"] * (1 + tolerancia):
+            regresiones.append(f"{front}/arranque ms_primer_cuadro: "
+                               f"{base['ms_primer_cuadro']} -> {metricas['ms_primer_cuadro']}")
+    return regresiones
+
+
+def main():
+    def opcion(nombre, convertir, defecto=None):
+        if nombre in sys.argv:
+            return convertir(sys.argv[sys.argv.index(nombre) + 1])
+        return defecto
+
+    # --front NOMBRE mide un solo front en este proceso (uso interno)
+    front = opcion("--front", str)
+    if front is not None:
+        print(json.dumps(ejecutar_front(front)))
+        return 0
+
+    # --salida ARCHIVO guarda el JSON, --comparar ANTERIOR.json lista las regresiones
+    resultado = {"python": platform.python_version(), "pygame": pygame.version.ver, "fronts": {},
+                 "arranque": {}}
+    for nombre in FRONTS:
+        salida = subprocess.run([sys.executable, os.path.abspath(__file__), "--front", nombre],
+                                capture_output=True, text=True, check=True).stdout
+        resultado["fronts"][nombre] = json.loads(salida.strip().splitlines()[-1])
+        resultado["arranque"][nombre] = medir_arranque(nombre)
+    texto = json.dumps(resultado, indent=2)
+    ruta = opcion("--salida", str)
+    if ruta:
+        with open(ruta, "w") as archivo:
+            archivo.write(texto + "\n")
+    print(texto)
+
+    anterior = opcion("--comparar", str)
+    if anterior:
+        with open(anterior) as archivo:
+            regresiones = comparar(json.load(archivo), resultado, opcion("--tolerancia", float, TOLERANCIA))
+        for linea in regresiones:
+            print(f"Regresión: {linea}", file=sys.stderr)
+        return 1 if regresiones else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+from collections import OrderedDict
+
+# Caché LRU con tamaño máximo y cuenta de aciertos y fallos.
+# La usan las cachés de fuentes y textos y también los solucionadores sin
+# ventana (probabilidades, bot, mapa de calor), así que no depende de pygame.
+
+
+class CacheLRU:
+    def __init__(self, capacidad):
+        self.capacidad = capacidad
+        self.datos = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave, crear):
+        valor = self.buscar(clave)
+        if valor is None:
+            valor = crear()
+            self.guardar(clave, valor)
+        return valor
+
+    # None si no está; cuenta el acierto o el fallo
+    def buscar(self, clave):
+        valor = self.datos.get(clave)
+        if valor is None:
+            self.fallos += 1
+            return None
+        self.aciertos += 1
+        self.datos.move_to_end(clave)
+        return valor
+
+    def guardar(self, clave, valor):
+        self.datos[clave] = valor
+        self.datos.move_to_end(clave)
+        if len(self.datos) > self.capacidad:
+            self.datos.popitem(last=False)  # Descartar el menos usado
+
+    def limpiar(self):
+        self.datos.clear()
+
+    def reiniciar_estadisticas(self):
+        self.aciertos = 0
+        self.fallos = 0
@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+
+from markov import AnalisisMarkov
+from motor import REGLAS_CODE0, clave_tablero
+from simulador import SimuladorLotes
+
+# Caché en disco de análisis y simulaciones por tablero.
+# Un tablero son dos diccionarios, así que su huella es el SHA-256 de su
+# forma canónica (casillas, serpientes y escaleras ordenadas y reglas, la
+# misma clave que usan las reglas compiladas) y no depende de cómo se
+# generó. Los resultados se guardan en SQLite por (huella, tipo) y vuelven
+# en la siguiente ejecución sin recalcular nada. Cuando el archivo supera
+# su tamaño máximo se borran los resultados usados hace más tiempo. Si el
+# archivo no se puede abrir o escribir, se calcula todo como si no hubiera
+# caché. La conexión se comparte entre hilos (los mapas de calor se calculan
+# fuera del hilo de dibujo) con un cerrojo alrededor de cada operación.
+
+FORMATO = 1  # Sube si cambia lo que se guarda: las huellas viejas dejan de coincidir
+MAX_BYTES = 64 << 20
+LLENADO_TRAS_RECORTE = 0.9  # Al recortar se deja espacio para unos cuantos resultados más
+REFRESCO_USO = 60  # s; un acierto solo reescribe la fecha de uso si es más vieja
+RUTA_CACHE_TABLEROS = os.environ.get(
+    "SERPIENTES_CACHE_TABLEROS",
+    os.path.join(os.path.expanduser("~"), ".cache", "serpientes-escaleras", "tableros.sqlite"))
+
+
+def huella(tablero, reglas=REGLAS_CODE0):
+    forma = json.dumps([FORMATO, clave_tablero(tablero, reglas)], separators=(",", ":"))
+    return hashlib.sha256(forma.encode()).hexdigest()
+
+
+class CacheTableros:
+    def __init__(self, ruta=RUTA_CACHE_TABLEROS, max_bytes=MAX_BYTES):
+        self.ruta = ruta
+        self.max_bytes = max_bytes
+        self.conexion = None
+        self.cerrojo = threading.Lock()
+        self.sin_disco = False
+        self.aciertos = 0
+        self.fallos = 0
+
+    def conectar(self):
+        if self.conexion is None and not self.sin_disco:
+            try:
+                os.makedirs(os.path.dirname(self.ruta) or ".", exist_ok=True)
+                # Sin transacción implícita: cada sentencia se confirma sola
+                conexion = sqlite3.connect(self.ruta, timeout=5, isolation_level=None, check_same_thread=False)
+                # WAL: los lectores de otros procesos no bloquean y confirmar no espera al disco
+                conexion.execute("PRAGMA journal_mode=WAL")
+                conexion.execute("PRAGMA synchronous=NORMAL")
+                conexion.execute("CREATE TABLE IF NOT EXISTS resultados (huella TEXT NOT NULL, tipo TEXT NOT NULL, "
+                                 "datos BLOB NOT NULL, bytes INTEGER NOT NULL, usado REAL NOT NULL, "
+                                 "PRIMARY KEY (huella, tipo))")
+                conexion.execute("CREATE INDEX IF NOT EXISTS por_uso ON resultados (usado)")
+                self.conexion = conexion
+            except (OSError, sqlite3.Error):
+                self.sin_disco = True
+        return self.conexion
+
+    # El resultado guardado o None
+    def buscar(self, huella, tipo):
+        with self.cerrojo:
+            conexion = self.conectar()
+            if conexion is None:
+                return None
+            try:
+                fila = conexion.execute("SELECT datos, usado FROM resultados WHERE huella = ? AND tipo = ?",
+                                        (huella, tipo)).fetchone()
+                if fila is None:
+                    self.fallos += 1
+                    return None
+                valor = pickle.loads(fila[0])
+                ahora = time.time()
+                if ahora - fila[1] > REFRESCO_USO:
+                    conexion.execute("UPDATE resultados SET usado = ? WHERE huella = ? AND tipo = ?",
+                                     (ahora, huella, tipo))
+            except (sqlite3.Error, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+                # Archivo dañado o resultado de otra versión del código: se recalcula
+                self.fallos += 1
+                return None
+            self.aciertos += 1
+            return valor
+
+    def guardar(self, huella, tipo, valor):
+        datos = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(datos) > self.max_bytes:
+            return
+        with self.cerrojo:
+            conexion = self.conectar()
+            if conexion is None:
+                return
+            try:
+                conexion.execute("INSERT OR REPLACE INTO resultados VALUES (?, ?, ?, ?, ?)",
+                                 (huella, tipo, datos, len(datos), time.time()))
+                self.recortar(conexion)
+            except sqlite3.Error:
+                pass
+
+    # Borra los menos usados hasta quedar por debajo del tamaño máximo
+    def recortar(self, conexion):
+        total = conexion.execute("SELECT COALESCE(SUM(bytes), 0) FROM resultados").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        sobran = total - LLENADO_TRAS_RECORTE * self.max_bytes
+        borrar = []
+        for huella, tipo, bytes_fila in conexion.execute(
+                "SELECT huella, tipo, bytes FROM resultados ORDER BY usado"):
+            if sobran <= 0:
+                break
+            borrar.append((huella, tipo))
+            sobran -= bytes_fila
+        conexion.executemany("DELETE FROM resultados WHERE huella = ? AND tipo = ?", borrar)
+
+    def obtener(self, huella, tipo, calcular):
+        valor = self.buscar(huella, tipo)
+        if valor is None:
+            valor = calcular()
+            self.guardar(huella, tipo, valor)
+        return valor
+
+    def vaciar(self):
+        with self.cerrojo:
+            conexion = self.conectar()
+            if conexion is not None:
+                conexion.execute("DELETE FROM resultados")
+                conexion.execute("VACUUM")
+
+    def estadisticas(self):
+        resultado = {"aciertos": self.aciertos, "fallos": self.fallos, "ruta": self.ruta}
+        with self.cerrojo:
+            conexion = self.conectar()
+            if conexion is not None:
+                resultado["resultados"], resultado["bytes"] = conexion.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM resultados").fetchone()
+        return resultado
+
+
+cache_tableros = CacheTableros()
+
+
+# Lo que se consulta de AnalisisMarkov, sin sus matrices
+def resumir(analisis, max_jugadores=4):
+    turnos = [None] * (analisis.casillas + 1)  # None: casilla inalcanzable
+    for casilla, valor in zip(analisis.estados, analisis.turnos_por_estado):
+        turnos[casilla] = float(valor)
+    turnos[analisis.casillas] = 0.0
+    return {
+        "turnos_esperados": analisis.turnos_esperados,
+        "turnos_por_casilla": turnos,
+        "visitas": analisis.visitas_esperadas().tolist(),
+        "distribucion_turnos": analisis.distribucion_turnos().tolist(),
+        "probabilidades_ganador": {n: analisis.probabilidades_ganador(n).tolist()
+                                   for n in range(2, max_jugadores + 1)},
+    }
+
+
+def analizar(tablero, reglas=REGLAS_CODE0, cache=None):
+    cache = cache or cache_tableros
+    return cache.obtener(huella(tablero, reglas), "analisis",
+                         lambda: resumir(AnalisisMarkov(tablero, reglas)))
+
+
+# Solo las visitas esperadas por casilla: sin la distribución de turnos ni
+# las probabilidades por asiento, que cuestan mucho más en tableros grandes
+def visitas(tablero, reglas=REGLAS_CODE0, cache=None):
+    cache = cache or cache_tableros
+    return cache.obtener(huella(tablero, reglas), "visitas",
+                         lambda: AnalisisMarkov(tablero, reglas).visitas_esperadas().tolist())
+
+
+# ResultadoLotes de la simulación; sin semilla no es repetible y no se guarda
+def simular(tablero, reglas, num_jugadores, partidas, semilla=None, contar=False, cache=None):
+    calcular = lambda: SimuladorLotes(tablero, num_jugadores, reglas, semilla).simular(partidas, contar=contar)
+    if semilla is None:
+        return calcular()
+    cache = cache or cache_tableros
+    tipo = f"simulacion:{num_jugadores}:{partidas}:{semilla}:{int(contar)}"
+    return cache.obtener(huella(tablero, reglas), tipo, calcular)
+
+
+if __name__ == "__main__":
+    # Uso: python cache_tableros.py [--vaciar] — contenido de la caché en JSON
+    if "--vaciar" in sys.argv:
+        cache_tableros.vaciar()
+    print(json.dumps(cache_tableros.estadisticas()))
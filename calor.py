@@ -0,0 +1,88 @@
+import threading
+
+from cache_lru import CacheLRU
+from cache_tableros import simular, visitas
+from motor import TableroLogico, clave_tablero
+
+# Mapa de calor de las casillas donde más se cae.
+# La intensidad de cada casilla sale de las visitas esperadas exactas de la
+# cadena de Markov (de la caché en disco si el tablero ya se vio) o, si el
+# tablero es muy grande o no admite el análisis exacto, de una simulación
+# rápida. Se calcula en un hilo aparte a partir de una copia del tablero,
+# una vez por tablero, y el front lo hornea en la capa del tablero: en cada
+# cuadro solo se copian los bloques ya teñidos.
+
+MAX_TABLEROS = 8
+MAX_CASILLAS_EXACTO = 5000  # Con más casillas se simula
+PARTIDAS_SIMULACION = 20000
+SEMILLA_SIMULACION = 0
+COLOR_CALOR = (255, 80, 0)
+OPACIDAD_MAXIMA = 0.75  # Mezcla con el color de la casilla más visitada
+
+
+# Intensidad 0..1 por casilla (la meta queda en 0). La raíz cuadrada separa
+# mejor las casillas poco visitadas, que son la mayoría.
+def calcular_intensidades(tablero, reglas):
+    conteo = None
+    if tablero.casillas <= MAX_CASILLAS_EXACTO:
+        try:
+            conteo = visitas(tablero, reglas)
+        except ValueError:
+            pass  # Hay casillas desde las que no se llega a la meta
+    if conteo is None:
+        conteo = simular(tablero, reglas, 1, PARTIDAS_SIMULACION, SEMILLA_SIMULACION,
+                         contar=True).caidas.tolist()
+    conteo = list(conteo)
+    conteo[tablero.casillas] = 0.0
+    maximo = max(conteo)
+    if maximo <= 0:
+        return tuple(0.0 for _ in conteo)
+    return tuple((valor / maximo) ** 0.5 for valor in conteo)
+
+
+# Color de una casilla con la intensidad de calor dada
+def teñir(color, intensidad):
+    mezcla = OPACIDAD_MAXIMA * intensidad
+    return tuple(round(c + (calor - c) * mezcla) for c, calor in zip(color, COLOR_CALOR))
+
+
+class MapaCalor:
+    def __init__(self, avisar=None, max_tableros=MAX_TABLEROS):
+        self.avisar = avisar  # Se llama desde el hilo de cálculo al terminar un tablero
+        self.resultados = CacheLRU(max_tableros)
+        self.condicion = threading.Condition()
+        self.pedido = None  # Solo el último tablero pedido
+        self.hilo = None
+
+    # Encarga el cálculo si hace falta; devuelve la clave para consultar
+    def pedir(self, tablero, reglas):
+        clave = clave_tablero(tablero, reglas)
+        with self.condicion:
+            if clave in self.resultados.datos:
+                return clave
+            # Copia: el front puede regenerar el mismo objeto mientras se calcula
+            copia = TableroLogico(tablero.serpientes, tablero.escaleras, tablero.casillas)
+            self.pedido = (clave, copia, reglas)
+            if self.hilo is None:
+                self.hilo = threading.Thread(target=self.trabajar, daemon=True)
+                self.hilo.start()
+            self.condicion.notify()
+        return clave
+
+    # Intensidades por casilla, o None si todavía no están
+    def intensidades(self, clave):
+        with self.condicion:
+            return self.resultados.datos.get(clave)
+
+    def trabajar(self):
+        while True:
+            with self.condicion:
+                while self.pedido is None:
+                    self.condicion.wait()
+                clave, tablero, reglas = self.pedido
+                self.pedido = None
+            intensidades = calcular_intensidades(tablero, reglas)
+            with self.condicion:
+                self.resultados.guardar(clave, intensidades)
+            if self.avisar is not None:
+                self.avisar()
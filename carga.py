@@ -0,0 +1,77 @@
+import asyncio
+import json
+import sys
+import time
+
+from servidor import PUERTO
+
+# Prueba de carga del servidor de salas.
+# Abre N conexiones desde localhost, cada una juega partidas como humano y
+# mide cuánto tarda el servidor desde que se pide una tirada hasta que llega
+# el movimiento de vuelta. Al final imprime los percentiles p50/p99.
+
+
+async def jugador(host, puerto, humanos, bots, partidas, latencias, inicio_juntos):
+    lector, escritor = await asyncio.open_connection(host, puerto)
+    await inicio_juntos.wait()
+    try:
+        for _ in range(partidas):
+            escritor.write(json.dumps({"op": "unirse", "humanos": humanos, "bots": bots}).encode() + b"\n")
+            asiento = None
+            enviado = None
+            while True:
+                mensaje = json.loads(await lector.readline())
+                op = mensaje["op"]
+                if op == "asiento":
+                    asiento = mensaje["asiento"]
+                    continue
+                if op == "error":
+                    raise RuntimeError(mensaje["mensaje"])
+                if op == "mov":
+                    if mensaje["asiento"] == asiento and enviado is not None:
+                        latencias.append(time.perf_counter() - enviado)
+                        enviado = None
+                    if mensaje["resultado"] == "ganador":
+                        break
+                if mensaje["turno"] == asiento and enviado is None:
+                    enviado = time.perf_counter()
+                    escritor.write(b'{"op":"lanzar"}\n')
+    finally:
+        escritor.close()
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(p / 100 * len(valores)))]
+
+
+async def probar(jugadores=10000, partidas=1, humanos=4, bots=0, host="127.0.0.1", puerto=PUERTO):
+    latencias = []
+    inicio_juntos = asyncio.Event()
+    tareas = []
+    # Conectar por tandas para no desbordar la cola de aceptación
+    for i in range(0, jugadores, 500):
+        tandas = [asyncio.create_task(jugador(host, puerto, humanos, bots, partidas,
+                                              latencias, inicio_juntos))
+                  for _ in range(min(500, jugadores - i))]
+        tareas.extend(tandas)
+        await asyncio.sleep(0)
+    comienzo = time.perf_counter()
+    inicio_juntos.set()
+    await asyncio.gather(*tareas)
+    duracion = time.perf_counter() - comienzo
+    return {
+        "jugadores": jugadores,
+        "tiradas": len(latencias),
+        "segundos": round(duracion, 3),
+        "tiradas_por_segundo": round(len(latencias) / duracion),
+        "p50_ms": round(percentil(latencias, 50) * 1000, 3),
+        "p99_ms": round(percentil(latencias, 99) * 1000, 3),
+    }
+
+
+if __name__ == "__main__":
+    # Uso: python carga.py [JUGADORES] [PARTIDAS] [HUMANOS] [BOTS] [PUERTO]
+    argumentos = [int(a) for a in sys.argv[1:]]
+    valores = argumentos + [10000, 1, 4, 0, PUERTO][len(argumentos):]
+    print(json.dumps(asyncio.run(probar(*valores[:4], puerto=valores[4])), indent=2))
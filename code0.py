@@ -1,19 +1,33 @@
+import arranque  # Primero: su reloj cuenta también la importación de pygame
 import pygame
 import sys
-import random
 import math
 from enum import Enum
-
-# Inicializar pygame
-pygame.init()
+from calor import MapaCalor, teñir
+from dados import BORROSO, obtener_atlas
+from fuentes import obtener_fuente, renderizar
+from geometria import obtener_geometria
+from generador import generar_tablero_code0
+from motor import TableroLogico, REGLAS_CODE0, aplicar_variantes, compilar, siguiente_turno
+from perfil import REFRESCO_PANEL, medir, perfil
+from regiones import RegistroRegiones
+from repeticion import (RegistroPartida, TiradasRegistradas, flujo, generador,
+                        guardar_en_carpeta, nueva_semilla)
+from vista import Camara, CapaPorBloques, cruzan_filas
 
 # Constantes
 ANCHO, ALTO = 1000, 700
 TAMANO_CASILLA = 40
-FILAS, COLUMNAS = 20, 10  # Esto nos da 200 casillas
+FILAS, COLUMNAS = 20, 10  # Tablero por defecto: 200 casillas
+CASILLAS = FILAS * COLUMNAS
 MARGEN_TABLERO = 50
 ANCHO_TABLERO = COLUMNAS * TAMANO_CASILLA
-ALTO_TABLERO = FILAS * TAMANO_CASILLA
+
+# Parte de la ventana donde se ve el tablero; si es más alto, la cámara se desplaza
+VISTA_TABLERO = (MARGEN_TABLERO, MARGEN_TABLERO, ANCHO_TABLERO, ALTO - 2 * MARGEN_TABLERO)
+
+# Tablas de casilla -> (fila, columna) y casilla -> centro en píxeles del tablero por defecto
+GEOMETRIA = obtener_geometria(CASILLAS, COLUMNAS, TAMANO_CASILLA)
 
 # Colores
 BLANCO = (255, 255, 255)
@@ -39,129 +53,198 @@ class EstadoJuego(Enum):
     JUEGO = 2
     FINAL = 3
 
-# Configurar la ventana
-ventana = pygame.display.set_mode((ANCHO, ALTO))
-pygame.display.set_caption("Serpientes y Escaleras")
+# Aviso del hilo del mapa de calor: despierta al bucle si está esperando eventos
+EVENTO_CALOR = pygame.event.custom_type()
+
+FPS = 60
+ESPERA_INACTIVO = 500  # ms máximos bloqueado esperando eventos sin animaciones
+# Columnas del CSV del perfilador
+FASES_PERFIL = ["eventos", "actualizar", "dibujar", "dibujar_menu_principal",
+                "dibujar_seleccion_jugadores", "dibujar_juego", "dibujar_final", "perfil", "presentar"]
+
+# La ventana se abre al crear el juego, no al importar el módulo
+ventana = None
 reloj = pygame.time.Clock()
 
+# Regiones de pantalla que cambian entre cuadros
+regiones = RegistroRegiones()
+
+
+def abrir_ventana():
+    global ventana
+    if ventana is None:
+        ventana = arranque.abrir_ventana((ANCHO, ALTO), "Serpientes y Escaleras")
+    return ventana
+
 # Clase Jugador
 class Jugador:
     def __init__(self, id, color):
         self.id = id
         self.color = color
-        self.posicion = 1  # Todos comienzan en la casilla 1
+        self.posicion = REGLAS_CODE0.casilla_inicial  # Todos comienzan en la casilla 1
         self.es_pc = False
+        self.seises = 0  # Seises seguidos en este turno
     
-    def mover(self, pasos):
-        nueva_posicion = self.posicion + pasos
-        if nueva_posicion <= 200:  # No se puede pasar de 200
-            self.posicion = nueva_posicion
-        return self.posicion
+    def reiniciar(self):
+        self.posicion = REGLAS_CODE0.casilla_inicial
+        self.es_pc = False
+        self.seises = 0
+    
+    def mover(self, pasos, tabla):
+        # Las reglas compiladas del tablero resuelven la meta, las serpientes
+        # y las escaleras; devuelve True si las reglas dan otra tirada
+        self.posicion, _, self.seises, repite = tabla.tirar(self.posicion, pasos, self.seises)
+        return repite
 
-    def dibujar(self, superficie):
-        # Convertir posición a coordenadas en el tablero
-        fila, columna = posicion_a_coordenadas(self.posicion)
-        x = MARGEN_TABLERO + columna * TAMANO_CASILLA + TAMANO_CASILLA // 2
-        y = ALTO - MARGEN_TABLERO - fila * TAMANO_CASILLA - TAMANO_CASILLA // 2
+    def centro(self, tablero):
+        # Centro de la casilla en coordenadas del tablero
+        x, y = tablero.geometria.centros[self.posicion]
         
         # Desplazamiento para múltiples jugadores en la misma casilla
         desplazamiento = self.id * 5
-        
-        # Dibujar ficha del jugador
-        pygame.draw.circle(superficie, self.color, (x + desplazamiento, y - desplazamiento), 10)
+        return x + desplazamiento, y - desplazamiento
+    
+    def rect(self, tablero, camara):
+        # Rectángulo que ocupa la ficha en pantalla, recortado a la vista
+        x, y = camara.a_pantalla(*self.centro(tablero))
+        return pygame.Rect(x - 10, y - 10, 21, 21).clip(camara.vista)
+
+    def dibujar(self, superficie, tablero, camara):
+        # Las fichas fuera de la vista no se dibujan
+        x, y = self.centro(tablero)
+        if camara.visible(x, y, margen=10):
+            recorte = superficie.get_clip()
+            superficie.set_clip(camara.vista)
+            pygame.draw.circle(superficie, self.color, camara.a_pantalla(x, y), 10)
+            superficie.set_clip(recorte)
 
 # Clase Tablero
-class Tablero:
-    def __init__(self):
-        self.serpientes = {}  # Dict de cabeza -> cola
-        self.escaleras = {}   # Dict de inicio -> fin
+class Tablero(TableroLogico):
+    def __init__(self, casillas=CASILLAS, rng=None, objetivo=None, generar=generar_tablero_code0):
+        super().__init__(casillas=casillas)  # Dicts vacíos de serpientes y escaleras
+        self.rng = rng if rng is not None else flujo(nueva_semilla(), "tablero")
+        self.objetivo = objetivo  # Turnos esperados buscados (None: sin ajustar)
+        self.generar = generar
+        self.geometria = obtener_geometria(casillas, COLUMNAS, TAMANO_CASILLA)
+        # Tablero horneado por bloques de filas; solo se dibujan los visibles
+        self.capa = CapaPorBloques(self.geometria, self.pintar_bloque)
+        self.calor = None  # Intensidad por casilla del mapa de calor, o None sin él
+        self.generacion = 0  # Cambia con cada tablero nuevo para repintar la pantalla
         self.generar_serpientes_escaleras()
     
     def generar_serpientes_escaleras(self):
-        # Generar escaleras (10 escaleras)
-        for _ in range(10):
-            inicio = random.randint(1, 180)  # No muy cerca del final
-            fin = random.randint(inicio + 10, min(199, inicio + 50))  # Asegurar que suban
-            self.escaleras[inicio] = fin
-        
-        # Generar serpientes (10 serpientes)
-        for _ in range(10):
-            cabeza = random.randint(20, 199)  # No muy cerca del inicio
-            cola = random.randint(max(1, cabeza - 50), cabeza - 5)  # Asegurar que bajen
-            self.serpientes[cabeza] = cola
+        # Exactamente 10 escaleras y 10 serpientes por cada 200 casillas, sin
+        # extremos compartidos, con el flujo del tablero
+        self.generar(self, self.rng, self.objetivo)
+        self.calor = None  # Era del tablero anterior
+        self.generacion += 1
+        self.invalidar_capa()
+    
+    # Nuevo tablero en el mismo objeto: se reutilizan la geometría y las
+    # superficies de la capa. Se vacían los dicts: los generadores del
+    # formato 1 añaden sobre lo que haya
+    def regenerar(self, rng):
+        self.rng = rng
+        self.serpientes.clear()
+        self.escaleras.clear()
+        self.generar_serpientes_escaleras()
+    
+    def invalidar_capa(self):
+        # El tablero cambió: los bloques se vuelven a hornear al dibujarse
+        self.capa.invalidar()
     
-    def verificar_casilla(self, posicion):
-        if posicion in self.escaleras:
-            return self.escaleras[posicion]
-        elif posicion in self.serpientes:
-            return self.serpientes[posicion]
-        return posicion
+    def usar_calor(self, intensidades):
+        # El mapa de calor se hornea con el tablero: solo cambia al llegar o quitarse
+        if intensidades is not self.calor:
+            self.calor = intensidades
+            self.invalidar_capa()
     
-    def dibujar(self, superficie):
-        # Dibujar fondo del tablero
-        pygame.draw.rect(superficie, BLANCO, 
-                        (MARGEN_TABLERO, MARGEN_TABLERO, 
-                         ANCHO_TABLERO, ALTO_TABLERO))
+    def pintar_bloque(self, capa, fila_inicial, fila_final):
+        # Dibujar casillas, números, serpientes y escaleras de las filas
+        # [fila_inicial, fila_final) una sola vez, fuera de pantalla
+        geometria = self.geometria
+        capa.fill(BLANCO)
+        fuente = obtener_fuente(None, 20)
+        dy = -fila_inicial * TAMANO_CASILLA
         
         # Dibujar casillas
-        for fila in range(FILAS):
+        for fila in range(fila_inicial, fila_final):
             for columna in range(COLUMNAS):
+                num_casilla = geometria.casilla_por_celda[fila * COLUMNAS + columna]
+                if num_casilla == 0:
+                    continue
+                
                 # Alternar colores para las casillas
                 if (fila + columna) % 2 == 0:
                     color = AZUL_CLARO
                 else:
                     color = VERDE_CLARO
+                if self.calor is not None:
+                    color = teñir(color, self.calor[num_casilla])
                 
-                x = MARGEN_TABLERO + columna * TAMANO_CASILLA
-                y = MARGEN_TABLERO + fila * TAMANO_CASILLA
+                x = columna * TAMANO_CASILLA
+                y = fila * TAMANO_CASILLA + dy
                 
-                pygame.draw.rect(superficie, color, 
+                pygame.draw.rect(capa, color, 
                                 (x, y, TAMANO_CASILLA, TAMANO_CASILLA))
                 
-                # Calcular número de casilla
-                if fila % 2 == 0:  # Filas pares (0, 2, 4...), de izquierda a derecha
-                    num_casilla = (FILAS - fila - 1) * COLUMNAS + columna + 1
-                else:  # Filas impares (1, 3, 5...), de derecha a izquierda
-                    num_casilla = (FILAS - fila) * COLUMNAS - columna
-                
                 # Dibujar número de casilla
-                fuente = pygame.font.SysFont(None, 20)
                 texto = fuente.render(str(num_casilla), True, NEGRO)
-                superficie.blit(texto, (x + 5, y + 5))
+                capa.blit(texto, (x + 5, y + 5))
         
         # Dibujar serpientes
-        for cabeza, cola in self.serpientes.items():
-            inicio_fila, inicio_col = posicion_a_coordenadas(cabeza)
-            fin_fila, fin_col = posicion_a_coordenadas(cola)
-            
-            x1 = MARGEN_TABLERO + inicio_col * TAMANO_CASILLA + TAMANO_CASILLA // 2
-            y1 = MARGEN_TABLERO + inicio_fila * TAMANO_CASILLA + TAMANO_CASILLA // 2
-            x2 = MARGEN_TABLERO + fin_col * TAMANO_CASILLA + TAMANO_CASILLA // 2
-            y2 = MARGEN_TABLERO + fin_fila * TAMANO_CASILLA + TAMANO_CASILLA // 2
+        for cabeza, cola in cruzan_filas(geometria, self.serpientes, fila_inicial, fila_final):
+            x1, y1 = geometria.centros[cabeza]
+            x2, y2 = geometria.centros[cola]
+            y1, y2 = y1 + dy, y2 + dy
             
-            pygame.draw.line(superficie, (255, 0, 0), (x1, y1), (x2, y2), 3)
-            pygame.draw.circle(superficie, (255, 0, 0), (x1, y1), 5)  # Cabeza
-            pygame.draw.circle(superficie, (150, 0, 0), (x2, y2), 5)  # Cola
+            pygame.draw.line(capa, (255, 0, 0), (x1, y1), (x2, y2), 3)
+            pygame.draw.circle(capa, (255, 0, 0), (x1, y1), 5)  # Cabeza
+            pygame.draw.circle(capa, (150, 0, 0), (x2, y2), 5)  # Cola
         
         # Dibujar escaleras
-        for inicio, fin in self.escaleras.items():
-            inicio_fila, inicio_col = posicion_a_coordenadas(inicio)
-            fin_fila, fin_col = posicion_a_coordenadas(fin)
+        for inicio, fin in cruzan_filas(geometria, self.escaleras, fila_inicial, fila_final):
+            x1, y1 = geometria.centros[inicio]
+            x2, y2 = geometria.centros[fin]
+            y1, y2 = y1 + dy, y2 + dy
             
-            x1 = MARGEN_TABLERO + inicio_col * TAMANO_CASILLA + TAMANO_CASILLA // 2
-            y1 = MARGEN_TABLERO + inicio_fila * TAMANO_CASILLA + TAMANO_CASILLA // 2
-            x2 = MARGEN_TABLERO + fin_col * TAMANO_CASILLA + TAMANO_CASILLA // 2
-            y2 = MARGEN_TABLERO + fin_fila * TAMANO_CASILLA + TAMANO_CASILLA // 2
-            
-            pygame.draw.line(superficie, (0, 128, 0), (x1, y1), (x2, y2), 3)
-            pygame.draw.circle(superficie, (0, 128, 0), (x1, y1), 5)  # Inicio
-            pygame.draw.circle(superficie, (0, 200, 0), (x2, y2), 5)  # Fin
+            pygame.draw.line(capa, (0, 128, 0), (x1, y1), (x2, y2), 3)
+            pygame.draw.circle(capa, (0, 128, 0), (x1, y1), 5)  # Inicio
+            pygame.draw.circle(capa, (0, 200, 0), (x2, y2), 5)  # Fin
+    
+    def dibujar(self, superficie, camara):
+        # Cada cuadro copia solo los bloques horneados que se ven
+        self.capa.dibujar(superficie, camara)
 
 # Clase Juego
 class Juego:
-    def __init__(self):
+    def __init__(self, casillas=CASILLAS, semilla=None, repeticion=None, velocidad=1.0,
+                 carpeta_repeticiones=None, objetivo=None, variantes=(), mostrar_calor=False):
+        abrir_ventana()
         self.estado = EstadoJuego.MENU_PRINCIPAL
-        self.tablero = Tablero()
+        self.casillas = casillas
+        self.objetivo = objetivo
+        self.variantes = tuple(variantes)
+        if repeticion is not None:
+            # El tablero y las reglas son los de cuando se grabó el registro
+            self.objetivo = repeticion.objetivo
+            self.variantes = repeticion.variantes
+            self.generar = generador("code0", repeticion.formato, self.variantes)
+        else:
+            self.generar = generador("code0", variantes=self.variantes)
+        self.reglas = aplicar_variantes(REGLAS_CODE0, self.variantes)
+        # Cada partida saca su semilla de este flujo; con ella se generan el
+        # tablero y las tiradas, y se anota en el registro de la partida
+        self.semilla = nueva_semilla() if semilla is None else semilla
+        self.semillas_partidas = flujo(self.semilla, "partidas")
+        self.repeticion = repeticion
+        self.velocidad = velocidad
+        self.carpeta_repeticiones = carpeta_repeticiones
+        self.registro = None
+        self.rng_dado = flujo(self.semilla, "dado")
+        self.rng_animacion = flujo(self.semilla, "animacion")
+        self.tablero = Tablero(casillas, flujo(self.semilla, "tablero"), self.objetivo, self.generar)
+        self.camara = Camara(VISTA_TABLERO, self.tablero.geometria.alto)
         self.jugadores = []
         self.jugador_actual = 0
         self.valor_dado = 0
@@ -170,23 +253,66 @@ class Juego:
         self.ganador = None
         self.num_jugadores = 0
         self.incluir_pc = False
+        # Mapa de calor de caídas (tecla H); se calcula en otro hilo
+        self.mostrar_calor = mostrar_calor
+        self.mapa_calor = MapaCalor(avisar=lambda: pygame.event.post(pygame.event.Event(EVENTO_CALOR)))
+        self.clave_calor = None
+        
+        # Una repetición empieza directamente en el juego
+        if repeticion is not None:
+            self.casillas = repeticion.casillas
+            self.iniciar_juego(repeticion.num_jugadores)
     
     def iniciar_juego(self, num_jugadores, incluir_pc=False):
-        self.jugadores = []
         self.num_jugadores = num_jugadores
         self.incluir_pc = incluir_pc
         
-        # Crear jugadores
-        for i in range(num_jugadores):
+        # Reutilizar los jugadores de la partida anterior y crear los que falten
+        del self.jugadores[num_jugadores:]
+        for jugador in self.jugadores:
+            jugador.reiniciar()
+        for i in range(len(self.jugadores), num_jugadores):
             self.jugadores.append(Jugador(i, COLORES_JUGADORES[i]))
         
         # Si se incluye PC, reemplazar el último jugador
         if incluir_pc:
             self.jugadores[-1].es_pc = True
         
+        # Flujos de la partida: los de una repetición salen de su registro
+        if self.repeticion is not None:
+            semilla_partida = self.repeticion.semilla
+            self.rng_dado = TiradasRegistradas(self.repeticion.tiradas)
+            for jugador in self.jugadores:
+                jugador.es_pc = True  # Nadie juega: las tiradas ya están escritas
+        else:
+            semilla_partida = self.semillas_partidas.randrange(2 ** 64)
+            self.rng_dado = flujo(semilla_partida, "dado")
+        self.rng_animacion = flujo(semilla_partida, "animacion")
+        self.registro = RegistroPartida(semilla_partida, "code0", self.casillas, num_jugadores,
+                                        objetivo=self.objetivo, variantes=self.variantes)
+        
         self.jugador_actual = 0
         self.estado = EstadoJuego.JUEGO
-        self.tablero = Tablero()  # Generar nuevo tablero
+        # Generar nuevo tablero (en el mismo objeto si tiene el mismo tamaño)
+        if self.tablero.casillas == self.casillas:
+            self.tablero.regenerar(flujo(semilla_partida, "tablero"))
+        else:
+            self.tablero = Tablero(self.casillas, flujo(semilla_partida, "tablero"),
+                                   self.objetivo, self.generar)
+            self.camara = Camara(VISTA_TABLERO, self.tablero.geometria.alto)
+        self.pedir_calor()
+        
+        if self.jugadores[0].es_pc:
+            self.lanzar_dado()
+    
+    def pedir_calor(self):
+        # Se calcula mientras se dibujan los primeros cuadros del tablero nuevo
+        if self.mostrar_calor:
+            self.clave_calor = self.mapa_calor.pedir(self.tablero, self.reglas)
+    
+    def esta_animando(self):
+        # El dado (también el de la PC) es lo único que se mueve solo
+        return self.estado == EstadoJuego.JUEGO and self.lanzando_dado
     
     def lanzar_dado(self):
         if not self.lanzando_dado:
@@ -196,25 +322,26 @@ class Juego:
     def actualizar_lanzamiento(self):
         if self.lanzando_dado:
             tiempo_actual = pygame.time.get_ticks()
-            if tiempo_actual - self.tiempo_lanzamiento > 1000:  # 1 segundo de animación
-                self.valor_dado = random.randint(1, 6)
+            if tiempo_actual - self.tiempo_lanzamiento > 1000 / self.velocidad:  # 1 segundo de animación
+                self.valor_dado = self.rng_dado.randint(1, 6)
                 self.lanzando_dado = False
+                self.registro.anotar(self.valor_dado)
                 
-                # Mover jugador
+                # Mover jugador (incluye serpientes y escaleras)
                 jugador = self.jugadores[self.jugador_actual]
-                nueva_posicion = jugador.mover(self.valor_dado)
-                
-                # Verificar si cayó en serpiente o escalera
-                nueva_posicion = self.tablero.verificar_casilla(nueva_posicion)
-                jugador.posicion = nueva_posicion
+                repite = jugador.mover(self.valor_dado, compilar(self.tablero, self.reglas))
                 
                 # Verificar si hay un ganador
-                if nueva_posicion == 200:
+                if jugador.posicion == self.tablero.casillas:
                     self.ganador = jugador
                     self.estado = EstadoJuego.FINAL
+                    self.registro.ganador = jugador.id
+                    if self.carpeta_repeticiones and self.repeticion is None:
+                        guardar_en_carpeta(self.registro, self.carpeta_repeticiones)
                 else:
-                    # Pasar al siguiente jugador
-                    self.jugador_actual = (self.jugador_actual + 1) % len(self.jugadores)
+                    # Pasar al siguiente jugador, salvo que las reglas den otra tirada
+                    if not repite:
+                        self.jugador_actual = siguiente_turno(self.jugador_actual, len(self.jugadores))
                     
                     # Si el siguiente jugador es PC, lanzar automáticamente
                     if self.jugadores[self.jugador_actual].es_pc:
@@ -223,6 +350,13 @@ class Juego:
     def dibujar(self):
         ventana.fill(GRIS)
         
+        # Un cambio de pantalla (o de tablero) repinta la ventana entera
+        if self.estado == EstadoJuego.JUEGO:
+            regiones.region("pantalla", ventana.get_rect(),
+                            (self.estado, id(self.tablero), self.tablero.generacion))
+        else:
+            regiones.region("pantalla", ventana.get_rect(), self.estado)
+        
         if self.estado == EstadoJuego.MENU_PRINCIPAL:
             self.dibujar_menu_principal()
         elif self.estado == EstadoJuego.SELECCION_JUGADORES:
@@ -232,22 +366,24 @@ class Juego:
         elif self.estado == EstadoJuego.FINAL:
             self.dibujar_final()
     
+    @medir("dibujar_menu_principal")
     def dibujar_menu_principal(self):
         # Dibujar título
-        fuente_titulo = pygame.font.SysFont(None, 72)
-        texto_titulo = fuente_titulo.render("Serpientes y Escaleras", True, NEGRO)
+        fuente_titulo = obtener_fuente(None, 72)
+        texto_titulo = renderizar(fuente_titulo, "Serpientes y Escaleras", NEGRO)
         ventana.blit(texto_titulo, (ANCHO // 2 - texto_titulo.get_width() // 2, 150))
         
         # Dibujar botón de inicio
         pygame.draw.rect(ventana, VERDE_CLARO, (ANCHO // 2 - 100, 300, 200, 50))
-        fuente_boton = pygame.font.SysFont(None, 36)
-        texto_boton = fuente_boton.render("Comenzar", True, NEGRO)
+        fuente_boton = obtener_fuente(None, 36)
+        texto_boton = renderizar(fuente_boton, "Comenzar", NEGRO)
         ventana.blit(texto_boton, (ANCHO // 2 - texto_boton.get_width() // 2, 310))
     
+    @medir("dibujar_seleccion_jugadores")
     def dibujar_seleccion_jugadores(self):
         # Dibujar título
-        fuente_titulo = pygame.font.SysFont(None, 48)
-        texto_titulo = fuente_titulo.render("Selecciona Jugadores", True, NEGRO)
+        fuente_titulo = obtener_fuente(None, 48)
+        texto_titulo = renderizar(fuente_titulo, "Selecciona Jugadores", NEGRO)
         ventana.blit(texto_titulo, (ANCHO // 2 - texto_titulo.get_width() // 2, 100))
         
         opciones = ["1 Jugador vs PC", "2 Jugadores", "3 Jugadores", "4 Jugadores"]
@@ -255,63 +391,75 @@ class Juego:
         for i, opcion in enumerate(opciones):
             y = 200 + i * 70
             pygame.draw.rect(ventana, AZUL_CLARO, (ANCHO // 2 - 150, y, 300, 50))
-            fuente_opcion = pygame.font.SysFont(None, 36)
-            texto_opcion = fuente_opcion.render(opcion, True, NEGRO)
+            fuente_opcion = obtener_fuente(None, 36)
+            texto_opcion = renderizar(fuente_opcion, opcion, NEGRO)
             ventana.blit(texto_opcion, (ANCHO // 2 - texto_opcion.get_width() // 2, y + 10))
     
+    @medir("dibujar_juego")
     def dibujar_juego(self):
-        # Dibujar tablero
-        self.tablero.dibujar(ventana)
+        # La cámara sigue al jugador del turno
+        self.camara.seguir(self.jugadores[self.jugador_actual].centro(self.tablero)[1])
+        
+        # Dibujar tablero (con el mapa de calor en cuanto esté calculado)
+        self.tablero.usar_calor(self.mapa_calor.intensidades(self.clave_calor) if self.mostrar_calor else None)
+        self.tablero.dibujar(ventana, self.camara)
+        regiones.region("tablero", self.camara.vista, (self.camara.y, self.tablero.calor is not None))
         
         # Dibujar jugadores
         for jugador in self.jugadores:
-            jugador.dibujar(ventana)
+            jugador.dibujar(ventana, self.tablero, self.camara)
+            regiones.region(("ficha", jugador.id), jugador.rect(self.tablero, self.camara), jugador.posicion)
         
         # Dibujar información del turno y dado
-        fuente_info = pygame.font.SysFont(None, 36)
-        texto_turno = fuente_info.render(f"Turno: Jugador {self.jugador_actual + 1}", True, self.jugadores[self.jugador_actual].color)
+        fuente_info = obtener_fuente(None, 36)
+        texto_turno = renderizar(fuente_info, f"Turno: Jugador {self.jugador_actual + 1}", self.jugadores[self.jugador_actual].color)
         ventana.blit(texto_turno, (ANCHO - 250, 50))
+        regiones.region("turno", (ANCHO - 250, 50, 250, texto_turno.get_height()), self.jugador_actual)
         
-        # Dibujar dado
-        pygame.draw.rect(ventana, BLANCO, (ANCHO - 200, 100, 100, 100))
+        # Dibujar dado: una cara del atlas (la borrosa antes de la primera tirada)
         if self.lanzando_dado:
-            valor_mostrado = random.randint(1, 6)
+            valor_mostrado = self.rng_animacion.randint(1, 6)
         else:
-            valor_mostrado = self.valor_dado if self.valor_dado > 0 else "?"
-        
-        texto_dado = fuente_info.render(str(valor_mostrado), True, NEGRO)
-        ventana.blit(texto_dado, (ANCHO - 150, 130))
+            valor_mostrado = self.valor_dado if self.valor_dado > 0 else BORROSO
+        obtener_atlas(100, BLANCO, NEGRO).dibujar(ventana, ANCHO - 200, 100, valor_mostrado)
+        regiones.region("dado", (ANCHO - 200, 100, 100, 100), valor_mostrado)
         
         # Dibujar botón de lanzar dado
         if not self.lanzando_dado and not self.jugadores[self.jugador_actual].es_pc:
             pygame.draw.rect(ventana, VERDE_CLARO, (ANCHO - 200, 220, 100, 50))
-            fuente_boton = pygame.font.SysFont(None, 24)
-            texto_boton = fuente_boton.render("Lanzar", True, NEGRO)
+            fuente_boton = obtener_fuente(None, 24)
+            texto_boton = renderizar(fuente_boton, "Lanzar", NEGRO)
             ventana.blit(texto_boton, (ANCHO - 170, 235))
+            regiones.region("boton_lanzar", (ANCHO - 200, 220, 100, 50), True)
     
+    @medir("dibujar_final")
     def dibujar_final(self):
         ventana.fill(ROSA_CLARO)
         
         # Dibujar mensaje de ganador
-        fuente_titulo = pygame.font.SysFont(None, 72)
-        texto_titulo = fuente_titulo.render(f"¡Jugador {self.ganador.id + 1} Gana!", True, self.ganador.color)
+        fuente_titulo = obtener_fuente(None, 72)
+        texto_titulo = renderizar(fuente_titulo, f"¡Jugador {self.ganador.id + 1} Gana!", self.ganador.color)
         ventana.blit(texto_titulo, (ANCHO // 2 - texto_titulo.get_width() // 2, 150))
         
         # Dibujar botón de volver al menú
         pygame.draw.rect(ventana, VERDE_CLARO, (ANCHO // 2 - 150, 300, 300, 50))
-        fuente_boton = pygame.font.SysFont(None, 36)
-        texto_boton = fuente_boton.render("Volver al Menú", True, NEGRO)
+        fuente_boton = obtener_fuente(None, 36)
+        texto_boton = renderizar(fuente_boton, "Volver al Menú", NEGRO)
         ventana.blit(texto_boton, (ANCHO // 2 - texto_boton.get_width() // 2, 310))
         
         # Dibujar botón de jugar de nuevo
         pygame.draw.rect(ventana, AZUL_CLARO, (ANCHO // 2 - 150, 370, 300, 50))
-        texto_boton = fuente_boton.render("Jugar de Nuevo", True, NEGRO)
+        texto_boton = renderizar(fuente_boton, "Jugar de Nuevo", NEGRO)
         ventana.blit(texto_boton, (ANCHO // 2 - texto_boton.get_width() // 2, 380))
 
     def manejar_eventos(self, evento):
         if evento.type == pygame.QUIT:
             return False
         
+        if evento.type == pygame.KEYDOWN and evento.key == pygame.K_h:
+            self.mostrar_calor = not self.mostrar_calor
+            self.pedir_calor()
+        
         if evento.type == pygame.MOUSEBUTTONDOWN:
             pos_mouse = pygame.mouse.get_pos()
             
@@ -348,36 +496,79 @@ class Juego:
         return True
 
 # Función para convertir posición (1-200) a coordenadas (fila, columna)
-def posicion_a_coordenadas(posicion):
-    posicion -= 1  # Ajustar a índice 0
-    fila = FILAS - 1 - (posicion // COLUMNAS)
-    
-    if (FILAS - 1 - fila) % 2 == 0:  # Filas pares (desde abajo)
-        columna = posicion % COLUMNAS
-    else:  # Filas impares (desde abajo)
-        columna = COLUMNAS - 1 - (posicion % COLUMNAS)
-    
-    return fila, columna
+def posicion_a_coordenadas(posicion, geometria=GEOMETRIA):
+    return geometria.filas_columnas[posicion]
 
 # Función principal
 def main():
-    juego = Juego()
+    def opcion(nombre, convertir, defecto=None):
+        if nombre in sys.argv:
+            return convertir(sys.argv[sys.argv.index(nombre) + 1])
+        return defecto
+    
+    arranque.marcar("modulos")
+    # --casillas N juega en un tablero de N casillas, --semilla N fija la
+    # sesión, --turnos N genera tableros que duran unos N turnos por ficha,
+    # --guardar CARPETA escribe un registro por partida y
+    # --repetir ARCHIVO [--velocidad X] dibuja una partida registrada,
+    # --reglas V1,V2 añade variantes (exacto, rebote, seis_repite, tres_seises),
+    # --calor empieza con el mapa de calor de caídas (tecla H) y
+    # --arranque imprime los tiempos de arranque tras el primer cuadro y sale
+    repeticion = opcion("--repetir", RegistroPartida.cargar)
+    # F3 muestra el panel de tiempos por fase; --perfil-csv ARCHIVO los guarda por cuadro
+    if "--perfil-csv" in sys.argv:
+        perfil.exportar_csv(opcion("--perfil-csv", str), FASES_PERFIL)
+    juego = Juego(opcion("--casillas", int, CASILLAS), semilla=opcion("--semilla", int), repeticion=repeticion,
+                  velocidad=opcion("--velocidad", float, 1.0),
+                  carpeta_repeticiones=opcion("--guardar", str), objetivo=opcion("--turnos", int),
+                  variantes=opcion("--reglas", lambda texto: texto.split(","), ()),
+                  mostrar_calor="--calor" in sys.argv)
+    arranque.marcar("juego")
     ejecutando = True
     
+    # Con --pantalla-completa se presenta la ventana entera en cada cuadro
+    regiones.pantalla_completa = "--pantalla-completa" in sys.argv
+    
     while ejecutando:
-        for evento in pygame.event.get():
-            ejecutando = juego.manejar_eventos(evento)
+        if juego.esta_animando() or "primer_cuadro" not in arranque.marcas:
+            # Animación en curso (o primer cuadro, que no espera eventos): avanzar a FPS fijos
+            reloj.tick(FPS)
+            eventos = pygame.event.get()
+        else:
+            # Nada se mueve: bloquear hasta el próximo evento
+            evento = pygame.event.wait(ESPERA_INACTIVO)
+            eventos = pygame.event.get()
+            if evento.type != pygame.NOEVENT:
+                eventos.insert(0, evento)
+        
+        perfil.inicio_cuadro()
+        for evento in eventos:
+            if evento.type == pygame.KEYDOWN and evento.key == pygame.K_F3:
+                perfil.alternar_panel()
+            elif not juego.manejar_eventos(evento):
+                ejecutando = False
+        perfil.marca("eventos")
         
         # Actualizar lógica del juego
         if juego.estado == EstadoJuego.JUEGO:
             juego.actualizar_lanzamiento()
+        perfil.marca("actualizar")
         
         # Dibujar
         juego.dibujar()
+        perfil.marca("dibujar")
+        panel = perfil.dibujar_panel(ventana)
+        if panel is not None:
+            regiones.region("perfil", panel, perfil.cuadros // REFRESCO_PANEL)
+        perfil.marca("perfil")
         
-        pygame.display.flip()
-        reloj.tick(60)
+        regiones.presentar()
+        perfil.marca("presentar")
+        perfil.fin_cuadro()
+        if arranque.cuadro_presentado():
+            ejecutando = False
     
+    perfil.cerrar()
     pygame.quit()
     sys.exit()
 
@@ -1,16 +1,32 @@
+import arranque  # Primero: su reloj cuenta también la importación de pygame
 import pygame
-import random
 import sys
 from pygame.locals import *
-
-# Inicializar Pygame
-pygame.init()
-pygame.font.init()
+from calor import MapaCalor, teñir
+from dados import BORROSO, obtener_atlas
+from fichas import BotEnHilo, BotExpectimax
+from fuentes import obtener_fuente, renderizar
+from geometria import obtener_geometria
+from generador import generar_tablero_code1
+from motor import (TableroLogico, REGLAS_CODE1, aplicar_variantes, clave_tablero, compilar,
+                   siguiente_turno)
+from perfil import REFRESCO_PANEL, medir, perfil
+from probabilidades import Solucionador
+from regiones import RegistroRegiones
+from repeticion import (RegistroPartida, TiradasRegistradas, flujo, generador,
+                        guardar_en_carpeta, nueva_semilla)
+from vista import Camara, CapaPorBloques, cruzan_filas
 
 # Constantes
 ANCHO = 1000
 ALTO = 700
 FPS = 60
+MS_POR_CUADRO = 1000 / FPS
+ESPERA_INACTIVO = 500  # ms máximos bloqueado esperando eventos sin animaciones
+MAX_DT = 250           # ms; evita saltos de lógica tras una pausa larga
+# Columnas del CSV del perfilador
+FASES_PERFIL = ["eventos", "actualizar", "dibujar", "dibujar_menu_principal", "dibujar_juego",
+                "dibujar_fin_partida", "perfil", "presentar"]
 FONDO = (25, 25, 35)
 BLANCO = (255, 255, 255)
 NEGRO = (0, 0, 0)
@@ -26,252 +42,368 @@ NARANJA = (255, 165, 0)
 # Colores para los jugadores
 COLORES_JUGADORES = [ROJO, AZUL, VERDE, AMARILLO]
 
-# Fuentes
-FUENTE_GRANDE = pygame.font.SysFont("Arial", 48, bold=True)
-FUENTE_MEDIANA = pygame.font.SysFont("Arial", 32, bold=True)
-FUENTE_PEQUEÑA = pygame.font.SysFont("Arial", 20)
+# Fuentes (nombre, tamaño, negrita); se cargan la primera vez que se dibujan
+FUENTE_GRANDE = ("Arial", 48, True)
+FUENTE_MEDIANA = ("Arial", 32, True)
+FUENTE_PEQUEÑA = ("Arial", 20, False)
+
+# Aviso del hilo de probabilidades: despierta al bucle si está esperando eventos
+EVENTO_PROBABILIDADES = pygame.event.custom_type()
+# Igual para el mapa de calor de caídas
+EVENTO_CALOR = pygame.event.custom_type()
 
-# Configuración de la ventana
-ventana = pygame.display.set_mode((ANCHO, ALTO))
-pygame.display.set_caption("Serpientes y Escaleras")
+# La ventana se abre al crear el juego, no al importar el módulo
+ventana = None
 reloj = pygame.time.Clock()
 
-class Tablero:
-    def __init__(self):
-        self.casillas = 200
-        self.filas = 20
-        self.columnas = 10
-        self.tam_casilla = 60
+# Regiones de pantalla que cambian entre cuadros
+regiones = RegistroRegiones()
+
+
+def abrir_ventana():
+    global ventana
+    if ventana is None:
+        ventana = arranque.abrir_ventana((ANCHO, ALTO), "Serpientes y Escaleras")
+    return ventana
+
+class Tablero(TableroLogico):
+    def __init__(self, casillas=200, columnas=10, tam_casilla=60, rng=None, objetivo=None,
+                 generar=generar_tablero_code1):
+        super().__init__(casillas=casillas)
+        self.rng = rng if rng is not None else flujo(nueva_semilla(), "tablero")
+        self.objetivo = objetivo  # Turnos esperados buscados (None: sin ajustar)
+        self.generar = generar
+        self.columnas = columnas
+        self.tam_casilla = tam_casilla
         self.margen_x = (ANCHO - self.columnas * self.tam_casilla) // 2
         self.margen_y = 50
-        self.serpientes = {}
-        self.escaleras = {}
+        # Tablas precalculadas de casilla -> centro en píxeles y píxel -> casilla
+        # (coordenadas del tablero; la cámara las lleva a la pantalla)
+        self.geometria = obtener_geometria(self.casillas, self.columnas, self.tam_casilla,
+                                           primera_fila_izquierda=False)
+        self.filas = self.geometria.filas
+        self.camara = Camara((self.margen_x, self.margen_y, self.geometria.ancho, ALTO - 2 * self.margen_y),
+                             self.geometria.alto)
+        # Tablero horneado por bloques de filas; solo se dibujan los visibles
+        self.capa = CapaPorBloques(self.geometria, self.pintar_bloque)
+        self.calor = None  # Intensidad por casilla del mapa de calor, o None sin él
         self.generar_serpientes_escaleras()
     
     def generar_serpientes_escaleras(self):
-        # Generar serpientes (retrocesos)
-        num_serpientes = 15
-        for _ in range(num_serpientes):
-            inicio = random.randint(30, self.casillas - 1)  # Evitar casillas muy bajas
-            fin = random.randint(1, inicio - 20)  # Retroceso significativo
-            self.serpientes[inicio] = fin
-        
-        # Generar escaleras (avances)
-        num_escaleras = 15
-        for _ in range(num_escaleras):
-            inicio = random.randint(1, self.casillas - 30)  # Evitar casillas muy altas
-            fin = random.randint(inicio + 20, min(inicio + 80, self.casillas - 1))  # Avance significativo
-            # Evitar que una escalera termine donde empieza una serpiente
-            if fin not in self.serpientes:
-                self.escaleras[inicio] = fin
+        # Exactamente 15 serpientes y 15 escaleras por cada 200 casillas, sin
+        # extremos compartidos, con el flujo del tablero
+        self.generar(self, self.rng, self.objetivo)
+        self.calor = None  # Era del tablero anterior
+        self.invalidar_capa()
     
     def obtener_coordenadas_casilla(self, numero_casilla):
-        if numero_casilla <= 0 or numero_casilla > self.casillas:
+        # Centro en pantalla de la casilla (zigzag), o None si está fuera del tablero
+        coord = self.geometria.centro(numero_casilla)
+        if coord is None:
             return None
-        
-        # Ajustar a índice base 0
-        numero_casilla -= 1
-        
-        # Calcular fila y columna (zigzag)
-        fila = 19 - (numero_casilla // 10)
-        col = numero_casilla % 10
-        
-        # En filas pares, invertir el orden de las columnas (zigzag)
-        if fila % 2 == 1:
-            col = 9 - col
-            
-        # Convertir a coordenadas en píxeles
-        x = self.margen_x + col * self.tam_casilla + self.tam_casilla // 2
-        y = self.margen_y + fila * self.tam_casilla + self.tam_casilla // 2
-        
-        return (x, y)
+        return self.camara.a_pantalla(*coord)
     
-    def dibujar(self):
-        for i in range(1, self.casillas + 1):
-            # Determinar color de la casilla
-            if i in self.serpientes:
-                color_casilla = (220, 100, 100)  # Rojo claro para serpientes
-            elif i in self.escaleras:
-                color_casilla = (100, 220, 100)  # Verde claro para escaleras
-            else:
-                color_casilla = (220, 220, 220)  # Gris claro para normal
+    def invalidar_capa(self):
+        # El tablero cambió: los bloques se vuelven a hornear al dibujarse
+        self.capa.invalidar()
+    
+    def usar_calor(self, intensidades):
+        # El mapa de calor se hornea con el tablero: solo cambia al llegar o quitarse
+        if intensidades is not self.calor:
+            self.calor = intensidades
+            self.invalidar_capa()
+    
+    def pintar_bloque(self, capa, fila_inicial, fila_final):
+        # Dibujar casillas, números, serpientes y escaleras de las filas
+        # [fila_inicial, fila_final) una sola vez, fuera de pantalla
+        geometria = self.geometria
+        capa.fill(FONDO)
+        dy = -fila_inicial * self.tam_casilla
+        
+        for fila in range(fila_inicial, fila_final):
+            for col in range(self.columnas):
+                i = geometria.casilla_por_celda[fila * self.columnas + col]
+                if i == 0:
+                    continue
                 
-            # Calcular posición
-            coord = self.obtener_coordenadas_casilla(i)
-            if coord:
-                x, y = coord
+                # Determinar color de la casilla
+                if i in self.serpientes:
+                    color_casilla = (220, 100, 100)  # Rojo claro para serpientes
+                elif i in self.escaleras:
+                    color_casilla = (100, 220, 100)  # Verde claro para escaleras
+                else:
+                    color_casilla = (220, 220, 220)  # Gris claro para normal
+                if self.calor is not None:
+                    color_casilla = teñir(color_casilla, self.calor[i])
+                
+                x, y = geometria.centros[i]
+                y += dy
                 
                 # Dibujar casilla
-                pygame.draw.rect(ventana, color_casilla, 
+                pygame.draw.rect(capa, color_casilla, 
                                 (x - self.tam_casilla//2, y - self.tam_casilla//2, 
                                  self.tam_casilla, self.tam_casilla))
                 
                 # Dibujar borde
-                pygame.draw.rect(ventana, NEGRO, 
+                pygame.draw.rect(capa, NEGRO, 
                                 (x - self.tam_casilla//2, y - self.tam_casilla//2, 
                                  self.tam_casilla, self.tam_casilla), 1)
                 
                 # Dibujar número de casilla
-                texto = FUENTE_PEQUEÑA.render(str(i), True, NEGRO)
-                ventana.blit(texto, (x - texto.get_width()//2, y - texto.get_height()//2))
+                texto = obtener_fuente(*FUENTE_PEQUEÑA).render(str(i), True, NEGRO)
+                capa.blit(texto, (x - texto.get_width()//2, y - texto.get_height()//2))
         
         # Dibujar serpientes y escaleras
-        for inicio, fin in self.serpientes.items():
-            inicio_coord = self.obtener_coordenadas_casilla(inicio)
-            fin_coord = self.obtener_coordenadas_casilla(fin)
-            if inicio_coord and fin_coord:
-                # Dibujar línea con efecto serpentina
-                pygame.draw.line(ventana, ROJO, inicio_coord, fin_coord, 4)
-                # Dibujar cabeza de serpiente
-                pygame.draw.circle(ventana, ROJO, fin_coord, 8)
-        
-        for inicio, fin in self.escaleras.items():
-            inicio_coord = self.obtener_coordenadas_casilla(inicio)
-            fin_coord = self.obtener_coordenadas_casilla(fin)
-            if inicio_coord and fin_coord:
-                # Dibujar línea de escalera
-                pygame.draw.line(ventana, VERDE, inicio_coord, fin_coord, 4)
-                # Dibujar tope de escalera
-                pygame.draw.circle(ventana, VERDE, fin_coord, 8)
+        for inicio, fin in cruzan_filas(geometria, self.serpientes, fila_inicial, fila_final):
+            inicio_coord = (geometria.centros[inicio][0], geometria.centros[inicio][1] + dy)
+            fin_coord = (geometria.centros[fin][0], geometria.centros[fin][1] + dy)
+            # Dibujar línea con efecto serpentina
+            pygame.draw.line(capa, ROJO, inicio_coord, fin_coord, 4)
+            # Dibujar cabeza de serpiente
+            pygame.draw.circle(capa, ROJO, fin_coord, 8)
+        
+        for inicio, fin in cruzan_filas(geometria, self.escaleras, fila_inicial, fila_final):
+            inicio_coord = (geometria.centros[inicio][0], geometria.centros[inicio][1] + dy)
+            fin_coord = (geometria.centros[fin][0], geometria.centros[fin][1] + dy)
+            # Dibujar línea de escalera
+            pygame.draw.line(capa, VERDE, inicio_coord, fin_coord, 4)
+            # Dibujar tope de escalera
+            pygame.draw.circle(capa, VERDE, fin_coord, 8)
+    
+    def seguir_casilla(self, numero_casilla):
+        # Mover la cámara para que se vea la casilla (la 0 está junto a la 1)
+        self.camara.seguir(self.geometria.centros[max(1, numero_casilla)][1])
+    
+    def dibujar(self):
+        # Cada cuadro copia solo los bloques horneados que se ven
+        self.capa.dibujar(ventana, self.camara)
 
 class Jugador:
-    def __init__(self, id, es_bot=False, color=ROJO):
+    def __init__(self, id, es_bot=False, color=ROJO, num_fichas=1):
         self.id = id
         self.es_bot = es_bot
-        self.posicion = 0
+        self.fichas = [REGLAS_CODE1.casilla_inicial] * num_fichas
+        self.ficha = 0  # La última que se movió; la cámara la sigue
         self.color = color
         self.tamano = 15
         self.ganador = False
-        
-    def mover(self, pasos, tablero):
-        nueva_posicion = self.posicion + pasos
-        
-        # Verificar si se pasa del final
-        if nueva_posicion > tablero.casillas:
-            return False
-        
-        self.posicion = nueva_posicion
-        
-        # Verificar si cayó en una serpiente
-        if self.posicion in tablero.serpientes:
-            self.posicion = tablero.serpientes[self.posicion]
-            return "serpiente"
-        
-        # Verificar si cayó en una escalera
-        if self.posicion in tablero.escaleras:
-            self.posicion = tablero.escaleras[self.posicion]
-            return "escalera"
+        self.seises = 0  # Seises seguidos en este turno
+    
+    def reiniciar(self, es_bot, num_fichas=1):
+        self.es_bot = es_bot
+        self.fichas = [REGLAS_CODE1.casilla_inicial] * num_fichas
+        self.ficha = 0
+        self.ganador = False
+        self.seises = 0
+    
+    @property
+    def posicion(self):
+        return self.fichas[self.ficha]
+    
+    def movibles(self, meta):
+        # Una ficha por casilla fuera de la meta: las de la misma casilla son equivalentes
+        indices = {}
+        for i, posicion in enumerate(self.fichas):
+            if posicion != meta:
+                indices.setdefault(posicion, i)
+        return sorted(indices.values())
+    
+    def texto_casillas(self):
+        if len(self.fichas) == 1:
+            return f"Casilla {self.fichas[0]}"
+        return "Casillas " + ", ".join(str(posicion) for posicion in self.fichas)
+        
+    def mover(self, pasos, tabla, ficha=0):
+        # Con las reglas de code1, si se pasa del final la tirada se rechaza
+        # y el resultado es False; las serpientes se resuelven antes que las
+        # escaleras. Devuelve (resultado, repite): repite si hay otra tirada.
+        # Con varias fichas gana quien mete todas; las demás dan "meta"
+        self.ficha = ficha
+        self.fichas[ficha], resultado, self.seises, repite = tabla.tirar(self.fichas[ficha], pasos, self.seises)
         
         # Verificar si llegó a la meta
-        if self.posicion == tablero.casillas:
-            self.ganador = True
-            return "ganador"
+        if resultado == "ganador":
+            if all(posicion == tabla.casillas for posicion in self.fichas):
+                self.ganador = True
+                repite = False
+            else:
+                resultado = "meta"
         
-        return True
+        return resultado, repite
+    
+    def centro(self, tablero, ficha):
+        # Centro en pantalla de una ficha, o None si no está en el tablero
+        coord = tablero.obtener_coordenadas_casilla(self.fichas[ficha])
+        if coord is None:
+            return None
+        # Ajustar posición para múltiples jugadores (y fichas) en la misma casilla
+        return (coord[0] + (self.id % 2) * 20 - 10 + 6 * ficha,
+                coord[1] + (self.id // 2) * 20 - 10 + 6 * ficha)
+        
+    def rect(self, tablero, ficha=0):
+        # Rectángulo que ocupa la ficha en pantalla (vacío si no está en el tablero)
+        centro = self.centro(tablero, ficha)
+        if centro is None:
+            return (0, 0, 0, 0)
+        x, y = centro
+        rect = pygame.Rect(x - self.tamano, y - self.tamano, 2 * self.tamano + 1, 2 * self.tamano + 1)
+        return rect.clip(tablero.camara.vista)
         
     def dibujar(self, tablero):
-        if self.posicion > 0:
-            coord = tablero.obtener_coordenadas_casilla(self.posicion)
-            if coord:
-                # Ajustar posición para múltiples jugadores en la misma casilla
-                x, y = coord
-                offset_x = (self.id % 2) * 20 - 10
-                offset_y = (self.id // 2) * 20 - 10
-                
-                # Dibujar ficha
-                pygame.draw.circle(ventana, self.color, (x + offset_x, y + offset_y), self.tamano)
-                pygame.draw.circle(ventana, NEGRO, (x + offset_x, y + offset_y), self.tamano, 2)
-                
-                # Dibujar número del jugador
-                texto = FUENTE_PEQUEÑA.render(str(self.id + 1), True, BLANCO)
-                ventana.blit(texto, (x + offset_x - texto.get_width()//2, y + offset_y - texto.get_height()//2))
+        recorte = ventana.get_clip()
+        ventana.set_clip(tablero.camara.vista)
+        for ficha, posicion in enumerate(self.fichas):
+            # Las fichas fuera de la vista del tablero no se dibujan
+            if posicion == 0 or pygame.Rect(self.rect(tablero, ficha)).width == 0:
+                continue
+            centro = self.centro(tablero, ficha)
+            
+            # Dibujar ficha
+            pygame.draw.circle(ventana, self.color, centro, self.tamano)
+            pygame.draw.circle(ventana, NEGRO, centro, self.tamano, 2)
+            
+            # Dibujar número del jugador (y de la ficha, que es su tecla para elegirla)
+            etiqueta = str(self.id + 1) if len(self.fichas) == 1 else f"{self.id + 1}.{ficha + 1}"
+            texto = renderizar(obtener_fuente(*FUENTE_PEQUEÑA), etiqueta, BLANCO)
+            ventana.blit(texto, (centro[0] - texto.get_width()//2, centro[1] - texto.get_height()//2))
+        ventana.set_clip(recorte)
 
 class Dado:
-    def __init__(self):
+    def __init__(self, rng=None, rng_animacion=None):
+        # Las caras de la animación salen de otro flujo para que la tirada
+        # final no dependa de cuántos cuadros dure la animación
+        self.rng = rng if rng is not None else flujo(nueva_semilla(), "dado")
+        self.rng_animacion = rng_animacion if rng_animacion is not None else flujo(nueva_semilla(), "animacion")
         self.valor = 1
         self.lanzando = False
         self.contador_animacion = 0
-        self.duracion_animacion = 20
+        self.duracion_animacion = 20  # En cuadros de 1/FPS segundos
         
     def lanzar(self):
         self.lanzando = True
         self.contador_animacion = 0
         
-    def actualizar(self):
+    def actualizar(self, dt=MS_POR_CUADRO):
+        # dt en milisegundos: la animación dura lo mismo a cualquier tasa de cuadros
         if self.lanzando:
-            self.contador_animacion += 1
-            self.valor = random.randint(1, 6)
+            self.contador_animacion += dt / MS_POR_CUADRO
+            self.valor = self.rng_animacion.randint(1, 6)
             
             if self.contador_animacion >= self.duracion_animacion:
                 self.lanzando = False
+                self.valor = self.rng.randint(1, 6)
                 return True
         return False
     
+    # Cara que se ve: mientras rueda se alterna con el cuadro borroso
+    def cara_visible(self):
+        if self.lanzando and int(self.contador_animacion) % 2:
+            return BORROSO
+        return self.valor
+    
     def dibujar(self, x, y, tamano=80):
-        # Fondo del dado
-        pygame.draw.rect(ventana, BLANCO, (x, y, tamano, tamano), border_radius=10)
-        pygame.draw.rect(ventana, NEGRO, (x, y, tamano, tamano), 2, border_radius=10)
-        
-        # Puntos del dado según el valor
-        punto_radio = tamano // 10
-        if self.valor == 1:
-            pygame.draw.circle(ventana, NEGRO, (x + tamano//2, y + tamano//2), punto_radio)
-        elif self.valor == 2:
-            pygame.draw.circle(ventana, NEGRO, (x + tamano//4, y + tamano//4), punto_radio)
-            pygame.draw.circle(ventana, NEGRO, (x + 3*tamano//4, y + 3*tamano//4), punto_radio)
-        elif self.valor == 3:
-            pygame.draw.circle(ventana, NEGRO, (x + tamano//4, y + tamano//4), punto_radio)
-            pygame.draw.circle(ventana, NEGRO, (x + tamano//2, y + tamano//2), punto_radio)
-            pygame.draw.circle(ventana, NEGRO, (x + 3*tamano//4, y + 3*tamano//4), punto_radio)
-        elif self.valor == 4:
-            pygame.draw.circle(ventana, NEGRO, (x + tamano//4, y + tamano//4), punto_radio)
-            pygame.draw.circle(ventana, NEGRO, (x + 3*tamano//4, y + tamano//4), punto_radio)
-            pygame.draw.circle(ventana, NEGRO, (x + tamano//4, y + 3*tamano//4), punto_radio)
-            pygame.draw.circle(ventana, NEGRO, (x + 3*tamano//4, y + 3*tamano//4), punto_radio)
-        elif self.valor == 5:
-            pygame.draw.circle(ventana, NEGRO, (x + tamano//4, y + tamano//4), punto_radio)
-            pygame.draw.circle(ventana, NEGRO, (x + 3*tamano//4, y + tamano//4), punto_radio)
-            pygame.draw.circle(ventana, NEGRO, (x + tamano//2, y + tamano//2), punto_radio)
-            pygame.draw.circle(ventana, NEGRO, (x + tamano//4, y + 3*tamano//4), punto_radio)
-            pygame.draw.circle(ventana, NEGRO, (x + 3*tamano//4, y + 3*tamano//4), punto_radio)
-        elif self.valor == 6:
-            pygame.draw.circle(ventana, NEGRO, (x + tamano//4, y + tamano//4), punto_radio)
-            pygame.draw.circle(ventana, NEGRO, (x + 3*tamano//4, y + tamano//4), punto_radio)
-            pygame.draw.circle(ventana, NEGRO, (x + tamano//4, y + tamano//2), punto_radio)
-            pygame.draw.circle(ventana, NEGRO, (x + 3*tamano//4, y + tamano//2), punto_radio)
-            pygame.draw.circle(ventana, NEGRO, (x + tamano//4, y + 3*tamano//4), punto_radio)
-            pygame.draw.circle(ventana, NEGRO, (x + 3*tamano//4, y + 3*tamano//4), punto_radio)
+        # Un solo blit desde el atlas de caras pintado una vez por tamaño
+        obtener_atlas(tamano, BLANCO, NEGRO).dibujar(ventana, x, y, self.cara_visible())
 
 class Juego:
-    def __init__(self):
+    def __init__(self, casillas=200, semilla=None, repeticion=None, velocidad=1.0,
+                 carpeta_repeticiones=None, objetivo=None, mostrar_probabilidades=False,
+                 variantes=(), num_fichas=1, mostrar_calor=False):
+        abrir_ventana()
         self.estado = "menu_principal"
-        self.tablero = Tablero()
-        self.dado = Dado()
+        # Con una repetición se usan su semilla, su tablero, sus reglas y sus tiradas
+        self.repeticion = repeticion
+        if repeticion is not None:
+            casillas = repeticion.casillas
+            semilla = repeticion.semilla
+            objetivo = repeticion.objetivo
+            variantes = repeticion.variantes
+            generar = generador("code1", repeticion.formato, variantes)
+            num_fichas = 1  # Los registros no anotan qué ficha se movió
+        else:
+            generar = generador("code1", variantes=variantes)
+        self.variantes = tuple(variantes)
+        self.reglas = aplicar_variantes(REGLAS_CODE1, self.variantes)
+        self.semilla = nueva_semilla() if semilla is None else semilla
+        self.velocidad = velocidad
+        self.carpeta_repeticiones = carpeta_repeticiones
+        self.registro = None
+        self.objetivo = objetivo
+        self.tablero = Tablero(casillas, rng=flujo(self.semilla, "tablero"), objetivo=objetivo,
+                               generar=generar)
+        # El tablero no cambia entre partidas: sus reglas se compilan una vez
+        self.tabla = compilar(self.tablero, self.reglas)
+        self.dado = Dado(flujo(self.semilla, "dado"), flujo(self.semilla, "animacion"))
+        # Con varias fichas por jugador se elige cuál mover tras cada tirada;
+        # los bots lo deciden con expectimax (fichas.py) en otro hilo
+        self.num_fichas = num_fichas
+        self.bot = BotEnHilo(BotExpectimax(self.tablero, self.reglas)) if num_fichas > 1 else None
+        self.eligiendo = False  # Un humano tiene que elegir ficha para el dado
+        self.esperando_bot = False  # El bot del turno todavía busca qué ficha mover
         self.jugadores = []
         self.turno_actual = 0
         self.contador_mensaje = 0
         self.mensaje = ""
         self.resultado_movimiento = None
+        self.repite = False  # Las reglas dieron otra tirada al jugador del turno
         self.mostrar_resultados = False
+        self.fondo_resultados = None  # Velo del fin de partida, reutilizado en cada cuadro
+        # HUD de probabilidad de ganar (tecla P); se calcula en otro hilo
+        self.mostrar_probabilidades = mostrar_probabilidades
+        self.solucionador = Solucionador(
+            avisar=lambda: pygame.event.post(pygame.event.Event(EVENTO_PROBABILIDADES)))
+        self.clave_tablero = clave_tablero(self.tablero, self.reglas)
+        self.probabilidades = None  # Último resultado recibido, mientras llega el nuevo
+        # Mapa de calor de caídas (tecla H); se calcula en otro hilo al crear el tablero
+        self.mostrar_calor = mostrar_calor
+        self.mapa_calor = MapaCalor(avisar=lambda: pygame.event.post(pygame.event.Event(EVENTO_CALOR)))
+        self.clave_calor = None
+        self.pedir_calor()
+        
+        if repeticion is not None:
+            self.iniciar_partida(0, repeticion.num_jugadores)
         
     def iniciar_partida(self, num_jugadores, num_bots=0):
-        self.jugadores = []
-        total_jugadores = num_jugadores + num_bots
+        # En una repetición todos los asientos tiran solos las tiradas anotadas
+        if self.repeticion is not None:
+            num_jugadores, num_bots = 0, self.repeticion.num_jugadores
+            self.dado.rng = TiradasRegistradas(self.repeticion.tiradas)
         
-        # Crear jugadores humanos
-        for i in range(num_jugadores):
-            self.jugadores.append(Jugador(i, es_bot=False, color=COLORES_JUGADORES[i]))
+        total_jugadores = num_jugadores + num_bots
         
-        # Crear bots
-        for i in range(num_bots):
-            self.jugadores.append(Jugador(i + num_jugadores, es_bot=True, color=COLORES_JUGADORES[i + num_jugadores]))
+        # Reutilizar los jugadores de la partida anterior (primero los humanos,
+        # después los bots) y crear los que falten
+        del self.jugadores[total_jugadores:]
+        for i, jugador in enumerate(self.jugadores):
+            jugador.reiniciar(es_bot=i >= num_jugadores, num_fichas=self.num_fichas)
+        for i in range(len(self.jugadores), total_jugadores):
+            self.jugadores.append(Jugador(i, es_bot=i >= num_jugadores, color=COLORES_JUGADORES[i],
+                                          num_fichas=self.num_fichas))
         
         self.turno_actual = 0
+        self.repite = False
+        self.eligiendo = False
+        self.esperando_bot = False
         self.estado = "juego"
         self.mensaje = ""
         self.mostrar_resultados = False
+        # El tablero no cambia entre partidas: se anota la semilla que lo generó
+        self.registro = RegistroPartida(self.semilla, "code1", self.tablero.casillas, total_jugadores,
+                                        objetivo=self.objetivo, variantes=self.variantes)
         
+    def pedir_calor(self):
+        if self.mostrar_calor:
+            self.clave_calor = self.mapa_calor.pedir(self.tablero, self.reglas)
+    
     def procesar_evento(self, evento):
+        if evento.type == KEYDOWN and evento.key == K_p:
+            self.mostrar_probabilidades = not self.mostrar_probabilidades
+            return
+        if evento.type == KEYDOWN and evento.key == K_h:
+            self.mostrar_calor = not self.mostrar_calor
+            self.pedir_calor()
+            return
+        
         if self.estado == "menu_principal":
             # Procesar eventos del menú principal
             if evento.type == MOUSEBUTTONDOWN:
@@ -292,7 +424,9 @@ class Juego:
         
         elif self.estado == "juego":
             # Procesar eventos del juego
-            if evento.type == MOUSEBUTTONDOWN:
+            if self.eligiendo:
+                self.procesar_eleccion(evento)
+            elif evento.type == MOUSEBUTTONDOWN:
                 # Si es turno de un jugador humano y el dado no está en movimiento
                 if (not self.jugadores[self.turno_actual].es_bot and 
                     not self.dado.lanzando and 
@@ -313,24 +447,52 @@ class Juego:
                     # Volver al menú principal
                     self.estado = "menu_principal"
         
-    def actualizar(self):
+    def procesar_eleccion(self, evento):
+        # Ficha por su tecla (1, 2...) o con un clic sobre ella
+        jugador_actual = self.jugadores[self.turno_actual]
+        movibles = [i for i, posicion in enumerate(jugador_actual.fichas) if posicion != self.tablero.casillas]
+        ficha = None
+        if evento.type == KEYDOWN and K_1 <= evento.key <= K_9:
+            ficha = evento.key - K_1
+        elif evento.type == MOUSEBUTTONDOWN:
+            x, y = pygame.mouse.get_pos()
+            ficha = next((i for i in movibles if pygame.Rect(jugador_actual.rect(self.tablero, i)).collidepoint(x, y)),
+                         None)
+        if ficha in movibles:
+            self.eligiendo = False
+            self.mover_ficha(ficha)
+    
+    def esta_animando(self):
+        # Hay algo que avanzar en cada cuadro: dado, mensaje o turno de un bot
+        if self.estado != "juego":
+            return False
+        return (self.dado.lanzando or self.resultado_movimiento is not None
+                or self.jugadores[self.turno_actual].es_bot)
+    
+    def actualizar(self, dt=MS_POR_CUADRO):
+        dt *= self.velocidad
         if self.estado == "juego":
             jugador_actual = self.jugadores[self.turno_actual]
             
             # Procesar movimiento de bots
-            if jugador_actual.es_bot and not self.dado.lanzando and self.resultado_movimiento is None:
+            if self.esperando_bot:
+                ficha = self.ficha_bot()
+                if ficha is not None:
+                    self.esperando_bot = False
+                    self.mover_ficha(ficha)
+            elif jugador_actual.es_bot and not self.dado.lanzando and self.resultado_movimiento is None:
                 self.dado.lanzar()
             
             # Actualizar animación del dado
             if self.dado.lanzando:
-                if self.dado.actualizar():
+                if self.dado.actualizar(dt):
                     # El dado terminó de lanzarse
                     self.procesar_movimiento()
             
             # Manejar mensaje de resultado
             if self.resultado_movimiento is not None:
-                self.contador_mensaje += 1
-                if self.contador_mensaje > 60:  # Mostrar mensaje por 1 segundo
+                self.contador_mensaje += dt / MS_POR_CUADRO
+                if self.contador_mensaje > 60:  # Mostrar mensaje por 1 segundo (60 cuadros)
                     self.contador_mensaje = 0
                     self.resultado_movimiento = None
                     
@@ -338,15 +500,38 @@ class Juego:
                     if jugador_actual.ganador:
                         self.mostrar_resultados = True
                         self.estado = "fin_partida"
-                    else:
+                        self.registro.ganador = self.turno_actual
+                        if self.carpeta_repeticiones and self.repeticion is None and self.num_fichas == 1:
+                            guardar_en_carpeta(self.registro, self.carpeta_repeticiones)
+                    elif not self.repite:
                         # Pasar al siguiente turno
-                        self.turno_actual = (self.turno_actual + 1) % len(self.jugadores)
+                        self.turno_actual = siguiente_turno(self.turno_actual, len(self.jugadores))
     
     def procesar_movimiento(self):
         jugador_actual = self.jugadores[self.turno_actual]
+        movibles = jugador_actual.movibles(self.tablero.casillas)
+        if len(movibles) == 1:
+            self.mover_ficha(movibles[0])
+        elif jugador_actual.es_bot:
+            self.esperando_bot = True  # Se mueve en actualizar cuando el bot responda
+            self.ficha_bot()
+        else:
+            self.eligiendo = True  # Se mueve al elegirla en procesar_eleccion
+    
+    def ficha_bot(self):
+        # El bot busca sobre las casillas de las fichas, no sobre sus índices;
+        # None mientras la búsqueda sigue en su hilo
+        jugador_actual = self.jugadores[self.turno_actual]
+        estado = tuple(tuple(sorted(jugador.fichas)) for jugador in self.jugadores)
+        origen = self.bot.consultar(estado, self.turno_actual, self.dado.valor, jugador_actual.seises)
+        return None if origen is None else jugador_actual.fichas.index(origen)
+    
+    def mover_ficha(self, ficha):
+        jugador_actual = self.jugadores[self.turno_actual]
         
         # Mover jugador según valor del dado
-        resultado = jugador_actual.mover(self.dado.valor, self.tablero)
+        resultado, self.repite = jugador_actual.mover(self.dado.valor, self.tabla, ficha)
+        self.registro.anotar(self.dado.valor)
         
         # Mostrar mensaje según resultado
         if resultado == "serpiente":
@@ -355,17 +540,24 @@ class Juego:
             self.mensaje = f"¡Jugador {self.turno_actual + 1} subió por una escalera!"
         elif resultado == "ganador":
             self.mensaje = f"¡Jugador {self.turno_actual + 1} ha ganado!"
+        elif resultado == "meta":
+            self.mensaje = f"¡Jugador {self.turno_actual + 1} metió una ficha en la meta!"
+        elif resultado == "anulada":
+            self.mensaje = f"¡Jugador {self.turno_actual + 1} sacó {self.reglas.max_seises} seises y pierde el turno!"
         else:
             self.mensaje = f"Jugador {self.turno_actual + 1} avanzó {self.dado.valor} casillas"
+        if self.repite:
+            self.mensaje += " Vuelve a tirar."
         
         self.resultado_movimiento = resultado
     
+    @medir("dibujar_menu_principal")
     def dibujar_menu_principal(self):
         # Fondo
         ventana.fill(FONDO)
         
         # Título
-        titulo = FUENTE_GRANDE.render("SERPIENTES Y ESCALERAS", True, BLANCO)
+        titulo = renderizar(obtener_fuente(*FUENTE_GRANDE), "SERPIENTES Y ESCALERAS", BLANCO)
         ventana.blit(titulo, (ANCHO//2 - titulo.get_width()//2, 80))
         
         # Botones
@@ -375,48 +567,96 @@ class Juego:
         self.dibujar_boton("4 Jugadores", 350, 440, 300, 50, ROJO)
         self.dibujar_boton("Salir", 350, 520, 300, 50, GRIS)
     
+    @medir("dibujar_juego")
     def dibujar_juego(self):
         # Fondo
         ventana.fill(FONDO)
         
-        # Dibujar tablero
+        # La cámara sigue al jugador del turno
+        self.tablero.seguir_casilla(self.jugadores[self.turno_actual].posicion)
+        
+        # Dibujar tablero (con el mapa de calor en cuanto esté calculado)
+        self.tablero.usar_calor(self.mapa_calor.intensidades(self.clave_calor) if self.mostrar_calor else None)
         self.tablero.dibujar()
+        regiones.region("tablero", self.tablero.camara.vista,
+                        (self.tablero.camara.y, self.tablero.calor is not None))
         
         # Dibujar jugadores
         for jugador in self.jugadores:
             jugador.dibujar(self.tablero)
+            for ficha, posicion in enumerate(jugador.fichas):
+                regiones.region(("ficha", jugador.id, ficha), jugador.rect(self.tablero, ficha), posicion)
         
         # Dibujar dado
         self.dado.dibujar(800, 100)
+        regiones.region("dado", (800, 100, 80, 80), self.dado.cara_visible())
         
         # Información del turno
         jugador_actual = self.jugadores[self.turno_actual]
-        texto_turno = FUENTE_MEDIANA.render(f"Turno: Jugador {self.turno_actual + 1}", True, jugador_actual.color)
+        texto_turno = renderizar(obtener_fuente(*FUENTE_MEDIANA), f"Turno: Jugador {self.turno_actual + 1}", jugador_actual.color)
         ventana.blit(texto_turno, (700, 200))
+        regiones.region("turno", (700, 200, ANCHO - 700, texto_turno.get_height()), self.turno_actual)
         
         # Información de posiciones
         y_pos = 250
         for i, jugador in enumerate(self.jugadores):
-            texto = FUENTE_PEQUEÑA.render(f"Jugador {i+1}: Casilla {jugador.posicion}", True, jugador.color)
+            texto = renderizar(obtener_fuente(*FUENTE_PEQUEÑA), f"Jugador {i+1}: {jugador.texto_casillas()}", jugador.color)
             ventana.blit(texto, (700, y_pos))
             y_pos += 30
+        regiones.region("posiciones", (700, 250, ANCHO - 700, y_pos - 250),
+                        tuple(tuple(jugador.fichas) for jugador in self.jugadores))
+        # Las probabilidades exactas suponen una ficha por jugador
+        if self.mostrar_probabilidades and self.num_fichas == 1:
+            self.dibujar_probabilidades()
         
         # Mostrar mensaje de resultado
         if self.resultado_movimiento is not None:
             pygame.draw.rect(ventana, (0, 0, 0, 180), (200, 300, 600, 80), border_radius=10)
-            texto = FUENTE_MEDIANA.render(self.mensaje, True, BLANCO)
+            texto = renderizar(obtener_fuente(*FUENTE_MEDIANA), self.mensaje, BLANCO)
             ventana.blit(texto, (ANCHO//2 - texto.get_width()//2, 330))
+            regiones.region("mensaje", (200, 300, 600, 80), self.mensaje)
         
         # Instrucciones
-        if not jugador_actual.es_bot and not self.dado.lanzando and self.resultado_movimiento is None:
-            texto = FUENTE_PEQUEÑA.render("Haz clic para lanzar el dado", True, BLANCO)
+        if self.eligiendo:
+            texto = renderizar(obtener_fuente(*FUENTE_PEQUEÑA), "Elige ficha: tecla o clic sobre ella", BLANCO)
             ventana.blit(texto, (700, 400))
+            regiones.region("instrucciones", (700, 400, texto.get_width(), texto.get_height()), "elegir")
+        elif not jugador_actual.es_bot and not self.dado.lanzando and self.resultado_movimiento is None:
+            texto = renderizar(obtener_fuente(*FUENTE_PEQUEÑA), "Haz clic para lanzar el dado", BLANCO)
+            ventana.blit(texto, (700, 400))
+            regiones.region("instrucciones", (700, 400, texto.get_width(), texto.get_height()), True)
+    
+    def dibujar_probabilidades(self):
+        # Tras una tirada el siguiente en tirar ya es el otro jugador, salvo
+        # que repita: entonces sigue su turno con los seises que ya lleva
+        turno = self.turno_actual
+        seises = 0
+        if self.repite:
+            seises = self.jugadores[turno].seises
+        elif self.resultado_movimiento is not None:
+            turno = siguiente_turno(turno, len(self.jugadores))
+        resultado = self.solucionador.consultar(self.tablero, self.clave_tablero, self.reglas,
+                                                [jugador.posicion for jugador in self.jugadores], turno, seises)
+        if resultado is not None and len(resultado) == len(self.jugadores):
+            self.probabilidades = resultado
+        if self.probabilidades is None or len(self.probabilidades) != len(self.jugadores):
+            return
+        
+        # A la derecha de cada "Jugador N: Casilla X"
+        fuente = obtener_fuente(*FUENTE_PEQUEÑA)
+        for i, probabilidad in enumerate(self.probabilidades):
+            texto = renderizar(fuente, f"{probabilidad:.1%}", self.jugadores[i].color)
+            ventana.blit(texto, (ANCHO - 10 - texto.get_width(), 250 + 30 * i))
+        regiones.region("probabilidades", (ANCHO - 80, 250, 80, 30 * len(self.jugadores)),
+                        self.probabilidades)
     
+    @medir("dibujar_fin_partida")
     def dibujar_fin_partida(self):
-        # Fondo semi-transparente
-        s = pygame.Surface((ANCHO, ALTO), pygame.SRCALPHA)
-        s.fill((0, 0, 0, 180))
-        ventana.blit(s, (0, 0))
+        # Fondo semi-transparente: la superficie se crea una sola vez
+        if self.fondo_resultados is None:
+            self.fondo_resultados = pygame.Surface((ANCHO, ALTO), pygame.SRCALPHA).convert_alpha()
+            self.fondo_resultados.fill((0, 0, 0, 180))
+        ventana.blit(self.fondo_resultados, (0, 0))
         
         # Panel de resultados
         pygame.draw.rect(ventana, FONDO, (200, 150, 600, 400), border_radius=15)
@@ -425,14 +665,16 @@ class Juego:
         # Título
         ganador = next((j for j in self.jugadores if j.ganador), None)
         if ganador:
-            texto = FUENTE_GRANDE.render(f"¡Jugador {ganador.id + 1} ha ganado!", True, ganador.color)
+            texto = renderizar(obtener_fuente(*FUENTE_GRANDE), f"¡Jugador {ganador.id + 1} ha ganado!", ganador.color)
             ventana.blit(texto, (ANCHO//2 - texto.get_width()//2, 180))
         
         # Resultados
         y_pos = 250
-        posiciones = sorted([(j.id, j.posicion) for j in self.jugadores], key=lambda x: x[1], reverse=True)
-        for i, (id_jugador, posicion) in enumerate(posiciones):
-            texto = FUENTE_MEDIANA.render(f"{i+1}. Jugador {id_jugador + 1}: Casilla {posicion}", True, self.jugadores[id_jugador].color)
+        # Con varias fichas se ordena por la suma de sus casillas
+        posiciones = sorted([(j.id, sum(j.fichas)) for j in self.jugadores], key=lambda x: x[1], reverse=True)
+        for i, (id_jugador, _) in enumerate(posiciones):
+            jugador = self.jugadores[id_jugador]
+            texto = renderizar(obtener_fuente(*FUENTE_MEDIANA), f"{i+1}. Jugador {id_jugador + 1}: {jugador.texto_casillas()}", jugador.color)
             ventana.blit(texto, (ANCHO//2 - texto.get_width()//2, y_pos))
             y_pos += 50
         
@@ -446,11 +688,15 @@ class Juego:
         pygame.draw.rect(ventana, NEGRO, (x, y, ancho, alto), 2, border_radius=10)
         
         # Texto del botón
-        texto_render = FUENTE_PEQUEÑA.render(texto, True, NEGRO)
+        texto_render = renderizar(obtener_fuente(*FUENTE_PEQUEÑA), texto, NEGRO)
         ventana.blit(texto_render, (x + ancho//2 - texto_render.get_width()//2, 
                                 y + alto//2 - texto_render.get_height()//2))
     
     def dibujar(self):
+        # Un cambio de pantalla (o de tablero) repinta la ventana entera
+        regiones.region("pantalla", ventana.get_rect(),
+                        (self.estado, self.mostrar_resultados, id(self.tablero)))
+        
         if self.estado == "menu_principal":
             self.dibujar_menu_principal()
         elif self.estado == "juego":
@@ -465,27 +711,84 @@ class Juego:
             self.dibujar_fin_partida()
 
 def main():
-    juego = Juego()
+    def opcion(nombre, convertir, defecto=None):
+        if nombre in sys.argv:
+            return convertir(sys.argv[sys.argv.index(nombre) + 1])
+        return defecto
+    
+    arranque.marcar("modulos")
+    # --casillas N juega en un tablero de N casillas, --semilla N fija la
+    # sesión, --turnos N genera un tablero que dura unos N turnos por ficha,
+    # --guardar CARPETA escribe un registro por partida y
+    # --repetir ARCHIVO [--velocidad X] dibuja una partida registrada,
+    # --reglas V1,V2 añade variantes (exacto, rebote, seis_repite, tres_seises),
+    # --fichas N da N fichas a cada jugador (se elige cuál mover tras cada tirada),
+    # --probabilidades empieza con el HUD de probabilidad de ganar (tecla P),
+    # --calor empieza con el mapa de calor de caídas (tecla H) y
+    # --arranque imprime los tiempos de arranque tras el primer cuadro y sale
+    # F3 muestra el panel de tiempos por fase; --perfil-csv ARCHIVO los guarda por cuadro
+    if "--perfil-csv" in sys.argv:
+        perfil.exportar_csv(opcion("--perfil-csv", str), FASES_PERFIL)
+    juego = Juego(opcion("--casillas", int, 200), semilla=opcion("--semilla", int),
+                  repeticion=opcion("--repetir", RegistroPartida.cargar),
+                  velocidad=opcion("--velocidad", float, 1.0),
+                  carpeta_repeticiones=opcion("--guardar", str), objetivo=opcion("--turnos", int),
+                  mostrar_probabilidades="--probabilidades" in sys.argv,
+                  variantes=opcion("--reglas", lambda texto: texto.split(","), ()),
+                  num_fichas=opcion("--fichas", int, 1),
+                  mostrar_calor="--calor" in sys.argv)
+    arranque.marcar("juego")
+    
+    # Con --pantalla-completa se presenta la ventana entera en cada cuadro
+    regiones.pantalla_completa = "--pantalla-completa" in sys.argv
     
     # Bucle principal
     ejecutando = True
     while ejecutando:
+        if juego.esta_animando() or "primer_cuadro" not in arranque.marcas:
+            # Animación en curso (o primer cuadro, que no espera eventos): avanzar a FPS fijos
+            dt = min(reloj.tick(FPS), MAX_DT)
+            eventos = pygame.event.get()
+        else:
+            # Nada se mueve: bloquear hasta el próximo evento
+            evento = pygame.event.wait(ESPERA_INACTIVO)
+            eventos = pygame.event.get()
+            if evento.type != NOEVENT:
+                eventos.insert(0, evento)
+            reloj.tick()  # El tiempo esperado no cuenta para la lógica
+            dt = 0
+        
         # Eventos
-        for evento in pygame.event.get():
+        perfil.inicio_cuadro()
+        for evento in eventos:
             if evento.type == QUIT:
                 ejecutando = False
+            elif evento.type == KEYDOWN and evento.key == K_F3:
+                perfil.alternar_panel()
+                continue
             
             juego.procesar_evento(evento)
+        perfil.marca("eventos")
         
         # Actualizar
-        juego.actualizar()
+        juego.actualizar(dt)
+        perfil.marca("actualizar")
         
         # Dibujar
         juego.dibujar()
-        
-        pygame.display.flip()
-        reloj.tick(FPS)
+        perfil.marca("dibujar")
+        panel = perfil.dibujar_panel(ventana)
+        if panel is not None:
+            regiones.region("perfil", panel, perfil.cuadros // REFRESCO_PANEL)
+        perfil.marca("perfil")
+        
+        regiones.presentar()
+        perfil.marca("presentar")
+        perfil.fin_cuadro()
+        if arranque.cuadro_presentado():
+            ejecutando = False
     
+    perfil.cerrar()
     pygame.quit()
     sys.exit()
 
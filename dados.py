@@ -0,0 +1,68 @@
+from functools import lru_cache
+
+import pygame
+
+# Atlas de sprites del dado.
+# Las seis caras y un cuadro borroso para la animación se pintan una sola
+# vez por tamaño en una tira horizontal (borroso, 1, 2, ..., 6), y dibujar
+# un dado es un único blit con el área de la cara. Varios dados en pantalla
+# del mismo tamaño comparten el atlas.
+
+BORROSO = 0  # Índice de la cara borrosa en el atlas
+
+# Puntos de cada cara en cuartos del lado (columna, fila)
+PUNTOS = {
+    1: [(2, 2)],
+    2: [(1, 1), (3, 3)],
+    3: [(1, 1), (2, 2), (3, 3)],
+    4: [(1, 1), (3, 1), (1, 3), (3, 3)],
+    5: [(1, 1), (3, 1), (2, 2), (1, 3), (3, 3)],
+    6: [(1, 1), (3, 1), (1, 2), (3, 2), (1, 3), (3, 3)],
+}
+
+
+class AtlasDado:
+    def __init__(self, tamano, fondo=(255, 255, 255), tinta=(0, 0, 0)):
+        self.tamano = tamano
+        self.fondo = fondo
+        self.tinta = tinta
+        self.superficie = pygame.Surface((7 * tamano, tamano), pygame.SRCALPHA)
+        self.areas = [pygame.Rect(i * tamano, 0, tamano, tamano) for i in range(7)]
+        for cara in range(1, 7):
+            self.pintar_fondo(self.areas[cara])
+            self.pintar_puntos(self.superficie, self.areas[cara].x, PUNTOS[cara], tinta)
+        self.pintar_borroso()
+        if pygame.display.get_surface() is not None:
+            self.superficie = self.superficie.convert_alpha()
+
+    def pintar_fondo(self, area):
+        radio = max(2, self.tamano // 8)
+        pygame.draw.rect(self.superficie, self.fondo, area, border_radius=radio)
+        pygame.draw.rect(self.superficie, self.tinta, area, 2, border_radius=radio)
+
+    def pintar_puntos(self, superficie, x, puntos, color):
+        radio = self.tamano // 10
+        for columna, fila in puntos:
+            pygame.draw.circle(superficie, color,
+                               (x + columna * self.tamano // 4, fila * self.tamano // 4), radio)
+
+    def pintar_borroso(self):
+        # Los puntos de todas las caras (el 1, el 4 y el 6 los cubren) corridos
+        # en horizontal y con poca opacidad
+        self.pintar_fondo(self.areas[BORROSO])
+        estela = pygame.Surface((self.tamano, self.tamano), pygame.SRCALPHA)
+        color = self.tinta[:3] + (70,)
+        paso = max(1, self.tamano // 20)
+        for desplazamiento in range(-2 * paso, 2 * paso + 1, paso):
+            for cara in (1, 4, 6):
+                self.pintar_puntos(estela, desplazamiento, PUNTOS[cara], color)
+        self.superficie.blit(estela, self.areas[BORROSO])
+
+    def dibujar(self, superficie, x, y, cara):
+        superficie.blit(self.superficie, (x, y), self.areas[cara])
+
+
+# Un atlas por tamaño y colores; se crea la primera vez que se pide
+@lru_cache(maxsize=8)
+def obtener_atlas(tamano, fondo=(255, 255, 255), tinta=(0, 0, 0)):
+    return AtlasDado(tamano, fondo, tinta)
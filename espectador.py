@@ -0,0 +1,213 @@
+import math
+import sys
+import time
+
+import pygame
+
+from arranque import abrir_ventana
+from cache_lru import CacheLRU
+from fuentes import obtener_fuente, renderizar
+from geometria import obtener_geometria
+from motor import Partida, TableroLogico
+from regiones import RegistroRegiones
+from repeticion import VERSIONES, derivar_semilla, flujo, indice_version, nueva_semilla
+
+# Muro de espectadores: muchas partidas en curso en una sola ventana.
+# Cada mesa es una Partida del motor que avanza un turno cada cierto tiempo.
+# El tablero de cada mesa se pinta una vez a un tamaño base y se escala una
+# vez al tamaño de la mesa; las mesas con el mismo tablero comparten esa capa.
+# En cada cuadro solo se vuelven a dibujar las mesas cuyo estado cambió
+# (fichas y marcador encima de la capa) y solo esas se presentan.
+
+ANCHO, ALTO = 1280, 720
+FPS = 60
+COLUMNAS = 10
+TAM_BASE = 24  # Lado de una casilla al pintar el tablero antes de escalarlo
+ALTO_MARCADOR = 16
+TURNO_MS = 300  # Cada mesa juega un turno cada TURNO_MS
+PAUSA_FINAL_MS = 2000  # Tiempo que se muestra el ganador antes de empezar otra
+
+FONDO = (25, 25, 35)
+CASILLA = (220, 220, 220)
+CASILLA_SERPIENTE = (220, 100, 100)
+CASILLA_ESCALERA = (100, 220, 100)
+SERPIENTE = (200, 40, 40)
+ESCALERA = (140, 90, 40)
+BLANCO = (255, 255, 255)
+COLORES_JUGADORES = [(220, 60, 60), (60, 100, 220), (60, 220, 80), (220, 220, 60)]
+
+
+# Tablero completo pintado con casillas de TAM_BASE píxeles
+def pintar_tablero(tablero, version):
+    geometria = obtener_geometria(tablero.casillas, COLUMNAS, TAM_BASE,
+                                  primera_fila_izquierda=version == "code0")
+    superficie = pygame.Surface((geometria.ancho, geometria.alto)).convert()
+    superficie.fill(FONDO)
+    for casilla in range(1, tablero.casillas + 1):
+        if casilla in tablero.serpientes:
+            color = CASILLA_SERPIENTE
+        elif casilla in tablero.escaleras:
+            color = CASILLA_ESCALERA
+        else:
+            color = CASILLA
+        rect = geometria.rect_celda(casilla)
+        superficie.fill(color, rect)
+        pygame.draw.rect(superficie, FONDO, rect, 1)
+    for inicio, fin in tablero.escaleras.items():
+        pygame.draw.line(superficie, ESCALERA, geometria.centros[inicio], geometria.centros[fin], 3)
+    for cabeza, cola in tablero.serpientes.items():
+        pygame.draw.line(superficie, SERPIENTE, geometria.centros[cabeza], geometria.centros[cola], 3)
+    return superficie
+
+
+class Mesa:
+    def __init__(self, indice, rect, version, tablero, clave_tablero, semilla, num_jugadores):
+        self.indice = indice
+        self.rect = pygame.Rect(rect)
+        self.version = version
+        self.reglas = VERSIONES[indice_version(version)][1]
+        self.tablero = tablero
+        self.clave_tablero = clave_tablero
+        self.semillas = flujo(semilla, "partidas")
+        self.num_jugadores = num_jugadores
+
+        # El tablero escalado conserva la proporción y queda debajo del marcador
+        filas = -(-tablero.casillas // COLUMNAS)
+        self.tam_casilla = max(1, min(self.rect.width // COLUMNAS,
+                                      (self.rect.height - ALTO_MARCADOR) // filas))
+        self.geometria = obtener_geometria(tablero.casillas, COLUMNAS, self.tam_casilla,
+                                           primera_fila_izquierda=version == "code0")
+        self.origen = (self.rect.x + (self.rect.width - self.geometria.ancho) // 2,
+                       self.rect.y + ALTO_MARCADOR)
+        self.nueva_partida(0)
+
+    def nueva_partida(self, ahora):
+        rng = flujo(self.semillas.randrange(2 ** 64), "dado")
+        self.partida = Partida(self.tablero, self.num_jugadores, self.reglas, rng)
+        # Cada mesa arranca desfasada para que no jueguen todas en el mismo cuadro
+        self.proximo = ahora + TURNO_MS * (1 + self.indice % 7 / 7)
+
+    def avanzar(self, ahora):
+        while ahora >= self.proximo:
+            if self.partida.ganador is not None:
+                self.nueva_partida(self.proximo)
+                continue
+            self.partida.jugar_turno()
+            self.proximo += PAUSA_FINAL_MS if self.partida.ganador is not None else TURNO_MS
+
+    # Lo que se ve de la mesa; si no cambia, la mesa no se vuelve a dibujar
+    def clave(self):
+        return self.partida.tiradas, self.partida.ganador, id(self.partida)
+
+    def dibujar(self, superficie, capa):
+        superficie.fill(FONDO, self.rect)
+        superficie.blit(capa, self.origen)
+
+        radio = max(2, self.tam_casilla // 4)
+        for asiento, posicion in enumerate(self.partida.posiciones):
+            centro = self.geometria.centro(posicion)
+            if centro is None:
+                continue  # Casilla 0: todavía fuera del tablero
+            x = self.origen[0] + centro[0] + (asiento % 2 * 2 - 1) * radio // 2
+            y = self.origen[1] + centro[1] + (asiento // 2 * 2 - 1) * radio // 2
+            pygame.draw.circle(superficie, COLORES_JUGADORES[asiento], (x, y), radio)
+
+        fuente = obtener_fuente(None, ALTO_MARCADOR + 2)
+        if self.partida.ganador is not None:
+            texto = renderizar(fuente, f"#{self.indice + 1}  Gana J{self.partida.ganador + 1}",
+                               COLORES_JUGADORES[self.partida.ganador])
+        else:
+            texto = renderizar(fuente, f"#{self.indice + 1}  turno {self.partida.turnos_jugados}", BLANCO)
+        superficie.blit(texto, (self.rect.x + 2, self.rect.y))
+
+
+class Muro:
+    def __init__(self, num_partidas=16, num_tableros=4, version="code1", casillas=200,
+                 num_jugadores=4, semilla=None, tamano=(ANCHO, ALTO)):
+        self.semilla = nueva_semilla() if semilla is None else semilla
+        self.regiones = RegistroRegiones()
+        # Capas escaladas por (tablero, tamaño de casilla), compartidas entre mesas
+        self.capas = CacheLRU(2 * num_partidas)
+
+        columnas = math.ceil(math.sqrt(num_partidas * tamano[0] / tamano[1]))
+        filas = math.ceil(num_partidas / columnas)
+        ancho, alto = tamano[0] // columnas, tamano[1] // filas
+
+        # Las mesas se reparten entre num_tableros tableros distintos
+        generar = VERSIONES[indice_version(version)][2]
+        tableros = []
+        for i in range(num_tableros):
+            tablero = TableroLogico(casillas=casillas)
+            generar(tablero, flujo(self.semilla, f"tablero:{i}"))
+            clave = (version, casillas, tuple(sorted(tablero.serpientes.items())),
+                     tuple(sorted(tablero.escaleras.items())))
+            tableros.append((tablero, clave))
+
+        self.mesas = []
+        for i in range(num_partidas):
+            tablero, clave = tableros[i % num_tableros]
+            rect = ((i % columnas) * ancho, (i // columnas) * alto, ancho, alto)
+            self.mesas.append(Mesa(i, rect, version, tablero, clave,
+                                   derivar_semilla(self.semilla, f"mesa:{i}"), num_jugadores))
+
+    def capa(self, mesa):
+        def crear():
+            base = pintar_tablero(mesa.tablero, mesa.version)
+            return pygame.transform.smoothscale(base, (mesa.geometria.ancho, mesa.geometria.alto))
+        return self.capas.obtener((mesa.clave_tablero, mesa.tam_casilla), crear)
+
+    def actualizar(self, ahora):
+        for mesa in self.mesas:
+            mesa.avanzar(ahora)
+
+    def dibujar(self, superficie):
+        # Solo las mesas cuya clave cambió; las demás siguen en pantalla
+        dibujadas = 0
+        for mesa in self.mesas:
+            if self.regiones.region(mesa.indice, mesa.rect, mesa.clave()):
+                mesa.dibujar(superficie, self.capa(mesa))
+                dibujadas += 1
+        return dibujadas
+
+
+def main():
+    def opcion(nombre, convertir, defecto=None):
+        if nombre in sys.argv:
+            return convertir(sys.argv[sys.argv.index(nombre) + 1])
+        return defecto
+
+    # --partidas N mesas en pantalla, --tableros K tableros distintos entre
+    # ellas, --version code0|code1, --semilla S, --segundos T cierra solo e
+    # imprime el tiempo medio por cuadro
+    ventana = abrir_ventana((ANCHO, ALTO), "Serpientes y Escaleras - Espectadores")
+    ventana.fill(FONDO)
+    muro = Muro(opcion("--partidas", int, 16), opcion("--tableros", int, 4),
+                opcion("--version", str, "code1"), opcion("--casillas", int, 200),
+                semilla=opcion("--semilla", int))
+    segundos = opcion("--segundos", float)
+    reloj = pygame.time.Clock()
+    cuadros = 0
+    tiempo_trabajo = 0.0
+    ejecutando = True
+    while ejecutando:
+        for evento in pygame.event.get():
+            if evento.type == pygame.QUIT:
+                ejecutando = False
+        ahora = pygame.time.get_ticks()
+        inicio = time.perf_counter()
+        muro.actualizar(ahora)
+        muro.dibujar(ventana)
+        muro.regiones.presentar()
+        tiempo_trabajo += time.perf_counter() - inicio
+        cuadros += 1
+        if segundos is not None and ahora >= segundos * 1000:
+            break
+        reloj.tick(FPS)
+
+    if segundos is not None:
+        print(f"{cuadros} cuadros, {1000 * tiempo_trabajo / cuadros:.2f} ms de trabajo por cuadro")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
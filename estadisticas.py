@@ -0,0 +1,112 @@
+import math
+
+import numpy as np
+
+# Estadísticas en flujo con memoria fija y combinación exacta.
+# Cada pieza se actualiza con lotes de valores (arreglos de NumPy) y ocupa
+# lo mismo tras mil partidas que tras diez mil millones: los conteos son
+# arreglos de tamaño fijo y las sumas enteros de Python. Combinar dos
+# resultados parciales suma sus conteos, así que da lo mismo que haberlo
+# agregado todo en un solo proceso, en cualquier orden.
+#
+# Los cuantiles salen de un bosquejo con cubetas logarítmicas (como
+# DDSketch): el valor de cada cuantil tiene un error relativo acotado por
+# ERROR_RELATIVO aunque los valores no tengan tope.
+
+LIMITE_HISTOGRAMA = 1024  # Valores 0..LIMITE-1 con cubeta propia; el resto cuenta como desborde
+ERROR_RELATIVO = 0.01
+MAXIMO_BOSQUEJO = 1 << 20  # Valores mayores se cuentan en la última cubeta
+CUANTILES = (0.5, 0.9, 0.99)
+
+
+class Histograma:
+    def __init__(self, limite=LIMITE_HISTOGRAMA):
+        self.conteo = np.zeros(limite, dtype=np.int64)
+        self.desbordes = 0
+        self.cantidad = 0
+        self.suma = 0
+        self.minimo = None
+        self.maximo = None
+
+    # valores: enteros no negativos
+    def agregar(self, valores):
+        valores = np.asarray(valores)
+        if not valores.size:
+            return
+        dentro = valores[valores < self.conteo.size]
+        self.conteo += np.bincount(dentro, minlength=self.conteo.size)
+        self.desbordes += int(valores.size - dentro.size)
+        self.cantidad += int(valores.size)
+        self.suma += int(valores.sum(dtype=np.int64))
+        self.actualizar_extremos(int(valores.min()), int(valores.max()))
+
+    def combinar(self, otro):
+        if otro.conteo.size != self.conteo.size:
+            raise ValueError("Solo se combinan histogramas con el mismo límite")
+        self.conteo += otro.conteo
+        self.desbordes += otro.desbordes
+        self.cantidad += otro.cantidad
+        self.suma += otro.suma
+        if otro.cantidad:
+            self.actualizar_extremos(otro.minimo, otro.maximo)
+
+    def actualizar_extremos(self, minimo, maximo):
+        self.minimo = minimo if self.minimo is None else min(self.minimo, minimo)
+        self.maximo = maximo if self.maximo is None else max(self.maximo, maximo)
+
+    def media(self):
+        return self.suma / self.cantidad if self.cantidad else 0.0
+
+    def a_dict(self):
+        usados = np.flatnonzero(self.conteo)
+        return {
+            "cantidad": self.cantidad, "media": self.media(), "minimo": self.minimo, "maximo": self.maximo,
+            "desbordes": self.desbordes,
+            # Sin los ceros finales: el índice es el valor
+            "conteo": self.conteo[:usados[-1] + 1].tolist() if usados.size else [],
+        }
+
+
+class BosquejoCuantiles:
+    def __init__(self, error_relativo=ERROR_RELATIVO, maximo=MAXIMO_BOSQUEJO):
+        self.error_relativo = error_relativo
+        self.gamma = (1 + error_relativo) / (1 - error_relativo)
+        self.log_gamma = math.log(self.gamma)
+        # La cubeta i guarda los valores en (gamma^(i-1), gamma^i]; los <= 0 van aparte
+        self.cubetas = np.zeros(math.ceil(math.log(maximo) / self.log_gamma) + 1, dtype=np.int64)
+        self.ceros = 0
+
+    def agregar(self, valores):
+        valores = np.asarray(valores, dtype=np.float64)
+        positivos = valores[valores > 0]
+        self.ceros += int(valores.size - positivos.size)
+        if positivos.size:
+            indices = np.ceil(np.log(positivos) / self.log_gamma).astype(np.int64)
+            np.clip(indices, 0, self.cubetas.size - 1, out=indices)
+            self.cubetas += np.bincount(indices, minlength=self.cubetas.size)
+
+    def combinar(self, otro):
+        if otro.cubetas.size != self.cubetas.size or otro.gamma != self.gamma:
+            raise ValueError("Solo se combinan bosquejos con los mismos parámetros")
+        self.cubetas += otro.cubetas
+        self.ceros += otro.ceros
+
+    @property
+    def cantidad(self):
+        return int(self.cubetas.sum()) + self.ceros
+
+    # Valor aproximado del cuantil q (0 <= q <= 1), o None sin datos
+    def cuantil(self, q):
+        total = self.cantidad
+        if not total:
+            return None
+        rango = q * (total - 1)
+        if rango < self.ceros:
+            return 0.0
+        acumulado = np.cumsum(self.cubetas)
+        i = int(np.searchsorted(acumulado, rango - self.ceros, side="right"))
+        # Punto de la cubeta con error relativo a lo sumo error_relativo
+        return 2 * self.gamma ** i / (self.gamma + 1)
+
+    def a_dict(self, cuantiles=CUANTILES):
+        return {f"p{round(100 * q, 1):g}": self.cuantil(q) for q in cuantiles}
@@ -0,0 +1,256 @@
+import random
+import threading
+import time
+
+from cache_lru import CacheLRU
+from cache_tableros import analizar
+from motor import REGLAS_CODE1, compilar, siguiente_turno
+
+# Variante con varias fichas por jugador.
+# Tras cada tirada el jugador elige qué ficha mueve; gana quien mete todas
+# sus fichas en la meta. El bot elige con expectimax (max^n: en cada
+# decisión el jugador del turno maximiza su propio valor y en cada tirada
+# se promedian las seis caras) con profundización iterativa: busca a 1, 2,
+# 3... turnos vista y se queda con la última profundidad que terminó antes
+# de agotar su presupuesto de tiempo. Los valores de los nodos de azar se
+# guardan en una tabla de transposiciones con tamaño máximo, con clave
+# (seises, turno, posiciones); las fichas de un jugador son intercambiables,
+# así que sus posiciones se guardan ordenadas. En las hojas, cada jugador
+# vale menos los turnos que le faltan según la cadena de Markov del tablero
+# (la suma de los de cada ficha, porque solo se mueve una por turno), que
+# sale de la caché de análisis en disco si el tablero ya se vio.
+# La clave se empaqueta en un entero y el valor en una tupla plana de
+# números: así el recolector de ciclos deja de recorrer la tabla, y sus
+# pasadas sobre una tabla llena ya no se comen el presupuesto. En el juego
+# la búsqueda corre en un hilo aparte (BotEnHilo) y el bucle de cuadros
+# solo pregunta si ya está la jugada.
+
+FICHAS = 2
+PRESUPUESTO_MS = 50
+MARGEN_MS = 5  # Para salir de la recursión y devolver la jugada a tiempo
+PROFUNDIDAD_MAXIMA = 12
+MAX_TRANSPOSICIONES = 100000
+GANAR = 1e6
+
+
+class TiempoAgotado(Exception):
+    pass
+
+
+class PartidaFichas:
+    def __init__(self, tablero, num_jugadores, fichas=FICHAS, reglas=REGLAS_CODE1, rng=None):
+        if fichas < 1:
+            raise ValueError("Cada jugador necesita al menos una ficha")
+        self.tablero = tablero
+        self.reglas = reglas
+        self.tabla = compilar(tablero, reglas)
+        self.rng = rng if rng is not None else random.Random()
+        self.posiciones = [[reglas.casilla_inicial] * fichas for _ in range(num_jugadores)]
+        self.turno = 0
+        self.ganador = None
+        self.turnos_jugados = 0
+        self.tiradas = 0
+        self.seises = 0
+
+    def lanzar_dado(self):
+        return int(self.rng.random() * 6) + 1
+
+    # Fichas del jugador del turno que todavía no están en la meta
+    def movibles(self):
+        return [i for i, posicion in enumerate(self.posiciones[self.turno]) if posicion != self.tablero.casillas]
+
+    # Mueve la ficha elegida con la tirada dada; devuelve el resultado de la tirada
+    def jugar(self, dado, ficha):
+        if self.ganador is not None:
+            raise ValueError("La partida ya terminó")
+        fichas = self.posiciones[self.turno]
+        if fichas[ficha] == self.tablero.casillas:
+            raise ValueError("Esa ficha ya está en la meta")
+        fichas[ficha], resultado, self.seises, repite = self.tabla.tirar(fichas[ficha], dado, self.seises)
+        self.tiradas += 1
+
+        if all(posicion == self.tablero.casillas for posicion in fichas):
+            self.ganador = self.turno
+            self.turnos_jugados += 1
+        elif not repite:
+            self.turno = siguiente_turno(self.turno, len(self.posiciones))
+            self.turnos_jugados += 1
+        return resultado
+
+    def jugar_hasta_el_final(self, elegir, max_tiradas=100000):
+        while self.ganador is None and self.tiradas < max_tiradas:
+            dado = self.lanzar_dado()
+            self.jugar(dado, elegir(self, dado))
+        return self.ganador
+
+
+class BotExpectimax:
+    def __init__(self, tablero, reglas=REGLAS_CODE1, presupuesto_ms=PRESUPUESTO_MS,
+                 max_transposiciones=MAX_TRANSPOSICIONES, profundidad_maxima=PROFUNDIDAD_MAXIMA):
+        self.tabla = compilar(tablero, reglas)
+        self.meta = tablero.casillas
+        self.presupuesto = max(presupuesto_ms - MARGEN_MS, 1) / 1000
+        self.profundidad_maxima = profundidad_maxima
+        self.transposiciones = CacheLRU(max_transposiciones)
+        self.limite = 0.0
+        self.profundidad_alcanzada = 0  # De la última jugada, para informes
+
+        # Turnos que le faltan a una ficha desde cada casilla (0 en la meta;
+        # las inalcanzables nunca se ocupan)
+        self.turnos = [turnos or 0.0 for turnos in analizar(tablero, reglas)["turnos_por_casilla"]]
+
+    # Índice de la ficha a mover con el dado, para la partida en su estado actual
+    def elegir(self, partida, dado):
+        fichas = partida.posiciones[partida.turno]
+        estado = tuple(tuple(sorted(posiciones)) for posiciones in partida.posiciones)
+        destino = self.elegir_en(estado, partida.turno, dado, partida.seises)
+        return next(i for i, posicion in enumerate(fichas) if posicion == destino)
+
+    # Casilla de la ficha a mover (las fichas en la misma casilla son equivalentes)
+    def elegir_en(self, estado, turno, dado, seises=0):
+        opciones = sorted({posicion for posicion in estado[turno] if posicion != self.meta})
+        if len(opciones) == 1:
+            self.profundidad_alcanzada = 0
+            return opciones[0]
+
+        self.limite = time.perf_counter() + self.presupuesto
+        mejor = opciones[0]
+        self.profundidad_alcanzada = 0
+        for profundidad in range(1, self.profundidad_maxima + 1):
+            try:
+                _, mejor = self.decision(estado, turno, dado, seises, profundidad)
+            except TiempoAgotado:
+                break
+            self.profundidad_alcanzada = profundidad
+        return mejor
+
+    # Valor de cada jugador en las hojas: menos los turnos que le faltan
+    def evaluar(self, estado):
+        turnos = self.turnos
+        return tuple(-sum(turnos[posicion] for posicion in posiciones) for posiciones in estado)
+
+    # Mueve la ficha de la casilla origen; devuelve (estado, turno, seises, ganó)
+    def aplicar(self, estado, turno, dado, seises, origen):
+        destino, _, seises, repite = self.tabla.tirar(origen, dado, seises)
+        posiciones = list(estado[turno])
+        posiciones.remove(origen)
+        posiciones.append(destino)
+        posiciones.sort()
+        nuevo = estado[:turno] + (tuple(posiciones),) + estado[turno + 1:]
+        if posiciones[0] == self.meta:
+            return nuevo, turno, 0, True
+        if not repite:
+            turno = siguiente_turno(turno, len(estado))
+        return nuevo, turno, seises, False
+
+    # Nodo de decisión: el jugador del turno elige la ficha que más le conviene
+    def decision(self, estado, turno, dado, seises, profundidad):
+        mejor_valor = mejor = None
+        for origen in sorted({posicion for posicion in estado[turno] if posicion != self.meta}):
+            nuevo, siguiente, nuevos_seises, gano = self.aplicar(estado, turno, dado, seises, origen)
+            if gano:
+                valor = tuple(GANAR if asiento == turno else -GANAR for asiento in range(len(estado)))
+            else:
+                valor = self.azar(nuevo, siguiente, nuevos_seises, profundidad - 1)
+            if mejor_valor is None or valor[turno] > mejor_valor[turno]:
+                mejor_valor, mejor = valor, origen
+        return mejor_valor, mejor
+
+    # Nodo de azar: promedio de las seis caras del dado
+    def azar(self, estado, turno, seises, profundidad):
+        if profundidad == 0:
+            return self.evaluar(estado)
+        clave = seises * len(estado) + turno  # Los seises, sin tope, en las cifras más altas
+        base = self.meta + 1
+        for posiciones in estado:
+            for posicion in posiciones:
+                clave = clave * base + posicion
+        guardado = self.transposiciones.buscar(clave)
+        if guardado is not None and guardado[0] >= profundidad:
+            return guardado[1:]
+
+        suma = [0.0] * len(estado)
+        for dado in range(1, 7):
+            if time.perf_counter() > self.limite:
+                raise TiempoAgotado()
+            valor, _ = self.decision(estado, turno, dado, seises, profundidad)
+            for asiento, componente in enumerate(valor):
+                suma[asiento] += componente
+        valor = tuple(componente / 6 for componente in suma)
+        self.transposiciones.guardar(clave, (profundidad,) + valor)
+        return valor
+
+
+
+# El bot en un hilo aparte, para que el bucle de cuadros no espere la
+# búsqueda: consultar() devuelve la jugada si ya está y si no la encarga
+class BotEnHilo:
+    def __init__(self, bot):
+        self.bot = bot
+        self.condicion = threading.Condition()
+        self.pedido = None  # Solo el último: los anteriores ya no se juegan
+        self.en_curso = None
+        self.resultado = None  # (pedido, casilla de origen)
+        self.hilo = None
+
+    # Casilla de la ficha a mover, o None si todavía se está buscando
+    def consultar(self, estado, turno, dado, seises=0):
+        pedido = (estado, turno, dado, seises)
+        with self.condicion:
+            if self.resultado is not None and self.resultado[0] == pedido:
+                return self.resultado[1]
+            if pedido != self.pedido and pedido != self.en_curso:
+                self.pedido = pedido
+                if self.hilo is None:
+                    self.hilo = threading.Thread(target=self.trabajar, daemon=True)
+                    self.hilo.start()
+                self.condicion.notify()
+        return None
+
+    def trabajar(self):
+        while True:
+            with self.condicion:
+                while self.pedido is None:
+                    self.condicion.wait()
+                pedido = self.en_curso = self.pedido
+                self.pedido = None
+            origen = self.bot.elegir_en(*pedido)
+            with self.condicion:
+                self.resultado = (pedido, origen)
+                self.en_curso = None
+
+
+if __name__ == "__main__":
+    # Uso: python fichas.py [PARTIDAS] [FICHAS] — el bot contra quien mueve
+    # la ficha más atrasada, con el tiempo por jugada del bot
+    from generador import generar_tablero_code1
+    from motor import TableroLogico
+    import sys
+
+    partidas = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    fichas = int(sys.argv[2]) if len(sys.argv) > 2 else FICHAS
+    rng = random.Random(1)
+    tablero = TableroLogico()
+    generar_tablero_code1(tablero, rng)
+    bot = BotExpectimax(tablero)
+    tiempos = []
+    profundidades = []
+
+    def elegir(partida, dado):
+        if partida.turno == 0:
+            inicio = time.perf_counter()
+            ficha = bot.elegir(partida, dado)
+            tiempos.append(time.perf_counter() - inicio)
+            profundidades.append(bot.profundidad_alcanzada)
+            return ficha
+        movibles = partida.movibles()
+        return min(movibles, key=lambda i: partida.posiciones[partida.turno][i])
+
+    victorias = 0
+    for _ in range(partidas):
+        partida = PartidaFichas(tablero, 2, fichas, rng=rng)
+        victorias += partida.jugar_hasta_el_final(elegir) == 0
+    tiempos.sort()
+    print(f"bot gana {victorias}/{partidas}; jugadas {len(tiempos)}, "
+          f"p50 {1000 * tiempos[len(tiempos) // 2]:.1f} ms, máx {1000 * tiempos[-1]:.1f} ms, "
+          f"profundidad media {sum(profundidades) / len(profundidades):.1f}")
@@ -0,0 +1,115 @@
+import json
+import os
+
+import pygame
+from pygame.sysfont import SysFont, font_constructor
+
+from cache_lru import CacheLRU
+
+# Caché compartida de fuentes y de textos renderizados.
+# Las fuentes se guardan por (nombre, tamaño, negrita) y los textos por
+# (fuente, texto, color); ambas cachés son LRU con tamaño máximo y llevan
+# la cuenta de aciertos y fallos para comprobar que un cuadro estable no
+# crea ni renderiza nada.
+# Buscar una fuente del sistema por nombre recorre todas las carpetas de
+# fuentes (cientos de ms en los quioscos), así que el archivo que resulta
+# (o que no hay ninguno) se guarda en disco y las siguientes ejecuciones lo
+# abren directamente.
+# pygame.font se inicia con la primera fuente que se pide.
+
+MAX_FUENTES = 32
+MAX_TEXTOS = 512
+RUTA_CACHE_RUTAS = os.environ.get(
+    "SERPIENTES_CACHE_FUENTES",
+    os.path.join(os.path.expanduser("~"), ".cache", "serpientes-escaleras", "fuentes.json"))
+
+
+# Archivo de cada fuente del sistema por (nombre, negrita), guardado en disco
+class RutasFuentes:
+    def __init__(self, ruta=RUTA_CACHE_RUTAS):
+        self.ruta = ruta
+        self.rutas = None  # "nombre|negrita" -> [archivo o None, negrita sintética]
+        self.de_cache = 0
+        self.buscadas = 0
+
+    def cargar(self):
+        try:
+            with open(self.ruta) as archivo:
+                self.rutas = json.load(archivo)
+        except (OSError, ValueError):
+            self.rutas = {}
+
+    def guardar(self):
+        # Si no se puede escribir (disco de solo lectura) se busca en la próxima ejecución
+        try:
+            os.makedirs(os.path.dirname(self.ruta), exist_ok=True)
+            temporal = self.ruta + ".tmp"
+            with open(temporal, "w") as archivo:
+                json.dump(self.rutas, archivo, indent=1)
+            os.replace(temporal, self.ruta)
+        except OSError:
+            pass
+
+    # Mismo archivo y estilo que elegiría SysFont
+    def resolver(self, nombre, negrita):
+        if self.rutas is None:
+            self.cargar()
+        clave = f"{nombre}|{int(negrita)}"
+        entrada = self.rutas.get(clave)
+        # Archivo None: no había coincidencia y se usa la fuente por defecto
+        if entrada is not None and (entrada[0] is None or os.path.exists(entrada[0])):
+            self.de_cache += 1
+            return entrada
+
+        encontrada = []
+        SysFont(nombre, 1, bold=negrita,
+                constructor=lambda archivo, tamano, negrita_sintetica, cursiva:
+                encontrada.append([archivo, negrita_sintetica]))
+        entrada = encontrada[0]
+        self.buscadas += 1
+        # También sin coincidencia, o cada arranque volvería a recorrer las
+        # carpetas; si la fuente se instala después, basta con borrar el archivo
+        self.rutas[clave] = entrada
+        self.guardar()
+        return entrada
+
+    def estadisticas(self):
+        return {"de_cache": self.de_cache, "buscadas": self.buscadas}
+
+
+cache_fuentes = CacheLRU(MAX_FUENTES)
+cache_textos = CacheLRU(MAX_TEXTOS)
+rutas_fuentes = RutasFuentes()
+
+
+def crear_fuente(nombre, tamano, negrita):
+    if not pygame.font.get_init():
+        pygame.font.init()
+    # La fuente por defecto de pygame no necesita buscar nada
+    archivo, negrita_sintetica = rutas_fuentes.resolver(nombre, negrita) if nombre else (None, negrita)
+    return font_constructor(archivo, tamano, negrita_sintetica, False)
+
+
+def obtener_fuente(nombre, tamano, negrita=False):
+    return cache_fuentes.obtener((nombre, tamano, negrita),
+                                 lambda: crear_fuente(nombre, tamano, negrita))
+
+
+# La superficie devuelta es compartida: no debe modificarse
+def renderizar(fuente, texto, color):
+    return cache_textos.obtener((fuente, texto, tuple(color)),
+                                lambda: fuente.render(texto, True, color))
+
+
+def estadisticas():
+    return {
+        "fuentes": {"aciertos": cache_fuentes.aciertos, "fallos": cache_fuentes.fallos,
+                    "tamano": len(cache_fuentes.datos)},
+        "textos": {"aciertos": cache_textos.aciertos, "fallos": cache_textos.fallos,
+                   "tamano": len(cache_textos.datos)},
+    }
+
+
+def reiniciar_estadisticas():
+    cache_fuentes.reiniciar_estadisticas()
+    cache_textos.reiniciar_estadisticas()
@@ -0,0 +1,144 @@
+import gc
+import json
+import os
+import subprocess
+import sys
+import tracemalloc
+
+from benchmark import Guion
+from fuentes import cache_textos
+from motor import compilar_clave
+
+import pygame
+
+# Diagnóstico de fugas de memoria para los quioscos.
+# Juega partidas completas seguidas con "Jugar de nuevo", dibujando cada
+# cuadro, y compara instantáneas de tracemalloc tomadas tras unas partidas
+# de calentamiento y al final. Las cachés con tope (textos, reglas
+# compiladas) se vacían antes de cada instantánea para que su llenado no
+# cuente como fuga.
+# Informa el crecimiento por partida y las líneas que más crecieron. Cada
+# front corre en su propio proceso, como en benchmark.py.
+
+CICLOS = 20
+CALENTAMIENTO = 3
+UMBRAL_BYTES_POR_CICLO = 4096
+MAX_CUADROS_PARTIDA = 100000
+
+
+def instantanea():
+    cache_textos.limpiar()
+    compilar_clave.cache_clear()
+    pygame.event.clear()  # El guion no vacía la cola como el bucle real
+    gc.collect()
+    return tracemalloc.take_snapshot()
+
+
+def ciclo_code0(guion, juego, code0):
+    from code0 import ANCHO, EstadoJuego
+
+    clic = lambda x, y: guion.clic(juego.manejar_eventos, x, y)
+    for _ in range(MAX_CUADROS_PARTIDA):
+        if juego.estado == EstadoJuego.FINAL:
+            break
+        if not juego.lanzando_dado:
+            clic(ANCHO - 150, 245)
+        guion.ms += 1001  # Cada tirada termina en el cuadro siguiente
+        juego.actualizar_lanzamiento()
+        juego.dibujar()
+        code0.regiones.presentar()
+    juego.dibujar()
+    code0.regiones.presentar()
+    clic(ANCHO // 2, 395)  # Jugar de nuevo
+
+
+def preparar_code0(guion):
+    import code0
+
+    juego = code0.Juego(semilla=1)
+    guion.clic(juego.manejar_eventos, code0.ANCHO // 2, 325)
+    guion.clic(juego.manejar_eventos, code0.ANCHO // 2, 295)  # 2 Jugadores
+    return lambda: ciclo_code0(guion, juego, code0)
+
+
+def ciclo_code1(guion, juego, code1):
+    clic = lambda x, y: guion.clic(juego.procesar_evento, x, y)
+    for _ in range(MAX_CUADROS_PARTIDA):
+        if juego.estado == "fin_partida":
+            break
+        if not juego.esta_animando():
+            clic(500, 500)
+        juego.actualizar(code1.MS_POR_CUADRO * 30)
+        juego.dibujar()
+        code1.regiones.presentar()
+    juego.dibujar()
+    code1.regiones.presentar()
+    clic(400, 475)  # Jugar de nuevo
+
+
+def preparar_code1(guion):
+    import code1
+
+    juego = code1.Juego(semilla=1)
+    guion.clic(juego.procesar_evento, 500, 305)  # 2 Jugadores
+    return lambda: ciclo_code1(guion, juego, code1)
+
+
+FRONTS = {"code0": preparar_code0, "code1": preparar_code1}
+
+
+def diagnosticar(nombre, ciclos=CICLOS):
+    guion = Guion()
+    ciclo = FRONTS[nombre](guion)
+    tracemalloc.start(10)
+    for _ in range(CALENTAMIENTO):
+        ciclo()
+    inicio = instantanea()
+    for _ in range(ciclos):
+        ciclo()
+    final = instantanea()
+    tracemalloc.stop()
+
+    diferencias = final.compare_to(inicio, "lineno")
+    crecimiento = sum(d.size_diff for d in diferencias)
+    return {
+        "ciclos": ciclos,
+        "crecimiento_bytes": crecimiento,
+        "bytes_por_ciclo": crecimiento // ciclos,
+        "lineas": [{"linea": str(d.traceback[0]), "bytes": d.size_diff, "bloques": d.count_diff}
+                   for d in diferencias[:10] if d.size_diff > 0],
+    }
+
+
+def main():
+    def opcion(nombre, convertir, defecto=None):
+        if nombre in sys.argv:
+            return convertir(sys.argv[sys.argv.index(nombre) + 1])
+        return defecto
+
+    # --ciclos N partidas medidas, --umbral B bytes por partida tolerados,
+    # --front NOMBRE un solo front en este proceso (uso interno)
+    ciclos = opcion("--ciclos", int, CICLOS)
+    front = opcion("--front", str)
+    if front is not None:
+        print(json.dumps(diagnosticar(front, ciclos)))
+        return 0
+
+    resultado = {}
+    for nombre in FRONTS:
+        salida = subprocess.run([sys.executable, os.path.abspath(__file__), "--front", nombre,
+                                 "--ciclos", str(ciclos)],
+                                capture_output=True, text=True, check=True).stdout
+        resultado[nombre] = json.loads(salida.strip().splitlines()[-1])
+    print(json.dumps(resultado, indent=2))
+
+    umbral = opcion("--umbral", int, UMBRAL_BYTES_POR_CICLO)
+    crecen = [nombre for nombre, datos in resultado.items() if datos["bytes_por_ciclo"] > umbral]
+    for nombre in crecen:
+        print(f"Posible fuga en {nombre}: {resultado[nombre]['bytes_por_ciclo']} bytes por partida",
+              file=sys.stderr)
+    return 1 if crecen else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
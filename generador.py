@@ -0,0 +1,294 @@
+import random
+
+import numpy as np
+
+from motor import REGLAS_CODE0, REGLAS_CODE1
+
+# Generador de tableros con restricciones.
+# Los generadores originales escriben en diccionarios con claves al azar:
+# los duplicados se pisan (salen menos serpientes o escaleras de las pedidas),
+# una cabeza de serpiente puede coincidir con el inicio de una escalera y
+# code1 puede pedir randint() con un rango vacío. Aquí cada casilla ocupada
+# por un extremo se marca en un bitset (un int), así que comprobar si está
+# libre es O(1), los extremos nunca se comparten y las cantidades son exactas.
+#
+# Opcionalmente se busca un tablero cuyo número esperado de turnos (de una
+# ficha) se acerque a un objetivo. En lugar de simular, se mantiene la
+# inversa de I - Q de la cadena de Markov con las reglas de la partida:
+# mover una serpiente o escalera cambia el destino de dos casillas, que son
+# actualizaciones de rango bajo de I - Q (Woodbury), así que cada candidato
+# se evalúa en O(n) y solo los aceptados cuestan O(n²).
+
+
+MAX_ITERACIONES = 20000  # Cambios probados al ajustar; los buenos escasean cerca del objetivo
+
+
+# Rangos de cada versión del juego para un tablero de `casillas` casillas
+class Rangos:
+    def __init__(self, serpientes, escaleras, cabeza_minima, caida_minima, caida_maxima,
+                 margen_escaleras, subida_minima, subida_maxima):
+        self.serpientes = serpientes  # Por cada 200 casillas
+        self.escaleras = escaleras
+        self.cabeza_minima = cabeza_minima
+        self.caida_minima = caida_minima
+        self.caida_maxima = caida_maxima  # None: hasta la casilla 1
+        self.margen_escaleras = margen_escaleras  # Casillas libres de escaleras al final
+        self.subida_minima = subida_minima
+        self.subida_maxima = subida_maxima
+
+    def cantidades(self, casillas):
+        return max(1, self.serpientes * casillas // 200), max(1, self.escaleras * casillas // 200)
+
+
+RANGOS_CODE0 = Rangos(10, 10, cabeza_minima=20, caida_minima=5, caida_maxima=50,
+                      margen_escaleras=20, subida_minima=10, subida_maxima=50)
+RANGOS_CODE1 = Rangos(15, 15, cabeza_minima=30, caida_minima=20, caida_maxima=None,
+                      margen_escaleras=30, subida_minima=20, subida_maxima=80)
+
+
+class GeneradorTablero:
+    def __init__(self, casillas, reglas, rangos, rng=random, max_intentos=1000):
+        self.casillas = casillas
+        self.reglas = reglas
+        self.rangos = rangos
+        self.rng = rng
+        self.max_intentos = max_intentos
+        # Casillas reservadas: la 0, la inicial y la meta
+        self.reservadas = 1 | (1 << reglas.casilla_inicial) | (1 << casillas)
+        self.ocupadas = self.reservadas
+        self.serpientes = {}
+        self.escaleras = {}
+
+    def libre(self, casilla):
+        return not self.ocupadas >> casilla & 1
+
+    def marcar(self, a, b):
+        self.ocupadas |= (1 << a) | (1 << b)
+
+    def desmarcar(self, a, b):
+        self.ocupadas &= ~((1 << a) | (1 << b))
+
+    # Un par (origen, destino) libre al azar, o None si no se encontró
+    def proponer(self, es_serpiente):
+        rangos = self.rangos
+        for _ in range(self.max_intentos):
+            if es_serpiente:
+                cabeza_minima = max(rangos.cabeza_minima, rangos.caida_minima + 1, 2)
+                if cabeza_minima > self.casillas - 1:
+                    return None
+                origen = self.rng.randint(cabeza_minima, self.casillas - 1)
+                minimo = 1 if rangos.caida_maxima is None else max(1, origen - rangos.caida_maxima)
+                maximo = origen - rangos.caida_minima
+            else:
+                ultimo_inicio = self.casillas - max(rangos.margen_escaleras, rangos.subida_minima + 1)
+                if ultimo_inicio < 1:
+                    return None
+                origen = self.rng.randint(1, ultimo_inicio)
+                minimo = origen + rangos.subida_minima
+                maximo = min(self.casillas - 1, origen + rangos.subida_maxima)
+            if minimo > maximo:
+                continue
+            destino = self.rng.randint(minimo, maximo)
+            if self.libre(origen) and self.libre(destino):
+                return origen, destino
+        return None
+
+    def colocar(self, es_serpiente, origen, destino):
+        (self.serpientes if es_serpiente else self.escaleras)[origen] = destino
+        self.marcar(origen, destino)
+
+    def quitar(self, es_serpiente, origen):
+        destino = (self.serpientes if es_serpiente else self.escaleras).pop(origen)
+        self.desmarcar(origen, destino)
+        return destino
+
+    def llenar(self):
+        num_serpientes, num_escaleras = self.rangos.cantidades(self.casillas)
+        for es_serpiente, cantidad in ((True, num_serpientes), (False, num_escaleras)):
+            for _ in range(cantidad):
+                par = self.proponer(es_serpiente)
+                if par is None:
+                    raise ValueError(f"No caben {num_serpientes} serpientes y {num_escaleras} "
+                                     f"escaleras en {self.casillas} casillas")
+                self.colocar(es_serpiente, *par)
+
+    def saltos(self):
+        saltos = list(range(self.casillas + 1))
+        for origen, destino in self.serpientes.items():
+            saltos[origen] = destino
+        for origen, destino in self.escaleras.items():
+            saltos[origen] = destino
+        return saltos
+
+    # Mueve serpientes y escaleras hasta que los turnos esperados se acercan
+    # al objetivo; devuelve los turnos esperados del tablero final
+    def ajustar(self, objetivo, tolerancia=0.01, max_iteraciones=MAX_ITERACIONES):
+        evaluador = EvaluadorTurnos(self.casillas, self.saltos(), self.reglas)
+        inicial = self.reglas.casilla_inicial
+        error = abs(evaluador.turnos[inicial] - objetivo)
+        for _ in range(max_iteraciones):
+            if error <= tolerancia * objetivo:
+                break
+            # Quitar una pieza al azar y ponerla en otro sitio
+            es_serpiente = self.rng.random() < 0.5
+            piezas = self.serpientes if es_serpiente else self.escaleras
+            origen = self.rng.choice(list(piezas))
+            destino = self.quitar(es_serpiente, origen)
+            par = self.proponer(es_serpiente)
+            if par is None:
+                self.colocar(es_serpiente, origen, destino)
+                continue
+
+            cambios = [(origen, destino, origen), (par[0], par[0], par[1])]
+            turnos, actualizacion = evaluador.probar(cambios, inicial)
+            nuevo_error = abs(turnos - objetivo) if turnos is not None else error
+            if nuevo_error < error:
+                evaluador.aplicar(actualizacion)
+                self.colocar(es_serpiente, *par)
+                error = nuevo_error
+            else:
+                self.colocar(es_serpiente, origen, destino)
+        return evaluador.recalcular(self.saltos())[inicial]
+
+    def volcar(self, tablero):
+        tablero.serpientes.clear()
+        tablero.escaleras.clear()
+        tablero.serpientes.update(self.serpientes)
+        tablero.escaleras.update(self.escaleras)
+
+
+# Turnos esperados hasta la meta desde cada casilla, con la inversa de I - Q
+# de la cadena de tiradas con las reglas dadas (variantes incluidas). Cada
+# estado es (casilla, seises seguidos en el turno); sin límite de seises el
+# conteo no cambia lo que queda de partida y basta un nivel. Cada tirada que
+# termina el turno cuenta uno. Una tirada que cae en una casilla sigue a
+# saltos[casilla], así que cambiar un salto solo cambia las columnas de esa
+# casilla, una por nivel de seises.
+class EvaluadorTurnos:
+    def __init__(self, casillas, saltos, reglas=REGLAS_CODE0):
+        self.casillas = casillas
+        n = casillas
+        self.niveles = reglas.max_seises or 1
+        tamano = n * self.niveles  # Estado (casilla, nivel) en nivel * n + casilla
+        self.recompensas = np.zeros(tamano)
+        self.fijas = []  # (fila, columna, probabilidad) que no dependen de los saltos
+        self.llegadas = [[] for _ in range(n + 1)]  # Por casilla: (fila, nivel, probabilidad)
+        for nivel in range(self.niveles):
+            for posicion in range(n):
+                fila = nivel * n + posicion
+                for dado in range(1, 7):
+                    if dado == 6 and reglas.max_seises and nivel + 1 >= reglas.max_seises:
+                        # Seis anulado: no se mueve y termina el turno
+                        self.fijas.append((fila, posicion, 1 / 6))
+                        self.recompensas[fila] += 1 / 6
+                        continue
+                    repite = dado == 6 and reglas.seis_repite
+                    siguiente = nivel + 1 if repite and reglas.max_seises else 0
+                    if not repite:
+                        self.recompensas[fila] += 1 / 6
+                    llegada = posicion + dado
+                    if llegada > n:
+                        if reglas.rebote:
+                            llegada = 2 * n - llegada
+                        elif reglas.movimiento_exacto:
+                            # Tirada rechazada: no se comprueba la casilla
+                            self.fijas.append((fila, siguiente * n + posicion, 1 / 6))
+                            continue
+                        else:
+                            llegada = posicion
+                    if llegada == n:
+                        if repite:
+                            self.recompensas[fila] += 1 / 6  # Ganar termina el turno
+                        continue
+                    self.llegadas[llegada].append((fila, siguiente, 1 / 6))
+        self.recalcular(saltos)
+
+    def recalcular(self, saltos):
+        n = self.casillas
+        sistema = np.eye(n * self.niveles)
+        for fila, columna, probabilidad in self.fijas:
+            sistema[fila, columna] -= probabilidad
+        for casilla, llegadas in enumerate(self.llegadas):
+            destino = saltos[casilla]
+            if destino != n:
+                for fila, nivel, probabilidad in llegadas:
+                    sistema[fila, nivel * n + destino] -= probabilidad
+        self.inversa = np.linalg.inv(sistema)
+        self.turnos = self.inversa @ self.recompensas
+        return self.turnos
+
+    # Cada cambio (casilla, antes, despues) mueve el salto de una casilla:
+    # por cada nivel, A' = A - u vᵀ con u = probabilidades de caer en ella
+    # desde cada fila y v = e_despues - e_antes (la meta no tiene columna).
+    # Con k columnas se aplica Woodbury: Z = A⁻¹U, C = I - VᵀZ. Devuelve
+    # (Z, C⁻¹, Vᵀt, pares (antes, despues) de índices de V), o None si C es singular.
+    def _woodbury(self, cambios):
+        n = self.casillas
+        columnas = []
+        pares = []
+        for casilla, antes, despues in cambios:
+            for nivel in range(self.niveles):
+                llegadas = [(fila, probabilidad) for fila, siguiente, probabilidad in self.llegadas[casilla]
+                            if siguiente == nivel]
+                if not llegadas:
+                    continue
+                filas, probabilidades = zip(*llegadas)
+                columnas.append(self.inversa[:, filas] @ np.array(probabilidades))
+                pares.append((None if antes == n else nivel * n + antes,
+                              None if despues == n else nivel * n + despues))
+        k = len(columnas)
+        z = np.array(columnas).T
+        vz = np.zeros((k, k))
+        vt = np.zeros(k)
+        for i, par in enumerate(pares):
+            for indice, signo in zip(par, (-1, 1)):
+                if indice is not None:
+                    vz[i] += signo * z[indice]
+                    vt[i] += signo * self.turnos[indice]
+        c = np.eye(k) - vz
+        if abs(np.linalg.det(c)) < 1e-12:
+            return None
+        return z, np.linalg.solve(c, np.eye(k)), vt, pares
+
+    # Turnos esperados desde `casilla` si se aplicaran los cambios, en O(n·k),
+    # y la actualización para aplicar(); (None, None) si no tiene solución
+    def probar(self, cambios, casilla):
+        actualizacion = self._woodbury(cambios)
+        if actualizacion is None:
+            return None, None
+        z, c_inversa, vt, _ = actualizacion
+        return float(self.turnos[casilla] + z[casilla] @ (c_inversa @ vt)), actualizacion
+
+    # Aplica la actualización que devolvió probar(), en O(n²·k)
+    def aplicar(self, actualizacion):
+        z, c_inversa, vt, pares = actualizacion
+        filas = np.zeros((len(pares), self.inversa.shape[0]))
+        for i, (antes, despues) in enumerate(pares):
+            if despues is not None:
+                filas[i] += self.inversa[despues]
+            if antes is not None:
+                filas[i] -= self.inversa[antes]
+        self.inversa += (z @ c_inversa) @ filas
+        self.turnos += z @ (c_inversa @ vt)
+
+
+def generar_tablero(tablero, reglas, rangos, rng=random, objetivo=None, max_iteraciones=MAX_ITERACIONES):
+    generador = GeneradorTablero(tablero.casillas, reglas, rangos, rng)
+    generador.llenar()
+    turnos = None
+    if objetivo is not None:
+        turnos = generador.ajustar(objetivo, max_iteraciones=max_iteraciones)
+    generador.volcar(tablero)
+    return turnos
+
+
+# Mismos nombres y firma que los generadores de motor.py; reglas son las de
+# la partida (con sus variantes), con las que se mide el objetivo
+def generar_tablero_code0(tablero, rng=random, objetivo=None, reglas=REGLAS_CODE0,
+                          max_iteraciones=MAX_ITERACIONES):
+    return generar_tablero(tablero, reglas, RANGOS_CODE0, rng, objetivo, max_iteraciones)
+
+
+def generar_tablero_code1(tablero, rng=random, objetivo=None, reglas=REGLAS_CODE1,
+                          max_iteraciones=MAX_ITERACIONES):
+    return generar_tablero(tablero, reglas, RANGOS_CODE1, rng, objetivo, max_iteraciones)
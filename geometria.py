@@ -0,0 +1,72 @@
+from functools import lru_cache
+
+# Tablas precalculadas de la geometría de un tablero en zigzag.
+# Para cada casilla se guarda una vez su (fila, columna) y el centro en
+# píxeles, y para cada celda de la cuadrícula la casilla que contiene, de
+# modo que dibujar, mover fichas o detectar clics no repite divisiones ni
+# módulos en cada cuadro. La fila 0 es la de arriba; la casilla 1 está en
+# la fila de abajo.
+
+
+class GeometriaTablero:
+    def __init__(self, casillas, columnas, tam_casilla, origen_x=0, origen_y=0,
+                 primera_fila_izquierda=True):
+        self.casillas = casillas
+        self.columnas = columnas
+        self.filas = -(-casillas // columnas)  # División hacia arriba
+        self.tam_casilla = tam_casilla
+        self.origen_x = origen_x
+        self.origen_y = origen_y
+        self.ancho = columnas * tam_casilla
+        self.alto = self.filas * tam_casilla
+
+        # Índice 0 sin usar (casilla fuera del tablero)
+        filas_columnas = [None]
+        centros = [None]
+        # Casilla de cada celda (fila * columnas + columna), 0 si está vacía
+        casilla_por_celda = [0] * (self.filas * columnas)
+        mitad = tam_casilla // 2
+
+        for casilla in range(1, casillas + 1):
+            indice = casilla - 1
+            desde_abajo = indice // columnas
+            fila = self.filas - 1 - desde_abajo
+            columna = indice % columnas
+            # Zigzag: las filas alternan el sentido empezando por la de abajo
+            if (desde_abajo % 2 == 0) != primera_fila_izquierda:
+                columna = columnas - 1 - columna
+
+            filas_columnas.append((fila, columna))
+            centros.append((origen_x + columna * tam_casilla + mitad,
+                            origen_y + fila * tam_casilla + mitad))
+            casilla_por_celda[fila * columnas + columna] = casilla
+
+        self.filas_columnas = tuple(filas_columnas)
+        self.centros = tuple(centros)
+        self.casilla_por_celda = tuple(casilla_por_celda)
+
+    def centro(self, casilla):
+        if casilla <= 0 or casilla > self.casillas:
+            return None
+        return self.centros[casilla]
+
+    def rect_celda(self, casilla):
+        fila, columna = self.filas_columnas[casilla]
+        return (self.origen_x + columna * self.tam_casilla, self.origen_y + fila * self.tam_casilla,
+                self.tam_casilla, self.tam_casilla)
+
+    # Casilla bajo un punto de la pantalla (0 si no hay ninguna)
+    def casilla_en(self, x, y):
+        columna = (x - self.origen_x) // self.tam_casilla
+        fila = (y - self.origen_y) // self.tam_casilla
+        if 0 <= columna < self.columnas and 0 <= fila < self.filas:
+            return self.casilla_por_celda[fila * self.columnas + columna]
+        return 0
+
+
+# Los tableros con la misma forma comparten sus tablas
+@lru_cache(maxsize=16)
+def obtener_geometria(casillas, columnas, tam_casilla, origen_x=0, origen_y=0,
+                      primera_fila_izquierda=True):
+    return GeometriaTablero(casillas, columnas, tam_casilla, origen_x, origen_y,
+                            primera_fila_izquierda)
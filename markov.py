@@ -0,0 +1,137 @@
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import splu
+
+from motor import REGLAS_CODE0, compilar
+
+# Análisis exacto de un tablero como cadena de Markov absorbente.
+# Cada estado es una casilla y cada paso un turno completo de un jugador,
+# con sus tiradas extra si la variante las da (las transiciones salen de
+# las reglas compiladas); la meta es el único estado absorbente. Desde cada
+# casilla solo se llega a unas pocas (seis por turno sin tiradas extra), así
+# que la matriz es dispersa y los turnos esperados y las visitas por casilla
+# salen de una factorización LU dispersa (la misma para los dos sistemas),
+# sin simular partidas, también en tableros de miles de casillas.
+
+
+# Destino de cada (casilla, dado) según las reglas, de la misma tabla
+# compilada que usan las partidas reales
+def tabla_destinos(tablero, reglas=REGLAS_CODE0):
+    destinos = compilar(tablero, reglas).destinos
+    return [destinos[6 * posicion:6 * posicion + 6] for posicion in range(tablero.casillas + 1)]
+
+
+class AnalisisMarkov:
+    def __init__(self, tablero, reglas=REGLAS_CODE0, tolerancia=1e-12, max_turnos=100000):
+        self.casillas = tablero.casillas
+        self.reglas = reglas
+        self.tolerancia = tolerancia
+        self.max_turnos = max_turnos
+        transiciones = compilar(tablero, reglas).transiciones_turno()
+
+        # Casillas alcanzables desde la inicial (la meta se trata aparte)
+        inicio = reglas.casilla_inicial
+        alcanzables = {inicio}
+        pendientes = [inicio]
+        while pendientes:
+            posicion = pendientes.pop()
+            if posicion == self.casillas:
+                continue
+            for destino in transiciones[posicion]:
+                if destino not in alcanzables:
+                    alcanzables.add(destino)
+                    pendientes.append(destino)
+        if self.casillas not in alcanzables:
+            raise ValueError("La meta no es alcanzable en este tablero")
+
+        # Si desde alguna casilla alcanzable no se puede llegar a la meta, la
+        # partida puede no terminar e (I - Q) no tiene inversa
+        anteriores = {}
+        for posicion in alcanzables:
+            if posicion != self.casillas:
+                for destino in transiciones[posicion]:
+                    anteriores.setdefault(destino, []).append(posicion)
+        terminan = {self.casillas}
+        pendientes = [self.casillas]
+        while pendientes:
+            for posicion in anteriores.get(pendientes.pop(), ()):
+                if posicion not in terminan:
+                    terminan.add(posicion)
+                    pendientes.append(posicion)
+        if alcanzables - terminan:
+            raise ValueError("Hay casillas desde las que nunca se llega a la meta")
+
+        # Estados transitorios y su índice en la matriz
+        self.estados = sorted(alcanzables - {self.casillas})
+        indice = {casilla: i for i, casilla in enumerate(self.estados)}
+        n = len(self.estados)
+
+        # Q: transiciones entre estados transitorios, R: probabilidad de llegar a la meta
+        filas, columnas, valores = [], [], []
+        self.R = np.zeros(n)
+        for i, casilla in enumerate(self.estados):
+            for destino, probabilidad in transiciones[casilla].items():
+                if destino == self.casillas:
+                    self.R[i] += probabilidad
+                else:
+                    filas.append(i)
+                    columnas.append(indice[destino])
+                    valores.append(probabilidad)
+        # Las entradas repetidas se suman al convertir
+        self.Q = sparse.csr_matrix((valores, (filas, columnas)), shape=(n, n))
+        self.indice_inicial = indice[inicio]
+
+        # Turnos esperados hasta la meta desde cada estado: (I - Q) t = 1.
+        # Visitas desde la inicial: (I - Q)^T v = e_inicial
+        factores = splu((sparse.identity(n, format="csc") - self.Q).tocsc())
+        self.turnos_por_estado = factores.solve(np.ones(n))
+        unitario = np.zeros(n)
+        unitario[self.indice_inicial] = 1.0
+        fila_inicial = factores.solve(unitario, trans="T")
+        if not np.all(np.isfinite(self.turnos_por_estado)) or np.any(self.turnos_por_estado < 0):
+            raise ValueError("Hay casillas desde las que nunca se llega a la meta")
+        self.turnos_esperados = float(self.turnos_por_estado[self.indice_inicial])
+
+        # Visitas esperadas a cada casilla tras cada turno, partiendo de la inicial.
+        # La suma de todas las visitas (incluida la meta) es igual a los turnos esperados.
+        self._visitas = np.zeros(self.casillas + 1)
+        self._visitas[self.estados] = fila_inicial
+        self._visitas[inicio] -= 1  # La ficha empieza ahí sin haber caído
+        self._visitas[self.casillas] = 1.0
+        self._distribucion = None
+
+    def turnos_esperados_desde(self, casilla):
+        if casilla == self.casillas:
+            return 0.0
+        return float(self.turnos_por_estado[self.estados.index(casilla)])
+
+    def visitas_esperadas(self):
+        return self._visitas.copy()
+
+    def frecuencia_visitas(self):
+        return self._visitas / self._visitas.sum()
+
+    # Probabilidad de terminar exactamente en el turno t (índice t del arreglo)
+    def distribucion_turnos(self):
+        if self._distribucion is None:
+            probabilidades = [0.0]
+            estado = np.zeros(len(self.estados))
+            estado[self.indice_inicial] = 1.0
+            restante = 1.0
+            while restante > self.tolerancia and len(probabilidades) <= self.max_turnos:
+                probabilidades.append(float(estado @ self.R))
+                estado = self.Q.T @ estado
+                restante = float(estado.sum())
+            self._distribucion = np.array(probabilidades)
+        return self._distribucion
+
+    # Probabilidad de que cada asiento sea el primero en llegar, con todos
+    # los jugadores usando el mismo tablero y tirando en orden
+    def probabilidades_ganador(self, num_jugadores):
+        f = self.distribucion_turnos()
+        supervivencia = 1.0 - np.cumsum(f)  # P(T > t)
+        supervivencia_previa = np.concatenate(([1.0], supervivencia[:-1]))  # P(T > t - 1)
+        return np.array([
+            float(np.sum(f * supervivencia ** asiento * supervivencia_previa ** (num_jugadores - 1 - asiento)))
+            for asiento in range(num_jugadores)
+        ])
@@ -0,0 +1,314 @@
+import random
+from functools import lru_cache
+
+# Motor de reglas de Serpientes y Escaleras sin dependencias de pygame.
+# Lo usan code0.py y code1.py para mover fichas y rotar turnos, y sirve
+# también para simular partidas completas sin ventana ni animaciones.
+# Las reglas de cada versión y sus variantes (rebote, tirada extra con 6,
+# turno perdido con tres 6) se compilan una vez por tablero en tablas planas
+# (ReglasCompiladas) que usan por igual el juego, los simuladores y el
+# análisis.
+
+CASILLAS = 200
+MAX_COMPILADAS = 64  # Tableros con sus reglas compilados que se conservan
+PROFUNDIDAD_SEISES = 20  # Tiradas extra seguidas que se analizan sin límite de seises
+
+
+# Reglas de movimiento de cada versión del juego
+class Reglas:
+    def __init__(self, casilla_inicial=1, movimiento_exacto=False, serpientes_primero=False,
+                 rebote=False, seis_repite=False, max_seises=0):
+        self.casilla_inicial = casilla_inicial
+        # True: una tirada que se pasa de la meta se rechaza (code1)
+        # False: la ficha se queda donde estaba (code0)
+        self.movimiento_exacto = movimiento_exacto
+        # Orden en que se resuelve una casilla que es serpiente y escalera a la vez
+        self.serpientes_primero = serpientes_primero
+        # True: lo que sobra al pasarse de la meta se cuenta hacia atrás
+        self.rebote = rebote
+        # True: con un 6 se vuelve a tirar en el mismo turno
+        self.seis_repite = seis_repite
+        # Con N > 0, el N-ésimo 6 seguido de un turno no se mueve y termina el turno
+        self.max_seises = max_seises
+
+    def clave(self):
+        return (self.casilla_inicial, self.movimiento_exacto, self.serpientes_primero,
+                self.rebote, self.seis_repite, self.max_seises)
+
+    # Copia con algunas reglas cambiadas
+    def con(self, **cambios):
+        campos = dict(zip(("casilla_inicial", "movimiento_exacto", "serpientes_primero",
+                           "rebote", "seis_repite", "max_seises"), self.clave()))
+        campos.update(cambios)
+        return Reglas(**campos)
+
+
+REGLAS_CODE0 = Reglas(casilla_inicial=1, movimiento_exacto=False, serpientes_primero=False)
+REGLAS_CODE1 = Reglas(casilla_inicial=0, movimiento_exacto=True, serpientes_primero=True)
+
+# Variantes de la casa que se pueden añadir a las reglas de una versión.
+# El orden importa: el registro de partidas las guarda como bits.
+VARIANTES = {
+    "exacto": {"movimiento_exacto": True},
+    "rebote": {"rebote": True},
+    "seis_repite": {"seis_repite": True},
+    "tres_seises": {"seis_repite": True, "max_seises": 3},
+}
+
+
+# Reglas de una versión con variantes ("rebote,seis_repite" o una lista de nombres)
+def aplicar_variantes(reglas, variantes):
+    if isinstance(variantes, str):
+        variantes = [nombre for nombre in variantes.split(",") if nombre]
+    cambios = {}
+    for nombre in variantes:
+        if nombre not in VARIANTES:
+            raise ValueError(f"Variante de reglas desconocida: {nombre}")
+        cambios.update(VARIANTES[nombre])
+    return reglas.con(**cambios) if cambios else reglas
+
+
+# Parte lógica del tablero: solo casillas, serpientes y escaleras
+class TableroLogico:
+    def __init__(self, serpientes=None, escaleras=None, casillas=CASILLAS):
+        self.casillas = casillas
+        self.serpientes = dict(serpientes or {})  # Dict de cabeza -> cola
+        self.escaleras = dict(escaleras or {})    # Dict de inicio -> fin
+
+    def verificar_casilla(self, posicion, serpientes_primero=False):
+        if serpientes_primero and posicion in self.serpientes:
+            return self.serpientes[posicion]
+        if posicion in self.escaleras:
+            return self.escaleras[posicion]
+        elif posicion in self.serpientes:
+            return self.serpientes[posicion]
+        return posicion
+
+
+# Generador original de code0: 10 escaleras y 10 serpientes por cada 200 casillas
+def generar_serpientes_escaleras_code0(tablero, rng=random):
+    cantidad = max(1, 10 * tablero.casillas // 200)
+
+    # Generar escaleras
+    for _ in range(cantidad):
+        inicio = rng.randint(1, tablero.casillas - 20)  # No muy cerca del final
+        fin = rng.randint(inicio + 10, min(tablero.casillas - 1, inicio + 50))  # Asegurar que suban
+        tablero.escaleras[inicio] = fin
+
+    # Generar serpientes
+    for _ in range(cantidad):
+        cabeza = rng.randint(20, tablero.casillas - 1)  # No muy cerca del inicio
+        cola = rng.randint(max(1, cabeza - 50), cabeza - 5)  # Asegurar que bajen
+        tablero.serpientes[cabeza] = cola
+
+
+# Generador original de code1: 15 serpientes y 15 escaleras por cada 200 casillas
+def generar_serpientes_escaleras_code1(tablero, rng=random):
+    # Generar serpientes (retrocesos)
+    num_serpientes = max(1, 15 * tablero.casillas // 200)
+    for _ in range(num_serpientes):
+        inicio = rng.randint(30, tablero.casillas - 1)  # Evitar casillas muy bajas
+        fin = rng.randint(1, inicio - 20)  # Retroceso significativo
+        tablero.serpientes[inicio] = fin
+
+    # Generar escaleras (avances)
+    num_escaleras = max(1, 15 * tablero.casillas // 200)
+    for _ in range(num_escaleras):
+        inicio = rng.randint(1, tablero.casillas - 30)  # Evitar casillas muy altas
+        fin = rng.randint(inicio + 20, min(inicio + 80, tablero.casillas - 1))  # Avance significativo
+        # Evitar que una escalera termine donde empieza una serpiente
+        if fin not in tablero.serpientes:
+            tablero.escaleras[inicio] = fin
+
+
+# Mueve una ficha y devuelve (nueva_posicion, resultado).
+# resultado: False si no se movió, True si avanzó sin más,
+# "serpiente", "escalera" o "ganador".
+def mover(posicion, pasos, tablero, reglas=REGLAS_CODE0):
+    nueva_posicion = posicion + pasos
+
+    # Verificar si se pasa del final
+    if nueva_posicion > tablero.casillas:
+        if reglas.rebote:
+            nueva_posicion = 2 * tablero.casillas - nueva_posicion
+        elif reglas.movimiento_exacto:
+            return posicion, False
+        else:
+            nueva_posicion = posicion
+
+    # Verificar si cayó en serpiente o escalera
+    final = tablero.verificar_casilla(nueva_posicion, reglas.serpientes_primero)
+
+    if final == tablero.casillas:
+        return final, "ganador"
+    if final < nueva_posicion:
+        return final, "serpiente"
+    if final > nueva_posicion:
+        return final, "escalera"
+    return final, nueva_posicion != posicion
+
+
+def siguiente_turno(turno, num_jugadores):
+    return (turno + 1) % num_jugadores
+
+
+# Reglas ya resueltas para un tablero: tablas planas indexadas por
+# casilla * 6 + (dado - 1) con el destino y el resultado de mover(), así que
+# una tirada es una consulta a una lista sea cual sea la variante.
+class ReglasCompiladas:
+    def __init__(self, tablero, reglas):
+        self.casillas = tablero.casillas
+        self.reglas = reglas
+        self.destinos = []
+        self.resultados = []
+        for posicion in range(self.casillas + 1):
+            for dado in range(1, 7):
+                destino, resultado = mover(posicion, dado, tablero, reglas)
+                self.destinos.append(destino)
+                self.resultados.append(resultado)
+        self.seis_repite = reglas.seis_repite
+        self.max_seises = reglas.max_seises
+        self._transiciones = None
+
+    # Una tirada; seises son los 6 seguidos ya sacados en este turno.
+    # Devuelve (posición, resultado, seises, repite): con repite el mismo
+    # jugador vuelve a tirar. Un 6 anulado devuelve el resultado "anulada".
+    # Llegar a la meta con un 6 también repite: con varias fichas la partida
+    # sigue, y quien llama decide si la meta la termina.
+    def tirar(self, posicion, dado, seises=0):
+        if dado == 6 and self.max_seises and seises + 1 >= self.max_seises:
+            return posicion, "anulada", 0, False
+        indice = posicion * 6 + dado - 1
+        resultado = self.resultados[indice]
+        if dado == 6 and self.seis_repite:
+            return self.destinos[indice], resultado, seises + 1, True
+        return self.destinos[indice], resultado, 0, False
+
+    # Casilla al terminar un turno completo (con las tiradas extra) desde
+    # cada casilla: lista de {destino: probabilidad}
+    def transiciones_turno(self):
+        if self._transiciones is None:
+            self._transiciones = [self.turno_desde(posicion) for posicion in range(self.casillas + 1)]
+        return self._transiciones
+
+    # Con seises > 0 es el resto de un turno que ya lleva esos seises seguidos
+    def turno_desde(self, posicion, seises=0):
+        distribucion = {}
+        pendientes = [(posicion, seises, 1.0)]
+        while pendientes:
+            actual, seises, probabilidad = pendientes.pop()
+            for dado in range(1, 7):
+                destino, resultado, nuevos_seises, repite = self.tirar(actual, dado, seises)
+                # Sin límite de seises, la cola por debajo de 6^-PROFUNDIDAD_SEISES se corta
+                if repite and resultado != "ganador" and nuevos_seises < PROFUNDIDAD_SEISES:
+                    pendientes.append((destino, nuevos_seises, probabilidad / 6))
+                else:
+                    distribucion[destino] = distribucion.get(destino, 0.0) + probabilidad / 6
+        return distribucion
+
+
+# Lo que distingue un tablero con sus reglas: casillas, saltos y reglas
+def clave_tablero(tablero, reglas=REGLAS_CODE0):
+    return (tablero.casillas, tuple(sorted(tablero.serpientes.items())),
+            tuple(sorted(tablero.escaleras.items())), reglas.clave())
+
+
+# Las reglas se compilan una vez por tablero y variante. El tablero se
+# identifica por su contenido porque los generadores lo cambian en el sitio.
+def compilar(tablero, reglas=REGLAS_CODE0):
+    return compilar_clave(clave_tablero(tablero, reglas))
+
+
+@lru_cache(maxsize=MAX_COMPILADAS)
+def compilar_clave(clave):
+    casillas, serpientes, escaleras, reglas = clave
+    return ReglasCompiladas(TableroLogico(dict(serpientes), dict(escaleras), casillas), Reglas(*reglas))
+
+
+# Partida sin interfaz: avanza turnos completos de forma síncrona
+class Partida:
+    def __init__(self, tablero, num_jugadores, reglas=REGLAS_CODE0, rng=None):
+        self.tablero = tablero
+        self.reglas = reglas
+        self.tabla = compilar(tablero, reglas)
+        self.rng = rng if rng is not None else random.Random()
+        self.posiciones = [reglas.casilla_inicial] * num_jugadores
+        self.turno = 0
+        self.ganador = None
+        self.turnos_jugados = 0  # Turnos completos, con sus tiradas extra
+        self.tiradas = 0
+        self.seises = 0  # Seises seguidos del jugador del turno
+
+    def lanzar_dado(self):
+        # Más rápido que randint y con la misma distribución
+        return int(self.rng.random() * 6) + 1
+
+    # Juega una tirada; el turno solo pasa si las reglas no dan otra
+    def jugar_turno(self, valor=None):
+        if self.ganador is not None:
+            raise ValueError("La partida ya terminó")
+        if valor is None:
+            valor = self.lanzar_dado()
+
+        posicion, resultado, self.seises, repite = self.tabla.tirar(
+            self.posiciones[self.turno], valor, self.seises)
+        self.posiciones[self.turno] = posicion
+        self.tiradas += 1
+
+        # Verificar si hay un ganador o pasar al siguiente jugador
+        if resultado == "ganador":
+            self.ganador = self.turno
+            self.turnos_jugados += 1
+        elif not repite:
+            self.turno = siguiente_turno(self.turno, len(self.posiciones))
+            self.turnos_jugados += 1
+        return resultado
+
+    def jugar_hasta_el_final(self, max_turnos=None):
+        if self.ganador is not None:
+            return self.ganador
+
+        # Bucle rápido: cada tirada es una consulta a la tabla plana de
+        # destinos en lugar de una llamada a mover()
+        destinos = self.tabla.destinos
+        meta = self.tablero.casillas
+        posiciones = self.posiciones
+        num_jugadores = len(posiciones)
+        aleatorio = self.rng.random
+        turno = self.turno
+        limite = -1 if max_turnos is None else max(0, max_turnos - self.turnos_jugados)
+
+        jugados = tiradas = 0
+        if not self.tabla.seis_repite and not self.tabla.max_seises:
+            while jugados != limite:
+                jugados += 1
+                nueva_posicion = destinos[posiciones[turno] * 6 + int(aleatorio() * 6)]
+                posiciones[turno] = nueva_posicion
+                if nueva_posicion == meta:
+                    self.ganador = turno
+                    break
+                turno = (turno + 1) % num_jugadores
+            tiradas = jugados
+        else:
+            # Con tiradas extra (o seises anulados) el turno pasa al sacar algo
+            # distinto de 6
+            tabla = self.tabla
+            seises = self.seises
+            while jugados != limite:
+                tiradas += 1
+                dado = int(aleatorio() * 6) + 1
+                nueva_posicion, _, seises, repite = tabla.tirar(posiciones[turno], dado, seises)
+                posiciones[turno] = nueva_posicion
+                if nueva_posicion == meta:
+                    jugados += 1
+                    self.ganador = turno
+                    break
+                if not repite:
+                    jugados += 1
+                    turno = (turno + 1) % num_jugadores
+            self.seises = seises
+
+        self.turno = turno
+        self.turnos_jugados += jugados
+        self.tiradas += tiradas
+        return self.ganador
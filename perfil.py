@@ -0,0 +1,136 @@
+import csv
+import time
+from array import array
+from functools import wraps
+
+import pygame
+
+from fuentes import obtener_fuente, renderizar
+
+# Perfilador de fases del cuadro.
+# El bucle principal marca el final de cada fase (eventos, actualizar,
+# dibujar, presentar) y los métodos decorados con @medir suman su propio
+# tiempo; todo con perf_counter_ns. Cada fase guarda un valor por cuadro en
+# el que corrió en su propio búfer circular de CAPACIDAD valores, del que
+# salen los p50/p95/p99 del panel: los cuadros en que una fase no corre (el
+# menú durante la partida) no cuentan como ceros. Desactivado, cada marca es
+# una llamada que solo comprueba un booleano, así que puede quedarse en los
+# quioscos.
+
+CAPACIDAD = 600  # 10 s a 60 FPS
+PERCENTILES = (50, 95, 99)
+REFRESCO_PANEL = 15  # Cuadros entre recálculos del panel
+
+
+class Perfilador:
+    def __init__(self, capacidad=CAPACIDAD):
+        self.capacidad = capacidad
+        self.activo = False
+        self.mostrar_panel = False
+        self.fases = {}  # nombre -> array("q") con los ns de los últimos cuadros en que corrió
+        self.escritos = {}  # nombre -> valores guardados en total (la posición sigue de ahí)
+        self.actual = {}  # ns acumulados en el cuadro en curso
+        self.cuadros = 0
+        self.inicio = self.ultimo = 0
+        self.archivo_csv = None
+        self.escritor_csv = None
+        self.columnas_csv = None
+        self.lineas_panel = []
+
+    def reiniciar(self):
+        self.fases.clear()
+        self.escritos.clear()
+        self.actual.clear()
+        self.cuadros = 0
+
+    # Guarda una fila por cuadro con los ns de cada fase
+    def exportar_csv(self, ruta, fases):
+        self.archivo_csv = open(ruta, "w", newline="")
+        self.escritor_csv = csv.writer(self.archivo_csv)
+        self.columnas_csv = list(fases) + ["total"]
+        self.escritor_csv.writerow(["cuadro"] + self.columnas_csv)
+        self.activo = True
+
+    def alternar_panel(self):
+        self.mostrar_panel = not self.mostrar_panel
+        if self.mostrar_panel and not self.activo:
+            self.reiniciar()
+        self.activo = self.mostrar_panel or self.escritor_csv is not None
+
+    def inicio_cuadro(self):
+        if self.activo:
+            self.inicio = self.ultimo = time.perf_counter_ns()
+
+    # Tiempo desde la marca anterior
+    def marca(self, fase):
+        if self.activo:
+            ahora = time.perf_counter_ns()
+            self.actual[fase] = self.actual.get(fase, 0) + ahora - self.ultimo
+            self.ultimo = ahora
+
+    def sumar(self, fase, ns):
+        self.actual[fase] = self.actual.get(fase, 0) + ns
+
+    def fin_cuadro(self):
+        if not self.activo:
+            return
+        self.actual["total"] = time.perf_counter_ns() - self.inicio
+        for fase, ns in self.actual.items():
+            if fase not in self.fases:
+                self.fases[fase] = array("q", bytes(8 * self.capacidad))
+                self.escritos[fase] = 0
+            self.fases[fase][self.escritos[fase] % self.capacidad] = ns
+            self.escritos[fase] += 1
+        if self.escritor_csv is not None:
+            self.escritor_csv.writerow([self.cuadros] + [self.actual.get(f, 0) for f in self.columnas_csv])
+        self.actual.clear()
+        self.cuadros += 1
+
+    # Percentiles en milisegundos de los cuadros guardados en que corrió la fase
+    def percentiles(self, fase):
+        valores = sorted(self.fases[fase][:min(self.escritos[fase], self.capacidad)])
+        if not valores:
+            return tuple(0.0 for _ in PERCENTILES)
+        return tuple(valores[min(len(valores) - 1, p * len(valores) // 100)] / 1e6 for p in PERCENTILES)
+
+    # Panel con los percentiles; devuelve su rectángulo (None si está oculto)
+    def dibujar_panel(self, superficie, x=10, y=10):
+        if not self.mostrar_panel:
+            return None
+        if self.cuadros % REFRESCO_PANEL == 1 or not self.lineas_panel:
+            self.lineas_panel = ["fase            p50    p95    p99 ms"]
+            for fase in self.fases:
+                p50, p95, p99 = self.percentiles(fase)
+                self.lineas_panel.append(f"{fase[:14]:<14}{p50:6.2f} {p95:6.2f} {p99:6.2f}")
+        fuente = obtener_fuente("monospace", 14)
+        alto_linea = fuente.get_linesize()
+        rect = pygame.Rect(x, y, 300, alto_linea * len(self.lineas_panel) + 8)
+        superficie.fill((0, 0, 0), rect)
+        for i, linea in enumerate(self.lineas_panel):
+            superficie.blit(renderizar(fuente, linea, (0, 255, 0)), (x + 4, y + 4 + i * alto_linea))
+        return rect
+
+    def cerrar(self):
+        if self.archivo_csv is not None:
+            self.archivo_csv.close()
+            self.archivo_csv = self.escritor_csv = None
+
+
+perfil = Perfilador()
+
+
+# Suma el tiempo del método a la fase; sin perfilador activo solo cuesta
+# comprobar un booleano
+def medir(fase):
+    def decorador(funcion):
+        @wraps(funcion)
+        def medida(*args, **kwargs):
+            if not perfil.activo:
+                return funcion(*args, **kwargs)
+            inicio = time.perf_counter_ns()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                perfil.sumar(fase, time.perf_counter_ns() - inicio)
+        return medida
+    return decorador
@@ -0,0 +1,189 @@
+import threading
+
+import numpy as np
+
+from cache_lru import CacheLRU
+from motor import REGLAS_CODE1, clave_tablero, compilar, siguiente_turno
+
+# Probabilidad exacta de ganar de cada jugador desde la posición actual.
+# Las fichas no interactúan, así que basta con saber, para cada casilla, la
+# probabilidad de seguir sin llegar a la meta tras t turnos propios,
+# S[casilla, t] = P(T > t), con las transiciones por turno de las reglas
+# compiladas (incluidas las variantes), guardadas como arreglos planos de
+# (desde, hasta, probabilidad): unas pocas por casilla. Si la tabla entera
+# cabe en MAX_CELDAS se calcula de una vez, un turno hacia atrás por paso;
+# si no (tableros muy grandes), cada fila se calcula al pedirla empujando la
+# distribución de la ficha turno a turno y se guarda en una LRU, así que la
+# memoria no crece con casillas por turnos. Un asiento gana en su t-ésimo turno si llega justo
+# entonces y los que tiran antes que él en la ronda siguen sin llegar tras
+# t turnos y los que tiran después tras t - 1. Si el que tira ya lleva
+# seises en este turno (tres_seises), su fila empieza con lo que le queda
+# de turno según las reglas. Un hilo aparte hace los cálculos y guarda los
+# resultados por (tablero, posiciones, turno, seises) en una LRU, de modo
+# que el HUD nunca espera: si no está el resultado dibuja el último que tuvo.
+
+TOLERANCIA = 1e-12  # Masa de probabilidad sin terminar que se ignora
+MAX_TURNOS = 5000
+MAX_TABLEROS = 8
+MAX_RESULTADOS = 4096
+MAX_CELDAS = 1 << 22  # Casillas por turnos de la tabla entera (32 MiB)
+MAX_FILAS = 1024  # Filas sueltas por tablero cuando la tabla no cabe
+
+
+class TablaSupervivencia:
+    def __init__(self, tablero, reglas=REGLAS_CODE1, tolerancia=TOLERANCIA, max_turnos=MAX_TURNOS,
+                 max_celdas=MAX_CELDAS, max_filas=MAX_FILAS):
+        self.meta = tablero.casillas
+        self.tolerancia = tolerancia
+        self.max_turnos = max_turnos
+        self.reglas = compilar(tablero, reglas)
+        self.transiciones = self.reglas.transiciones_turno()
+        # Transiciones de un turno como (desde, hasta, probabilidad); lo que
+        # llega a la meta sale de la distribución
+        desde, hasta, probabilidades = [], [], []
+        for posicion, distribucion in enumerate(self.transiciones):
+            if posicion == self.meta:
+                continue
+            for destino, probabilidad in distribucion.items():
+                if destino != self.meta:
+                    desde.append(posicion)
+                    hasta.append(destino)
+                    probabilidades.append(probabilidad)
+        self.desde = np.array(desde, dtype=np.intp)
+        self.hasta = np.array(hasta, dtype=np.intp)
+        self.pesos = np.array(probabilidades)
+        self.filas = CacheLRU(max_filas)
+        self.supervivencia = self.calcular_tabla(max_celdas)  # [casilla, t], o None si no cabe
+
+    # S entera: S[:, t] = P S[:, t - 1], con la meta en 0
+    def calcular_tabla(self, max_celdas):
+        supervivencia = np.ones(self.meta + 1)
+        supervivencia[self.meta] = 0.0
+        columnas = [supervivencia]
+        while supervivencia.max() > self.tolerancia and len(columnas) <= self.max_turnos:
+            if (len(columnas) + 1) * (self.meta + 1) > max_celdas:
+                return None
+            supervivencia = np.bincount(self.desde, weights=self.pesos * supervivencia[self.hasta],
+                                        minlength=self.meta + 1)
+            columnas.append(supervivencia)
+        return np.stack(columnas, axis=1)
+
+    # Destinos del turno que empieza (o sigue, con seises) en la casilla
+    def turno_desde(self, posicion, seises=0):
+        if not seises:
+            return self.transiciones[posicion]
+        return self.reglas.turno_desde(posicion, seises)
+
+    # P(T > t) para t = 0, 1... de una ficha en la casilla que tira ahora con
+    # esos seises ya sacados; termina cuando queda menos de la tolerancia
+    def fila(self, posicion, seises=0):
+        if self.supervivencia is not None and not seises:
+            return self.supervivencia[posicion]
+        return self.filas.obtener((posicion, seises), lambda: self.calcular_fila(posicion, seises))
+
+    def calcular_fila(self, posicion, seises):
+        if posicion == self.meta:
+            return np.zeros(1)
+        if self.supervivencia is not None:
+            # Lo que queda de este turno y luego la tabla
+            fila = np.zeros(self.supervivencia.shape[1])
+            for destino, probabilidad in self.turno_desde(posicion, seises).items():
+                fila[1:] += probabilidad * self.supervivencia[destino, :-1]
+            fila[0] = 1.0
+            return fila
+        estado = np.zeros(self.meta + 1)
+        for destino, probabilidad in self.turno_desde(posicion, seises).items():
+            estado[destino] += probabilidad
+        estado[self.meta] = 0.0
+        columnas = [1.0]
+        restante = float(estado.sum())
+        while restante > self.tolerancia and len(columnas) <= self.max_turnos:
+            columnas.append(restante)
+            estado = np.bincount(self.hasta, weights=estado[self.desde] * self.pesos, minlength=self.meta + 1)
+            restante = float(estado.sum())
+        return np.array(columnas)
+
+    # Probabilidad de ganar de cada asiento; turno es el asiento que tira ahora
+    # y seises los que ya lleva en este turno
+    def probabilidades(self, posiciones, turno, seises=0):
+        num_jugadores = len(posiciones)
+        if self.meta in posiciones:
+            return tuple(float(posicion == self.meta) for posicion in posiciones)
+
+        # Las filas se completan con ceros hasta la más larga (después de su
+        # último valor quedaba menos de la tolerancia)
+        filas = [self.fila(posicion, seises if asiento == turno else 0)
+                 for asiento, posicion in enumerate(posiciones)]
+        turnos = max(len(fila) for fila in filas) + 1
+        filas = np.array([np.pad(fila, (0, turnos - len(fila))) for fila in filas])
+        previa, actual = filas[:, :-1], filas[:, 1:]  # P(T > t - 1) y P(T > t), t >= 1
+        llega = previa - actual  # P(T = t)
+        resultado = [0.0] * num_jugadores
+        for orden in range(num_jugadores):
+            asiento = (turno + orden) % num_jugadores
+            producto = llega[asiento].copy()
+            for otro_orden in range(num_jugadores):
+                if otro_orden != orden:
+                    otro = (turno + otro_orden) % num_jugadores
+                    producto *= actual[otro] if otro_orden < orden else previa[otro]
+            resultado[asiento] = float(producto.sum())
+        return tuple(resultado)
+
+
+class Solucionador:
+    def __init__(self, avisar=None, max_tableros=MAX_TABLEROS, max_resultados=MAX_RESULTADOS):
+        self.avisar = avisar  # Se llama desde el hilo de cálculo al terminar un pedido
+        self.tablas = CacheLRU(max_tableros)
+        self.resultados = CacheLRU(max_resultados)
+        self.condicion = threading.Condition()
+        self.pedido = None  # Solo importa el último: los anteriores ya no se ven
+        self.hilo = None
+
+    # Resultado en caché o None; si no está, se pide al hilo de cálculo
+    def consultar(self, tablero, clave, reglas, posiciones, turno, seises=0):
+        clave_resultado = (clave, tuple(posiciones), turno, seises)
+        with self.condicion:
+            resultado = self.resultados.buscar(clave_resultado)
+            if resultado is None:
+                self.pedido = (tablero, clave, reglas, clave_resultado)
+                if self.hilo is None:
+                    self.hilo = threading.Thread(target=self.trabajar, daemon=True)
+                    self.hilo.start()
+                self.condicion.notify()
+            return resultado
+
+    def tabla(self, tablero, clave, reglas):
+        return self.tablas.obtener(clave, lambda: TablaSupervivencia(tablero, reglas))
+
+    def trabajar(self):
+        while True:
+            with self.condicion:
+                while self.pedido is None:
+                    self.condicion.wait()
+                tablero, clave, reglas, clave_resultado = self.pedido
+                self.pedido = None
+            _, posiciones, turno, seises = clave_resultado
+            tabla = self.tabla(tablero, clave, reglas)
+            resultado = tabla.probabilidades(posiciones, turno, seises)
+            with self.condicion:
+                self.resultados.guardar(clave_resultado, resultado)
+            if self.avisar is not None:
+                self.avisar()
+            self.anticipar(tabla, clave, posiciones, turno, seises)
+
+    # Mientras no llegue otro pedido, las posiciones tras el turno en curso
+    def anticipar(self, tabla, clave, posiciones, turno, seises=0):
+        if tabla.meta in posiciones:
+            return
+        siguiente = siguiente_turno(turno, len(posiciones))
+        for destino in tabla.turno_desde(posiciones[turno], seises):
+            nuevas = posiciones[:turno] + (destino,) + posiciones[turno + 1:]
+            clave_resultado = (clave, nuevas, siguiente, 0)
+            with self.condicion:
+                if self.pedido is not None:
+                    return
+                if clave_resultado in self.resultados.datos:
+                    continue
+            resultado = tabla.probabilidades(nuevas, siguiente)
+            with self.condicion:
+                self.resultados.guardar(clave_resultado, resultado)
@@ -0,0 +1,51 @@
+import pygame
+
+# Presentación por regiones sucias.
+# Cada cuadro el juego declara las regiones de pantalla que dibujó junto con
+# una clave que resume su contenido (posición de una ficha, valor del dado,
+# texto del HUD...). Solo las regiones cuya clave o rectángulo cambió, o que
+# dejaron de dibujarse, se envían a pygame.display.update(); el resto de la
+# pantalla no se vuelve a copiar. Con pantalla_completa=True se usa flip()
+# en cada cuadro, como antes.
+
+
+class RegistroRegiones:
+    def __init__(self, pantalla_completa=False):
+        self.pantalla_completa = pantalla_completa
+        self.anteriores = {}  # nombre -> (rect, clave) del cuadro anterior
+        self.actuales = {}
+        self.sucias = []
+        self.completa = True  # El primer cuadro siempre se presenta entero
+
+    # Devuelve True si la región hay que volver a pintarla en este cuadro
+    def region(self, nombre, rect, clave):
+        rect = pygame.Rect(rect)
+        self.actuales[nombre] = (rect, clave)
+        anterior = self.anteriores.get(nombre)
+        if anterior is None:
+            self.sucias.append(rect)
+        elif anterior[1] != clave or anterior[0] != rect:
+            self.sucias.append(anterior[0])
+            self.sucias.append(rect)
+        else:
+            return self.completa
+        return True
+
+    def invalidar_todo(self):
+        self.completa = True
+
+    def presentar(self):
+        # Las regiones que ya no se dibujan también hay que repintarlas
+        for nombre, (rect, _) in self.anteriores.items():
+            if nombre not in self.actuales:
+                self.sucias.append(rect)
+
+        if self.pantalla_completa or self.completa:
+            pygame.display.flip()
+        elif self.sucias:
+            pygame.display.update(self.sucias)
+
+        self.anteriores, self.actuales = self.actuales, self.anteriores
+        self.actuales.clear()
+        self.sucias.clear()
+        self.completa = False
@@ -0,0 +1,195 @@
+import hashlib
+import os
+import random
+import struct
+import sys
+
+from generador import generar_tablero_code0, generar_tablero_code1
+from motor import (REGLAS_CODE0, REGLAS_CODE1, VARIANTES, Partida, TableroLogico, aplicar_variantes,
+                   generar_serpientes_escaleras_code0, generar_serpientes_escaleras_code1)
+
+# Flujos aleatorios con semilla y registros binarios de partidas.
+# Cada partida deriva de una semilla flujos independientes para el tablero,
+# las tiradas y la animación del dado, así que la misma semilla reproduce
+# el mismo tablero aunque cambie la tasa de cuadros. El registro guarda la
+# semilla del tablero, el objetivo de turnos con que se generó, las
+# variantes de reglas y las tiradas (dos por byte), lo suficiente para
+# volver a jugar la partida sin ventana o dibujarla a cualquier velocidad.
+
+MAGIA = b"SYER"
+FORMATO = 4
+# Versión del juego -> (reglas, generador de tablero)
+VERSIONES = [
+    ("code0", REGLAS_CODE0, generar_tablero_code0),
+    ("code1", REGLAS_CODE1, generar_tablero_code1),
+]
+# Los registros de formato 1 se grabaron con los generadores originales
+GENERADORES_FORMATO_1 = [generar_serpientes_escaleras_code0, generar_serpientes_escaleras_code1]
+# magia, formato, versión, casillas, jugadores, semilla, ganador, tiradas, objetivo (0: ninguno),
+# variantes (un bit por variante, en el orden de motor.VARIANTES). El formato 4
+# tiene la misma cabecera que el 3; cambia el generador (ver generador())
+CABECERA = struct.Struct("<4sBBIBQbIHB")
+CABECERA_FORMATO_1 = struct.Struct("<4sBBIBQbI")
+CABECERA_FORMATO_2 = struct.Struct("<4sBBIBQbIH")
+CABECERAS = {1: CABECERA_FORMATO_1, 2: CABECERA_FORMATO_2, 3: CABECERA, FORMATO: CABECERA}
+# Hasta el formato 3 el objetivo se ajustaba con las reglas base y menos iteraciones
+ITERACIONES_FORMATO_3 = 3000
+
+
+def nueva_semilla():
+    return random.SystemRandom().randrange(2 ** 64)
+
+
+# Semilla estable (igual en cualquier proceso) para un flujo con nombre
+def derivar_semilla(semilla, nombre):
+    resumen = hashlib.blake2b(f"{semilla}:{nombre}".encode(), digest_size=8).digest()
+    return int.from_bytes(resumen, "little")
+
+
+def flujo(semilla, nombre):
+    return random.Random(derivar_semilla(semilla, nombre))
+
+
+def indice_version(nombre):
+    for i, (version, _, _) in enumerate(VERSIONES):
+        if version == nombre:
+            return i
+    raise ValueError(f"Versión de juego desconocida: {nombre}")
+
+
+# Generador de tableros de una versión con la firma (tablero, rng, objetivo);
+# el objetivo se mide con las reglas de la versión y sus variantes
+def generador(version, formato=FORMATO, variantes=()):
+    indice = indice_version(version)
+    _, reglas, generar = VERSIONES[indice]
+    if formato == 1:
+        original = GENERADORES_FORMATO_1[indice]
+        return lambda tablero, rng, objetivo=None: original(tablero, rng)
+    if formato <= 3:
+        return lambda tablero, rng, objetivo=None: generar(tablero, rng, objetivo,
+                                                           max_iteraciones=ITERACIONES_FORMATO_3)
+    reglas = aplicar_variantes(reglas, variantes)
+    return lambda tablero, rng, objetivo=None: generar(tablero, rng, objetivo, reglas)
+
+
+class RegistroPartida:
+    def __init__(self, semilla, version, casillas, num_jugadores, tiradas=(), ganador=None,
+                 objetivo=None, formato=FORMATO, variantes=()):
+        self.semilla = semilla  # Semilla con la que se generó el tablero
+        self.version = version
+        self.casillas = casillas
+        self.num_jugadores = num_jugadores
+        self.tiradas = bytearray(tiradas)
+        self.ganador = ganador
+        self.objetivo = objetivo  # Turnos esperados pedidos al generar el tablero
+        self.formato = formato
+        self.variantes = tuple(variantes)  # Nombres de motor.VARIANTES activas
+
+    def anotar(self, valor):
+        self.tiradas.append(valor)
+
+    def a_bytes(self):
+        campos = (MAGIA, self.formato, indice_version(self.version), self.casillas,
+                  self.num_jugadores, self.semilla,
+                  -1 if self.ganador is None else self.ganador, len(self.tiradas))
+        if self.formato == 1:
+            cabecera = CABECERA_FORMATO_1.pack(*campos)
+        elif self.formato == 2:
+            cabecera = CABECERA_FORMATO_2.pack(*campos, self.objetivo or 0)
+        else:
+            bits = sum(1 << i for i, nombre in enumerate(VARIANTES) if nombre in self.variantes)
+            cabecera = CABECERA.pack(*campos, self.objetivo or 0, bits)
+        # Dos tiradas por byte: la primera en los 4 bits bajos
+        empaquetadas = bytearray((len(self.tiradas) + 1) // 2)
+        for i, valor in enumerate(self.tiradas):
+            empaquetadas[i // 2] |= valor << (4 * (i % 2))
+        return cabecera + bytes(empaquetadas)
+
+    @classmethod
+    def desde_bytes(cls, datos):
+        formato = datos[4] if len(datos) > 4 else None
+        if datos[:4] != MAGIA or formato not in CABECERAS:
+            raise ValueError("No es un registro de partida válido")
+        cabecera = CABECERAS[formato]
+        campos = cabecera.unpack_from(datos)
+        _, _, version, casillas, num_jugadores, semilla, ganador, num_tiradas = campos[:8]
+        objetivo = campos[8] if formato != 1 else 0
+        bits = campos[9] if formato >= 3 else 0
+        variantes = tuple(nombre for i, nombre in enumerate(VARIANTES) if bits >> i & 1)
+        cuerpo = datos[cabecera.size:]
+        tiradas = bytes((cuerpo[i // 2] >> (4 * (i % 2))) & 0xF for i in range(num_tiradas))
+        return cls(semilla, VERSIONES[version][0], casillas, num_jugadores, tiradas,
+                   None if ganador < 0 else ganador, objetivo or None, formato, variantes)
+
+    def guardar(self, ruta):
+        with open(ruta, "wb") as archivo:
+            archivo.write(self.a_bytes())
+
+    @classmethod
+    def cargar(cls, ruta):
+        with open(ruta, "rb") as archivo:
+            return cls.desde_bytes(archivo.read())
+
+
+# Guarda el registro en una carpeta con un nombre único por partida
+def guardar_en_carpeta(registro, carpeta):
+    os.makedirs(carpeta, exist_ok=True)
+    huella = hashlib.blake2b(bytes(registro.tiradas), digest_size=4).hexdigest()
+    ruta = os.path.join(carpeta, f"{registro.version}-{registro.semilla:016x}-{huella}.sye")
+    registro.guardar(ruta)
+    return ruta
+
+
+# Tablero lógico que generó la semilla del registro
+def tablero_de(registro):
+    generar = generador(registro.version, registro.formato, registro.variantes)
+    tablero = TableroLogico(casillas=registro.casillas)
+    generar(tablero, flujo(registro.semilla, "tablero"), registro.objetivo)
+    return tablero
+
+
+# Fuente de tiradas para los front-ends que devuelve las del registro
+class TiradasRegistradas:
+    def __init__(self, tiradas):
+        self.tiradas = iter(tiradas)
+
+    def randint(self, a, b):
+        return next(self.tiradas)
+
+
+# Reglas de la versión del registro con sus variantes
+def reglas_de(registro):
+    return aplicar_variantes(VERSIONES[indice_version(registro.version)][1], registro.variantes)
+
+
+# Vuelve a jugar el registro sin ventana, a toda velocidad
+def reproducir(registro):
+    partida = Partida(tablero_de(registro), registro.num_jugadores, reglas_de(registro))
+    for valor in registro.tiradas:
+        partida.jugar_turno(valor)
+    return partida
+
+
+# Reproduce todos los registros de una carpeta y devuelve cuántos hay y
+# los que no terminan con el ganador anotado
+def verificar_carpeta(carpeta):
+    nombres = sorted(nombre for nombre in os.listdir(carpeta) if nombre.endswith(".sye"))
+    fallidos = []
+    for nombre in nombres:
+        registro = RegistroPartida.cargar(os.path.join(carpeta, nombre))
+        try:
+            ganador = reproducir(registro).ganador
+        except ValueError:
+            ganador = None
+        if ganador != registro.ganador:
+            fallidos.append(nombre)
+    return len(nombres), fallidos
+
+
+if __name__ == "__main__":
+    # Uso: python repeticion.py CARPETA  (trabajo de regresión)
+    total, fallidos = verificar_carpeta(sys.argv[1] if len(sys.argv) > 1 else ".")
+    for nombre in fallidos:
+        print(f"No coincide: {nombre}")
+    print(f"{total} registros reproducidos, {len(fallidos)} con diferencias")
+    sys.exit(1 if fallidos else 0)
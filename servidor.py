@@ -0,0 +1,232 @@
+import asyncio
+import json
+import sys
+
+from motor import Partida, TableroLogico
+from repeticion import (VERSIONES, RegistroPartida, derivar_semilla, flujo, guardar_en_carpeta,
+                        indice_version, nueva_semilla)
+
+# Servidor asyncio con muchas salas de juego independientes.
+# Protocolo: un objeto JSON por línea sobre TCP.
+#   cliente -> {"op": "unirse", "humanos": 2, "bots": 1, "version": "code1"}
+#   servidor -> {"op": "asiento", "sala", "asiento", "semilla", "version", "casillas", "jugadores"}
+#   servidor -> {"op": "inicio", "posiciones", "turno"}  cuando la sala se llena
+#   cliente -> {"op": "lanzar"}
+#   servidor -> {"op": "mov", "asiento", "dado", "casilla", "resultado", "turno"}  a toda la sala
+# Al terminar una partida la misma conexión puede volver a unirse.
+# Cada sala guarda solo la partida del motor, los asientos y el registro de
+# tiradas; el tablero se reconstruye en el cliente desde la semilla
+# (flujo(semilla, "tablero")), así que por la red solo viajan los cambios.
+# Los bots y los asientos de quien se desconecta juegan en el servidor.
+# Una línea más larga que el límite del lector se descarta entera y se
+# responde con un error. Los movimientos se escriben a toda la sala pero solo
+# se espera al que tira, así que quien no lee lo bastante rápido se queda sin
+# conexión al pasar de MAX_BUFER_SALIDA pendientes y su asiento lo juega el
+# servidor.
+
+PUERTO = 8765
+CASILLAS = 200
+MAX_BUFER_SALIDA = 256 * 1024
+
+
+class Sala:
+    __slots__ = ("id", "version", "semilla", "partida", "rng", "conexiones", "humanos",
+                 "registro", "iniciada")
+
+    def __init__(self, id, version, humanos, bots, semilla, casillas=CASILLAS):
+        _, reglas, generar = VERSIONES[indice_version(version)]
+        tablero = TableroLogico(casillas=casillas)
+        generar(tablero, flujo(semilla, "tablero"))
+        self.id = id
+        self.version = version
+        self.semilla = semilla
+        self.partida = Partida(tablero, humanos + bots, reglas)
+        self.rng = flujo(semilla, "dado")
+        # Escritor de cada asiento humano; None para los bots
+        self.conexiones = [None] * (humanos + bots)
+        self.humanos = humanos
+        self.registro = RegistroPartida(semilla, version, casillas, humanos + bots)
+        self.iniciada = False
+
+    # Primer asiento humano sin ocupar (los humanos van antes que los bots)
+    def asiento_libre(self):
+        if self.iniciada:
+            return None
+        for asiento in range(self.humanos):
+            if self.conexiones[asiento] is None:
+                return asiento
+        return None
+
+    def enviar(self, mensaje):
+        datos = json.dumps(mensaje, separators=(",", ":")).encode() + b"\n"
+        for escritor in self.conexiones:
+            if escritor is not None and not escritor.is_closing():
+                escritor.write(datos)
+                if escritor.transport.get_write_buffer_size() > MAX_BUFER_SALIDA:
+                    # Cerrar sin vaciar: el lector de esa conexión ve el final y la deja
+                    escritor.transport.abort()
+
+    def jugar(self):
+        valor = self.rng.randint(1, 6)
+        asiento = self.partida.turno
+        resultado = self.partida.jugar_turno(valor)
+        self.registro.anotar(valor)
+        self.enviar({"op": "mov", "asiento": asiento, "dado": valor,
+                     "casilla": self.partida.posiciones[asiento],
+                     "resultado": resultado, "turno": self.partida.turno})
+
+    def jugar_bots(self):
+        # Los asientos sin conexión se resuelven aquí mismo, sin esperas
+        while self.partida.ganador is None and self.conexiones[self.partida.turno] is None:
+            self.jugar()
+
+
+# Siguiente línea del cliente (b"" al cerrar). Si pasa del límite del lector
+# se tira hasta el salto de línea y se lanza ValueError
+async def leer_linea(lector):
+    try:
+        return await lector.readuntil(b"\n")
+    except asyncio.IncompleteReadError as e:
+        return e.partial
+    except asyncio.LimitOverrunError as e:
+        consumidos = e.consumed
+    while True:
+        await lector.readexactly(consumidos)
+        try:
+            await lector.readuntil(b"\n")
+            break
+        except asyncio.IncompleteReadError:
+            break
+        except asyncio.LimitOverrunError as e:
+            consumidos = e.consumed
+    raise ValueError("Mensaje demasiado largo")
+
+
+class Servidor:
+    def __init__(self, semilla=None, carpeta_repeticiones=None):
+        self.semilla = nueva_semilla() if semilla is None else semilla
+        self.carpeta_repeticiones = carpeta_repeticiones
+        self.salas = {}
+        self.abiertas = {}  # (versión, humanos, bots) -> sala esperando jugadores
+        self.siguiente_id = 0
+        self.partidas_terminadas = 0
+
+    def buscar_sala(self, version, humanos, bots):
+        clave = (version, humanos, bots)
+        sala = self.abiertas.get(clave)
+        if sala is None:
+            sala = Sala(self.siguiente_id, version, humanos, bots,
+                        derivar_semilla(self.semilla, f"sala:{self.siguiente_id}"))
+            self.siguiente_id += 1
+            self.salas[sala.id] = sala
+            self.abiertas[clave] = sala
+        return clave, sala
+
+    def unirse(self, escritor, mensaje):
+        humanos = int(mensaje.get("humanos", 1))
+        bots = int(mensaje.get("bots", 1))
+        version = mensaje.get("version", "code1")
+        if humanos < 1 or not 2 <= humanos + bots <= 4:
+            raise ValueError("Cada partida necesita de 2 a 4 asientos y al menos un humano")
+        indice_version(version)
+
+        clave, sala = self.buscar_sala(version, humanos, bots)
+        asiento = sala.asiento_libre()
+        sala.conexiones[asiento] = escritor
+        tablero = sala.partida.tablero
+        escritor.write(json.dumps({"op": "asiento", "sala": sala.id, "asiento": asiento,
+                                   "semilla": sala.semilla, "version": version,
+                                   "casillas": tablero.casillas,
+                                   "jugadores": len(sala.conexiones)}).encode() + b"\n")
+
+        if sala.asiento_libre() is None:
+            del self.abiertas[clave]
+            sala.iniciada = True
+            sala.enviar({"op": "inicio", "posiciones": sala.partida.posiciones,
+                         "turno": sala.partida.turno})
+            sala.jugar_bots()
+            self.comprobar_fin(sala)
+        return sala, asiento
+
+    def lanzar(self, sala, asiento):
+        if not sala.iniciada or sala.partida.ganador is not None:
+            return "La partida no está en curso"
+        if sala.partida.turno != asiento:
+            return "No es tu turno"
+        sala.jugar()
+        sala.jugar_bots()
+        self.comprobar_fin(sala)
+        return None
+
+    def comprobar_fin(self, sala):
+        if sala.partida.ganador is None or sala.id not in self.salas:
+            return
+        sala.registro.ganador = sala.partida.ganador
+        if self.carpeta_repeticiones:
+            guardar_en_carpeta(sala.registro, self.carpeta_repeticiones)
+        del self.salas[sala.id]
+        self.partidas_terminadas += 1
+
+    def salir(self, sala, asiento):
+        # El asiento pasa a jugarlo el servidor
+        sala.conexiones[asiento] = None
+        if all(c is None for c in sala.conexiones):
+            # Sin nadie mirando no hace falta terminarla
+            self.salas.pop(sala.id, None)
+            if not sala.iniciada:
+                del self.abiertas[(sala.version, sala.humanos, len(sala.conexiones) - sala.humanos)]
+            return
+        if not sala.iniciada:
+            return  # El hueco lo ocupará el próximo que se una
+        sala.jugar_bots()
+        self.comprobar_fin(sala)
+
+    async def atender(self, lector, escritor):
+        sala = asiento = None
+        try:
+            while True:
+                try:
+                    linea = await leer_linea(lector)
+                    if not linea:
+                        break
+                    mensaje = json.loads(linea)
+                    if not isinstance(mensaje, dict):
+                        raise ValueError("Cada mensaje debe ser un objeto JSON")
+                    op = mensaje.get("op")
+                    if op == "unirse" and (sala is None or sala.partida.ganador is not None):
+                        sala, asiento = self.unirse(escritor, mensaje)
+                        error = None
+                    elif op == "lanzar" and sala is not None:
+                        error = self.lanzar(sala, asiento)
+                    else:
+                        error = f"Operación no válida: {op}"
+                except (TypeError, ValueError) as e:
+                    # Campos con el tipo equivocado (por ejemplo "humanos": null) o
+                    # una línea demasiado larga
+                    error = str(e)
+                if error:
+                    escritor.write(json.dumps({"op": "error", "mensaje": error}).encode() + b"\n")
+                await escritor.drain()
+        except ConnectionError:
+            pass
+        finally:
+            if sala is not None and sala.conexiones[asiento] is escritor:
+                self.salir(sala, asiento)
+            escritor.close()
+
+
+async def servir(host="127.0.0.1", puerto=PUERTO, semilla=None, carpeta_repeticiones=None):
+    servidor = Servidor(semilla, carpeta_repeticiones)
+    socket = await asyncio.start_server(servidor.atender, host, puerto, backlog=4096)
+    async with socket:
+        await socket.serve_forever()
+
+
+if __name__ == "__main__":
+    # Uso: python servidor.py [PUERTO] [CARPETA_REPETICIONES]
+    puerto = int(sys.argv[1]) if len(sys.argv) > 1 else PUERTO
+    carpeta = sys.argv[2] if len(sys.argv) > 2 else None
+    try:
+        asyncio.run(servir(puerto=puerto, carpeta_repeticiones=carpeta))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,225 @@
+import numpy as np
+
+from estadisticas import BosquejoCuantiles, Histograma
+from motor import REGLAS_CODE0, compilar
+
+# Simulador por lotes: juega muchas partidas a la vez guardando las
+# posiciones de todas en arreglos de NumPy. Cada tirada se resuelve con la
+# tabla de destinos de las reglas compiladas ([casilla, dado - 1], con
+# serpientes, escaleras y lo que pase al pasarse de la meta) en lugar de
+# consultar los diccionarios del tablero partida por partida.
+# Los resultados se acumulan en estructuras de tamaño fijo (estadisticas.py)
+# y, si se piden, también las serpientes, escaleras y caídas por casilla.
+
+SALTOS = {"serpiente": 1, "escalera": 2}  # Código de cada resultado en tabla_saltos
+
+
+def tipo_posiciones(casillas):
+    # Con enteros de 16 bits los arreglos caben mejor en caché
+    return np.int16 if casillas + 6 <= np.iinfo(np.int16).max else np.int32
+
+
+def tabla_destinos(tablero, reglas=REGLAS_CODE0):
+    destinos = np.array(compilar(tablero, reglas).destinos, dtype=tipo_posiciones(tablero.casillas))
+    return destinos.reshape(tablero.casillas + 1, 6)
+
+
+# Código de SALTOS de cada (casilla, dado - 1): 0 si no toca serpiente ni escalera
+def tabla_saltos(tablero, reglas=REGLAS_CODE0):
+    resultados = compilar(tablero, reglas).resultados
+    return np.array([SALTOS.get(resultado, 0) for resultado in resultados],
+                    dtype=np.int8).reshape(tablero.casillas + 1, 6)
+
+
+# Resultado acumulado de una simulación, sin guardar cada partida; ocupa lo
+# mismo sea cual sea el número de partidas
+class ResultadoLotes:
+    def __init__(self, num_jugadores, casillas=None):
+        self.num_jugadores = num_jugadores
+        self.longitudes = Histograma()  # Turnos de las partidas terminadas
+        self.cuantiles = BosquejoCuantiles()
+        self.victorias_por_asiento = np.zeros(num_jugadores, dtype=np.int64)
+        self.sin_terminar = 0
+        # Conteos por turno, solo si se simula con casillas (ver SimuladorLotes.simular)
+        self.serpientes = 0
+        self.escaleras = 0
+        self.caidas = None if casillas is None else np.zeros(casillas + 1, dtype=np.int64)
+
+    @property
+    def partidas(self):
+        return int(self.victorias_por_asiento.sum()) + self.sin_terminar
+
+    def agregar(self, longitudes, ganadores):
+        terminadas = ganadores >= 0
+        self.sin_terminar += int((~terminadas).sum())
+        self.longitudes.agregar(longitudes[terminadas])
+        self.cuantiles.agregar(longitudes[terminadas])
+        self.victorias_por_asiento += np.bincount(ganadores[terminadas],
+                                                  minlength=self.num_jugadores)
+
+    # Suma exacta de otro resultado (por ejemplo, de otro proceso)
+    def combinar(self, otro):
+        self.longitudes.combinar(otro.longitudes)
+        self.cuantiles.combinar(otro.cuantiles)
+        self.victorias_por_asiento += otro.victorias_por_asiento
+        self.sin_terminar += otro.sin_terminar
+        self.serpientes += otro.serpientes
+        self.escaleras += otro.escaleras
+        if otro.caidas is not None:
+            self.caidas = otro.caidas.copy() if self.caidas is None else self.caidas + otro.caidas
+
+    def longitud_media(self):
+        return float(self.longitudes.media())
+
+    def tasa_victorias(self):
+        total = self.victorias_por_asiento.sum()
+        return self.victorias_por_asiento / total if total else self.victorias_por_asiento.astype(float)
+
+    def a_dict(self):
+        salida = {
+            "partidas": self.partidas,
+            "sin_terminar": self.sin_terminar,
+            "longitud": self.longitudes.a_dict(),
+            "cuantiles_longitud": self.cuantiles.a_dict(),
+            "victorias_por_asiento": self.victorias_por_asiento.tolist(),
+            "tasa_victorias": self.tasa_victorias().tolist(),
+        }
+        if self.caidas is not None:
+            partidas = max(self.partidas, 1)
+            salida.update({
+                "serpientes": self.serpientes, "escaleras": self.escaleras,
+                "serpientes_por_partida": self.serpientes / partidas,
+                "escaleras_por_partida": self.escaleras / partidas,
+                "caidas": self.caidas.tolist(),  # Casilla en la que acaba cada turno
+            })
+        return salida
+
+
+class SimuladorLotes:
+    def __init__(self, tablero, num_jugadores, reglas=REGLAS_CODE0, semilla=None):
+        self.casillas = tablero.casillas
+        self.num_jugadores = num_jugadores
+        self.reglas = reglas
+        self.destinos = tabla_destinos(tablero, reglas)
+        self.saltos = tabla_saltos(tablero, reglas)
+        self.rng = np.random.default_rng(semilla)
+
+    # Juega num_partidas simultáneas. Devuelve (longitudes, ganadores):
+    # longitud en turnos jugados y asiento ganador (-1 si no terminó).
+    # Con conteos (un ResultadoLotes con caidas) suma ahí las serpientes,
+    # escaleras y la casilla en la que acaba cada turno.
+    def simular_lote(self, num_partidas, max_rondas=10000, conteos=None):
+        casillas = self.casillas
+        destinos = self.destinos
+        seis_repite = self.reglas.seis_repite
+        max_seises = self.reglas.max_seises
+        num_jugadores = self.num_jugadores
+        tipo = destinos.dtype
+        tirar = self.rng.integers
+
+        longitudes = np.zeros(num_partidas, dtype=np.int32)
+        ganadores = np.full(num_partidas, -1, dtype=np.int8)
+
+        # Posiciones de las partidas activas: una fila por asiento
+        posiciones = np.full((num_jugadores, num_partidas), self.reglas.casilla_inicial, dtype=tipo)
+        indices = np.arange(num_partidas)
+        vivas = np.ones(num_partidas, dtype=bool)
+        terminadas_sin_compactar = 0
+
+        for ronda in range(max_rondas):
+            for asiento in range(num_jugadores):
+                actual = posiciones[asiento]
+                dados = tirar(0, 6, size=actual.size, dtype=tipo)
+                nueva = destinos[actual, dados]
+                if conteos is not None:
+                    # Las partidas terminadas y sin compactar no cuentan, ni las tiradas anuladas
+                    self.contar_saltos(conteos, actual, dados, vivas & (dados != 5) if max_seises == 1 else vivas)
+                if max_seises == 1:
+                    nueva = np.where(dados == 5, actual, nueva)  # Cualquier 6 anula la tirada
+                elif seis_repite:
+                    nueva = self.tiradas_extra(nueva, dados, tirar, max_seises, conteos, vivas)
+                posiciones[asiento] = nueva
+                if conteos is not None:
+                    conteos.caidas += np.bincount(nueva[vivas], minlength=casillas + 1)
+
+                terminadas = (nueva == casillas) & vivas
+                if not terminadas.any():
+                    continue
+                ids = indices[terminadas]
+                longitudes[ids] = ronda * num_jugadores + asiento + 1
+                ganadores[ids] = asiento
+
+                # Las partidas terminadas quedan congeladas en la meta hasta compactar
+                vivas &= ~terminadas
+                posiciones[:, terminadas] = casillas
+                terminadas_sin_compactar += int(terminadas.sum())
+                if terminadas_sin_compactar * 4 > indices.size:
+                    posiciones = posiciones[:, vivas]
+                    indices = indices[vivas]
+                    vivas = vivas[vivas]
+                    terminadas_sin_compactar = 0
+                    if indices.size == 0:
+                        return longitudes, ganadores
+
+        return longitudes, ganadores
+
+    # Sigue tirando en las partidas que sacaron un 6 hasta que el turno acabe
+    def tiradas_extra(self, nueva, dados, tirar, max_seises, conteos=None, vivas=None):
+        casillas = self.casillas
+        seises = 1
+        repiten = np.flatnonzero((dados == 5) & (nueva != casillas))
+        if conteos is not None:
+            repiten = repiten[vivas[repiten]]
+        while repiten.size:
+            desde = nueva[repiten]
+            dados = tirar(0, 6, size=repiten.size, dtype=nueva.dtype)
+            destino = self.destinos[desde, dados]
+            seises += 1
+            if max_seises and seises >= max_seises:
+                # El último 6 permitido no mueve y termina el turno
+                if conteos is not None:
+                    self.contar_saltos(conteos, desde, dados, dados != 5)
+                destino = np.where(dados == 5, desde, destino)
+                nueva[repiten] = destino
+                break
+            if conteos is not None:
+                self.contar_saltos(conteos, desde, dados, None)
+            nueva[repiten] = destino
+            repiten = repiten[(dados == 5) & (destino != casillas)]
+        return nueva
+
+    def contar_saltos(self, conteos, desde, dados, mascara):
+        saltos = self.saltos[desde, dados]
+        veces = np.bincount(saltos if mascara is None else saltos[mascara], minlength=3)
+        conteos.serpientes += int(veces[SALTOS["serpiente"]])
+        conteos.escaleras += int(veces[SALTOS["escalera"]])
+
+    # Simula en lotes de tamano_lote para que la memoria no dependa del
+    # total; con contar también cuenta serpientes, escaleras y caídas
+    def simular(self, num_partidas, tamano_lote=1 << 18, max_rondas=10000, contar=False):
+        resultado = ResultadoLotes(self.num_jugadores, self.casillas if contar else None)
+        conteos = resultado if contar else None
+        restantes = num_partidas
+        while restantes > 0:
+            lote = min(restantes, tamano_lote)
+            resultado.agregar(*self.simular_lote(lote, max_rondas, conteos))
+            restantes -= lote
+        return resultado
+
+
+if __name__ == "__main__":
+    # Uso: python simulador.py PARTIDAS [JUGADORES] [SEMILLA] — estadísticas en
+    # JSON de un tablero de code1 generado con la semilla
+    import json
+    import sys
+
+    from generador import generar_tablero_code1
+    from motor import REGLAS_CODE1, TableroLogico
+    from repeticion import flujo
+
+    argumentos = [int(a) for a in sys.argv[1:]]
+    semilla = argumentos[2] if len(argumentos) > 2 else 0
+    tablero = TableroLogico()
+    generar_tablero_code1(tablero, flujo(semilla, "tablero"))
+    simulador = SimuladorLotes(tablero, argumentos[1] if len(argumentos) > 1 else 2, REGLAS_CODE1, semilla)
+    print(json.dumps(simulador.simular(argumentos[0], contar=True).a_dict()))
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from estadisticas import BosquejoCuantiles, Histograma
+
+# Histograma y bosquejo de cuantiles: combinar partes da lo mismo que
+# agregarlo todo y los cuantiles respetan el error relativo prometido.
+
+
+def muestras(semilla, cantidad=200000):
+    rng = np.random.default_rng(semilla)
+    # Longitudes de partida: enteros positivos con cola larga
+    return np.ceil(rng.lognormal(3.5, 0.8, cantidad)).astype(np.int64)
+
+
+def test_histograma_combinado_igual_que_agregado():
+    valores = muestras(1)
+    entero = Histograma()
+    entero.agregar(valores)
+    partes = [Histograma() for _ in range(4)]
+    for parte, trozo in zip(partes, np.array_split(valores, 4)):
+        parte.agregar(trozo)
+    combinado = partes[0]
+    for parte in partes[1:]:
+        combinado.combinar(parte)
+    assert combinado.a_dict() == entero.a_dict()
+    assert entero.media() == pytest.approx(valores.mean())
+    assert entero.desbordes == int((valores >= entero.conteo.size).sum())
+    assert (entero.minimo, entero.maximo) == (valores.min(), valores.max())
+
+
+def test_histograma_vacio():
+    histograma = Histograma()
+    histograma.agregar(np.array([], dtype=np.int64))
+    assert histograma.media() == 0.0 and histograma.a_dict()["conteo"] == []
+    with pytest.raises(ValueError):
+        histograma.combinar(Histograma(limite=10))
+
+
+@pytest.mark.parametrize("error_relativo", [0.01, 0.05])
+def test_cuantiles_con_error_relativo_acotado(error_relativo):
+    valores = muestras(2)
+    bosquejo = BosquejoCuantiles(error_relativo)
+    bosquejo.agregar(valores)
+    ordenados = np.sort(valores)
+    for q in (0.0, 0.01, 0.25, 0.5, 0.9, 0.99, 0.999, 1.0):
+        # Mismo rango que usa el bosquejo
+        exacto = ordenados[int(q * (len(valores) - 1))]
+        assert abs(bosquejo.cuantil(q) - exacto) <= error_relativo * exacto * (1 + 1e-9)
+
+
+def test_bosquejo_combinado_igual_que_agregado():
+    valores = np.concatenate([muestras(3, 50000), np.zeros(100, dtype=np.int64)])
+    entero = BosquejoCuantiles()
+    entero.agregar(valores)
+    a, b = BosquejoCuantiles(), BosquejoCuantiles()
+    a.agregar(valores[::2])
+    b.agregar(valores[1::2])
+    a.combinar(b)
+    assert a.cantidad == entero.cantidad == len(valores)
+    assert a.a_dict() == entero.a_dict()
+    assert a.cuantil(0.0) == 0.0
+    assert BosquejoCuantiles().cuantil(0.5) is None
+    with pytest.raises(ValueError):
+        a.combinar(BosquejoCuantiles(0.05))
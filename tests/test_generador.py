@@ -0,0 +1,47 @@
+import random
+
+import pytest
+
+from generador import RANGOS_CODE0, RANGOS_CODE1, GeneradorTablero, generar_tablero_code0, generar_tablero_code1
+from markov import AnalisisMarkov
+from motor import REGLAS_CODE0, REGLAS_CODE1, TableroLogico, aplicar_variantes
+
+# Tableros del generador: extremos sin compartir, cantidades exactas y
+# turnos esperados cerca del objetivo con las reglas de la partida.
+
+
+def extremos(tablero):
+    return [c for par in list(tablero.serpientes.items()) + list(tablero.escaleras.items()) for c in par]
+
+
+@pytest.mark.parametrize("generar, reglas, rangos", [(generar_tablero_code0, REGLAS_CODE0, RANGOS_CODE0),
+                                                     (generar_tablero_code1, REGLAS_CODE1, RANGOS_CODE1)],
+                         ids=["code0", "code1"])
+@pytest.mark.parametrize("casillas", [100, 200, 500])
+def test_extremos_disjuntos_y_cantidades_exactas(generar, reglas, rangos, casillas):
+    for semilla in range(5):
+        tablero = TableroLogico(casillas=casillas)
+        generar(tablero, random.Random(semilla), objetivo=None if semilla % 2 else 40)
+        usados = extremos(tablero)
+        assert len(usados) == len(set(usados))
+        assert not {0, reglas.casilla_inicial, casillas} & set(usados)
+        assert (len(tablero.serpientes), len(tablero.escaleras)) == rangos.cantidades(casillas)
+        assert all(destino < origen for origen, destino in tablero.serpientes.items())
+        assert all(destino > origen for origen, destino in tablero.escaleras.items())
+
+
+@pytest.mark.parametrize("variantes", ["", "rebote", "seis_repite", "tres_seises"])
+@pytest.mark.parametrize("objetivo", [30, 45, 80])
+def test_objetivo_con_las_reglas_de_la_partida(objetivo, variantes):
+    reglas = aplicar_variantes(REGLAS_CODE0, variantes)
+    tablero = TableroLogico(casillas=200)
+    turnos = generar_tablero_code0(tablero, random.Random(1), objetivo, reglas)
+    # Lo que devuelve el generador es lo que mide la cadena de Markov completa
+    assert AnalisisMarkov(tablero, reglas).turnos_esperados == pytest.approx(turnos, rel=1e-9)
+    assert turnos == pytest.approx(objetivo, rel=0.01)
+
+
+def test_sin_sitio():
+    generador = GeneradorTablero(10, REGLAS_CODE0, RANGOS_CODE0, random.Random(0))
+    with pytest.raises(ValueError):
+        generador.llenar()
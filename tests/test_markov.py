@@ -0,0 +1,42 @@
+import math
+import random
+
+import pytest
+
+from generador import generar_tablero_code0, generar_tablero_code1
+from markov import AnalisisMarkov
+from motor import REGLAS_CODE0, REGLAS_CODE1, VARIANTES, TableroLogico, aplicar_variantes
+from simulador import SimuladorLotes
+
+# Los turnos esperados de la cadena de Markov frente a la media de muchas
+# partidas simuladas de un jugador.
+
+PARTIDAS = 50000
+SIGMAS = 5
+
+
+@pytest.mark.parametrize("variante", [None] + list(VARIANTES))
+@pytest.mark.parametrize("reglas_base, generar", [(REGLAS_CODE0, generar_tablero_code0),
+                                                  (REGLAS_CODE1, generar_tablero_code1)],
+                         ids=["code0", "code1"])
+def test_turnos_esperados_frente_a_montecarlo(reglas_base, generar, variante):
+    reglas = aplicar_variantes(reglas_base, [variante] if variante else [])
+    tablero = TableroLogico(casillas=100)
+    generar(tablero, random.Random(11))
+
+    esperados = AnalisisMarkov(tablero, reglas).turnos_esperados
+    resultado = SimuladorLotes(tablero, 1, reglas, semilla=3).simular(PARTIDAS)
+    longitudes = resultado.longitudes
+    media = longitudes.media()
+    valores = range(longitudes.conteo.size)
+    varianza = sum(c * (v - media) ** 2 for v, c in zip(valores, longitudes.conteo.tolist())) / PARTIDAS
+    assert resultado.sin_terminar == 0 and longitudes.desbordes == 0
+    assert abs(media - esperados) < SIGMAS * math.sqrt(varianza / PARTIDAS)
+
+
+def test_tablero_sin_saltos():
+    # Sin serpientes ni escaleras y con movimiento exacto en 2 casillas, desde
+    # la 1 solo el dado 1 llega a la meta: 6 turnos de media
+    tablero = TableroLogico({}, {}, 2)
+    assert AnalisisMarkov(tablero, REGLAS_CODE0.con(movimiento_exacto=True)).turnos_esperados == \
+        pytest.approx(6)
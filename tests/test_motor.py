@@ -0,0 +1,89 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from fichas import PartidaFichas
+from motor import (REGLAS_CODE0, REGLAS_CODE1, VARIANTES, Partida, TableroLogico, aplicar_variantes,
+                   compilar)
+from generador import generar_tablero_code0, generar_tablero_code1
+from simulador import SimuladorLotes
+
+# El motor partida a partida y el simulador por lotes tienen que dar la misma
+# distribución de partidas con cada variante de reglas.
+
+PARTIDAS = 10000
+JUGADORES = 2
+SIGMAS = 5  # Margen de las comparaciones entre muestras al azar
+
+VERSIONES = [("code0", REGLAS_CODE0, generar_tablero_code0),
+             ("code1", REGLAS_CODE1, generar_tablero_code1)]
+
+
+def tablero_de_prueba(generar, casillas=100, semilla=7):
+    tablero = TableroLogico(casillas=casillas)
+    generar(tablero, random.Random(semilla))
+    return tablero
+
+
+@pytest.mark.parametrize("variante", [None] + list(VARIANTES))
+@pytest.mark.parametrize("version, reglas_base, generar", VERSIONES, ids=[v[0] for v in VERSIONES])
+def test_motor_y_simulador_coinciden(version, reglas_base, generar, variante):
+    reglas = aplicar_variantes(reglas_base, [variante] if variante else [])
+    tablero = tablero_de_prueba(generar)
+
+    rng = random.Random(1)
+    longitudes = []
+    victorias = [0] * JUGADORES
+    for _ in range(PARTIDAS):
+        partida = Partida(tablero, JUGADORES, reglas, rng)
+        victorias[partida.jugar_hasta_el_final()] += 1
+        longitudes.append(partida.turnos_jugados)
+    simulado = SimuladorLotes(tablero, JUGADORES, reglas, semilla=1).simular(PARTIDAS)
+    assert simulado.sin_terminar == 0
+
+    # Diferencia de medias de dos muestras independientes
+    error = math.sqrt(2 / PARTIDAS) * np.std(longitudes)
+    assert abs(np.mean(longitudes) - simulado.longitud_media()) < SIGMAS * error
+    tasa = victorias[0] / PARTIDAS
+    error = math.sqrt(2 * tasa * (1 - tasa) / PARTIDAS)
+    assert abs(tasa - simulado.tasa_victorias()[0]) < SIGMAS * error
+
+
+def test_partida_tirada_a_tirada_igual_que_hasta_el_final():
+    tablero = tablero_de_prueba(generar_tablero_code1)
+    reglas = aplicar_variantes(REGLAS_CODE1, "tres_seises")
+    rapida = Partida(tablero, 3, reglas, random.Random(5))
+    rapida.jugar_hasta_el_final()
+    lenta = Partida(tablero, 3, reglas, random.Random(5))
+    while lenta.ganador is None:
+        lenta.jugar_turno()
+    assert (lenta.ganador, lenta.posiciones, lenta.turnos_jugados, lenta.tiradas) == \
+           (rapida.ganador, rapida.posiciones, rapida.turnos_jugados, rapida.tiradas)
+
+
+def test_max_seises_sin_seis_repite():
+    # Con max_seises=1 cualquier 6 se anula aunque no haya tiradas extra
+    tablero = TableroLogico({}, {}, 30)
+    reglas = REGLAS_CODE0.con(max_seises=1)
+    partida = Partida(tablero, 1, reglas, random.Random(0))
+    partida.rng.random = lambda: 0.99  # Siempre sale 6
+    assert partida.jugar_hasta_el_final(max_turnos=5) is None
+    assert partida.posiciones == [reglas.casilla_inicial]
+
+
+def test_seis_a_la_meta_repite_si_quedan_fichas():
+    tablero = TableroLogico({}, {}, 30)
+    reglas = REGLAS_CODE0.con(seis_repite=True)
+    assert compilar(tablero, reglas).tirar(24, 6) == (30, "ganador", 1, True)
+
+    partida = PartidaFichas(tablero, 2, 2, reglas, random.Random(0))
+    partida.posiciones[0] = [24, 1]
+    partida.jugar(6, 0)
+    assert partida.turno == 0 and partida.ganador is None
+    partida.jugar(6, 1)  # El 6 da otra tirada a la ficha que queda
+    assert partida.turno == 0
+    partida.posiciones[0] = [30, 24]
+    partida.jugar(6, 1)
+    assert partida.ganador == 0
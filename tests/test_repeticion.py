@@ -0,0 +1,61 @@
+import pytest
+
+from motor import TableroLogico
+from repeticion import (FORMATO, RegistroPartida, flujo, generador, guardar_en_carpeta, reproducir,
+                        tablero_de, verificar_carpeta)
+
+# Registros de partida: ida y vuelta a bytes en todos los formatos y
+# reproducción hasta el ganador anotado.
+
+
+def jugar_registro(version, variantes=(), objetivo=None, formato=FORMATO, semilla=1234, jugadores=3):
+    registro = RegistroPartida(semilla, version, 100, jugadores, objetivo=objetivo,
+                               formato=formato, variantes=variantes)
+    partida = reproducir(registro)  # Sin tiradas: solo prepara la partida
+    dados = flujo(semilla, "dado")
+    while partida.ganador is None:
+        valor = dados.randint(1, 6)
+        partida.jugar_turno(valor)
+        registro.anotar(valor)
+    registro.ganador = partida.ganador
+    return registro
+
+
+@pytest.mark.parametrize("formato", [1, 2, 3, FORMATO])
+def test_ida_y_vuelta_a_bytes(formato):
+    variantes = ("rebote", "tres_seises") if formato >= 3 else ()
+    objetivo = 40 if formato >= 2 else None
+    registro = jugar_registro("code1", variantes, objetivo, formato)
+    leido = RegistroPartida.desde_bytes(registro.a_bytes())
+    for campo in ("semilla", "version", "casillas", "num_jugadores", "tiradas", "ganador",
+                  "objetivo", "formato", "variantes"):
+        assert getattr(leido, campo) == getattr(registro, campo)
+    assert reproducir(leido).ganador == registro.ganador
+
+
+def test_numero_impar_de_tiradas():
+    registro = RegistroPartida(1, "code0", 100, 2, tiradas=[6, 1, 5])
+    assert RegistroPartida.desde_bytes(registro.a_bytes()).tiradas == bytearray([6, 1, 5])
+
+
+def test_datos_invalidos():
+    with pytest.raises(ValueError):
+        RegistroPartida.desde_bytes(b"NADA")
+
+
+def test_tablero_del_registro_es_el_de_la_semilla():
+    registro = jugar_registro("code0", ("seis_repite",), objetivo=35)
+    tablero = TableroLogico(casillas=100)
+    generador("code0", FORMATO, ("seis_repite",))(tablero, flujo(registro.semilla, "tablero"), 35)
+    reconstruido = tablero_de(registro)
+    assert (reconstruido.serpientes, reconstruido.escaleras) == (tablero.serpientes, tablero.escaleras)
+
+
+def test_verificar_carpeta(tmp_path):
+    for semilla in range(3):
+        guardar_en_carpeta(jugar_registro("code0", semilla=semilla), str(tmp_path))
+    malo = jugar_registro("code1", semilla=99)
+    malo.ganador = (malo.ganador + 1) % malo.num_jugadores
+    guardar_en_carpeta(malo, str(tmp_path))
+    total, fallidos = verificar_carpeta(str(tmp_path))
+    assert total == 4 and len(fallidos) == 1
@@ -0,0 +1,171 @@
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from cache_tableros import simular
+from motor import TableroLogico, aplicar_variantes
+from repeticion import VERSIONES, derivar_semilla, flujo, indice_version, nueva_semilla
+from simulador import ResultadoLotes, SimuladorLotes
+
+# Experimentos de Monte Carlo repartidos entre varios procesos.
+# Cada tarea genera un grupo de tableros con el generador de la versión
+# elegida y juega M partidas en cada uno por cada mezcla de humanos y bots.
+# Las semillas de cada tablero se derivan de la del experimento, así que el
+# resultado no depende de cuántos procesos se usen. El proceso principal
+# combina los resultados a medida que llegan y no guarda nada por tablero.
+# Con contar, cada mezcla suma también serpientes, escaleras y caídas por
+# casilla; como todo lo demás, ocupa lo mismo sea cual sea el experimento.
+# Con cache, lo simulado en cada tablero se guarda en la caché de disco
+# (cache_tableros.py) y repetir el experimento no vuelve a jugarlo.
+
+
+class Experimento:
+    # mezclas: pares (num_jugadores, num_bots) como en Juego.iniciar_partida
+    def __init__(self, num_tableros, partidas_por_tablero, mezclas=None, version="code1",
+                 casillas=200, semilla=None, tableros_por_tarea=16, variantes=(), contar=False,
+                 cache=False):
+        self.num_tableros = num_tableros
+        self.partidas_por_tablero = partidas_por_tablero
+        self.mezclas = [tuple(m) for m in (mezclas or [(1, 1), (2, 0), (3, 0), (4, 0)])]
+        for humanos, bots in self.mezclas:
+            if not 2 <= humanos + bots <= 4:
+                raise ValueError("Cada partida necesita de 2 a 4 asientos")
+        indice_version(version)  # Valida la versión
+        self.version = version
+        self.variantes = tuple(variantes)  # Variantes de motor.VARIANTES sobre las reglas de la versión
+        self.casillas = casillas
+        self.semilla = nueva_semilla() if semilla is None else semilla
+        self.tableros_por_tarea = tableros_por_tarea
+        self.contar = contar
+        self.cache = cache
+
+    def tareas(self):
+        for inicio in range(0, self.num_tableros, self.tableros_por_tarea):
+            yield inicio, min(inicio + self.tableros_por_tarea, self.num_tableros)
+
+
+# Estadísticas en flujo de la longitud media por tablero
+class ResumenTableros:
+    def __init__(self):
+        self.cantidad = 0
+        self.suma = 0.0
+        self.suma_cuadrados = 0.0
+        self.minimo = float("inf")
+        self.maximo = float("-inf")
+
+    def agregar(self, valor):
+        self.cantidad += 1
+        self.suma += valor
+        self.suma_cuadrados += valor * valor
+        self.minimo = min(self.minimo, valor)
+        self.maximo = max(self.maximo, valor)
+
+    def combinar(self, otro):
+        self.cantidad += otro.cantidad
+        self.suma += otro.suma
+        self.suma_cuadrados += otro.suma_cuadrados
+        self.minimo = min(self.minimo, otro.minimo)
+        self.maximo = max(self.maximo, otro.maximo)
+
+    def a_dict(self):
+        if not self.cantidad:
+            return {"tableros": 0}
+        media = self.suma / self.cantidad
+        varianza = max(0.0, self.suma_cuadrados / self.cantidad - media * media)
+        return {"tableros": self.cantidad, "media": media, "desviacion": varianza ** 0.5,
+                "minimo": self.minimo, "maximo": self.maximo}
+
+
+class ResultadoTorneo:
+    def __init__(self, mezclas, casillas=None):
+        self.por_mezcla = {m: ResultadoLotes(sum(m), casillas) for m in mezclas}
+        self.tableros = {m: ResumenTableros() for m in mezclas}
+
+    def combinar(self, otro):
+        for mezcla, resultado in otro.por_mezcla.items():
+            self.por_mezcla[mezcla].combinar(resultado)
+            self.tableros[mezcla].combinar(otro.tableros[mezcla])
+
+    def a_dict(self):
+        salida = {}
+        for (humanos, bots), resultado in self.por_mezcla.items():
+            salida[f"{humanos}+{bots}"] = {
+                "partidas": resultado.partidas,
+                "sin_terminar": resultado.sin_terminar,
+                "longitud_media": resultado.longitud_media(),
+                "cuantiles_longitud": resultado.cuantiles.a_dict(),
+                "victorias_por_asiento": resultado.victorias_por_asiento.tolist(),
+                "longitud_media_por_tablero": self.tableros[(humanos, bots)].a_dict(),
+            }
+            if resultado.caidas is not None:
+                completo = resultado.a_dict()
+                for clave in ("serpientes_por_partida", "escaleras_por_partida", "caidas"):
+                    salida[f"{humanos}+{bots}"][clave] = completo[clave]
+        return salida
+
+
+# Trabajo de un proceso: los tableros [inicio, fin) del experimento
+def jugar_tarea(experimento, inicio, fin):
+    _, reglas, generar = VERSIONES[indice_version(experimento.version)]
+    reglas = aplicar_variantes(reglas, experimento.variantes)
+    resultado = ResultadoTorneo(experimento.mezclas, experimento.casillas if experimento.contar else None)
+    for i in range(inicio, fin):
+        tablero = TableroLogico(casillas=experimento.casillas)
+        generar(tablero, flujo(experimento.semilla, f"tablero:{i}"))
+        for mezcla in experimento.mezclas:
+            # Humanos y bots siguen las mismas reglas; la mezcla solo fija los asientos
+            semilla = derivar_semilla(experimento.semilla, f"partidas:{i}:{mezcla[0]}+{mezcla[1]}")
+            if experimento.cache:
+                parcial = simular(tablero, reglas, sum(mezcla), experimento.partidas_por_tablero, semilla,
+                                  experimento.contar)
+            else:
+                simulador = SimuladorLotes(tablero, sum(mezcla), reglas, semilla)
+                parcial = simulador.simular(experimento.partidas_por_tablero, contar=experimento.contar)
+            resultado.por_mezcla[mezcla].combinar(parcial)
+            resultado.tableros[mezcla].agregar(parcial.longitud_media())
+    return resultado
+
+
+def ejecutar(experimento, procesos=None):
+    procesos = procesos or os.cpu_count() or 1
+    total = ResultadoTorneo(experimento.mezclas, experimento.casillas if experimento.contar else None)
+    tareas = experimento.tareas()
+    pendientes = set()
+
+    # Como mucho dos tareas por proceso en vuelo: la memoria no crece con el experimento
+    with ProcessPoolExecutor(max_workers=procesos) as grupo:
+        while True:
+            while len(pendientes) < 2 * procesos:
+                tarea = next(tareas, None)
+                if tarea is None:
+                    break
+                pendientes.add(grupo.submit(jugar_tarea, experimento, *tarea))
+            if not pendientes:
+                break
+            listas, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+            for futuro in listas:
+                total.combinar(futuro.result())
+    return total
+
+
+if __name__ == "__main__":
+    # Uso: python torneo.py TABLEROS PARTIDAS [PROCESOS] [SEMILLA] [--reglas V1,V2] [--conteos] [--cache]
+    contar = "--conteos" in sys.argv
+    if contar:
+        sys.argv.remove("--conteos")
+    usar_cache = "--cache" in sys.argv
+    if usar_cache:
+        sys.argv.remove("--cache")
+    variantes = ()
+    if "--reglas" in sys.argv:
+        indice = sys.argv.index("--reglas")
+        variantes = sys.argv[indice + 1].split(",")
+        del sys.argv[indice:indice + 2]
+    argumentos = [int(a) for a in sys.argv[1:]]
+    experimento = Experimento(argumentos[0], argumentos[1],
+                              semilla=argumentos[3] if len(argumentos) > 3 else None, variantes=variantes,
+                              contar=contar, cache=usar_cache)
+    resultado = ejecutar(experimento, argumentos[2] if len(argumentos) > 2 else None)
+    print(json.dumps({"semilla": experimento.semilla, "variantes": list(experimento.variantes),
+                      "mezclas": resultado.a_dict()}, indent=2))
@@ -0,0 +1,92 @@
+from collections import OrderedDict
+
+import pygame
+
+# Vista con desplazamiento para tableros de cualquier tamaño.
+# La cámara muestra una ventana del tablero (en coordenadas del tablero,
+# origen arriba a la izquierda) dentro de un rectángulo de la pantalla.
+# El tablero se hornea por bloques de filas que se cachean con LRU, y en
+# cada cuadro solo se copian los bloques visibles, así que el costo depende
+# del tamaño de la pantalla y no del número de casillas.
+
+
+class Camara:
+    def __init__(self, vista, alto_contenido):
+        self.vista = pygame.Rect(vista)  # Rectángulo en pantalla
+        self.alto_contenido = alto_contenido
+        self.y = 0  # Primera fila de píxeles del tablero visible
+
+    def seguir(self, y_tablero):
+        # Centrar verticalmente un punto del tablero sin salirse del contenido
+        maximo = max(0, self.alto_contenido - self.vista.height)
+        self.y = min(max(0, y_tablero - self.vista.height // 2), maximo)
+
+    def a_pantalla(self, x, y):
+        return self.vista.x + x, self.vista.y + y - self.y
+
+    def a_tablero(self, x, y):
+        return x - self.vista.x, y - self.vista.y + self.y
+
+    def visible(self, x, y, margen=0):
+        x, y = self.a_pantalla(x, y)
+        return self.vista.inflate(2 * margen, 2 * margen).collidepoint(x, y)
+
+
+class CapaPorBloques:
+    # pintar_bloque(superficie, fila_inicial, fila_final) dibuja esas filas
+    # del tablero con la fila_inicial en y = 0
+    def __init__(self, geometria, pintar_bloque, filas_por_bloque=8, max_bloques=12):
+        self.geometria = geometria
+        self.pintar_bloque = pintar_bloque
+        self.filas_por_bloque = filas_por_bloque
+        self.alto_bloque = filas_por_bloque * geometria.tam_casilla
+        self.bloques = OrderedDict()  # índice -> Surface
+        self.max_bloques = max_bloques
+        self.libres = []  # Superficies descartadas que se vuelven a pintar
+
+    def invalidar(self):
+        # Las superficies se reutilizan en lugar de crear otras al repintar
+        self.libres.extend(self.bloques.values())
+        self.bloques.clear()
+
+    def superficie(self, tamano):
+        for i, libre in enumerate(self.libres):
+            if libre.get_size() == tamano:
+                return self.libres.pop(i)
+        return pygame.Surface(tamano).convert()
+
+    def obtener_bloque(self, indice):
+        bloque = self.bloques.get(indice)
+        if bloque is not None:
+            self.bloques.move_to_end(indice)
+            return bloque
+
+        fila_inicial = indice * self.filas_por_bloque
+        fila_final = min(fila_inicial + self.filas_por_bloque, self.geometria.filas)
+        bloque = self.superficie((self.geometria.ancho,
+                                  (fila_final - fila_inicial) * self.geometria.tam_casilla))
+        self.pintar_bloque(bloque, fila_inicial, fila_final)
+        self.bloques[indice] = bloque
+        if len(self.bloques) > self.max_bloques:
+            self.libres.append(self.bloques.popitem(last=False)[1])
+        return bloque
+
+    def dibujar(self, superficie, camara):
+        # Copiar solo los bloques que se ven por la cámara
+        primero = camara.y // self.alto_bloque
+        ultimo = min((camara.y + camara.vista.height - 1) // self.alto_bloque,
+                     (self.geometria.filas - 1) // self.filas_por_bloque)
+        recorte = superficie.get_clip()
+        superficie.set_clip(camara.vista)
+        for indice in range(primero, ultimo + 1):
+            superficie.blit(self.obtener_bloque(indice), camara.a_pantalla(0, indice * self.alto_bloque))
+        superficie.set_clip(recorte)
+
+
+# Serpientes o escaleras que cruzan las filas [fila_inicial, fila_final)
+def cruzan_filas(geometria, pares, fila_inicial, fila_final):
+    for a, b in pares.items():
+        fila_a = geometria.filas_columnas[a][0]
+        fila_b = geometria.filas_columnas[b][0]
+        if min(fila_a, fila_b) < fila_final and max(fila_a, fila_b) >= fila_inicial:
+            yield a, b